@@ -0,0 +1,109 @@
+"""
+Benchmark del cubo de agregación frente a ``groupby().transform``.
+
+Calcula estadísticas por categoría para cada fila, sobre todo el historial y
+solo con los meses anteriores al último (como la media de un fold de la
+validación temporal), con una pasada de pandas por estadística y con un solo
+``AggregationCube``; verifica que coincidan y reporta tiempo y pico de memoria
+asignada (tracemalloc).
+
+Uso:
+    python benchmarks/bench_agg_cube.py --rows 3000000
+"""
+
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, generate
+from src.agg_cube import AggregationCube, month_periods
+from src.joins import dense_lookup
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Estadísticas por categoría a comparar: nombre -> estadística
+FEATURES = {
+    "category_avg": "mean",
+    "category_std": "std",
+    "category_count": "count",
+}
+
+# Tolerancia relativa (las desviaciones se calculan con sumas de cuadrados)
+RTOL = 1e-9
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark the aggregation cube against groupby')
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                      help='Sales rows')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def measure(func):
+    """Ejecuta ``func`` y devuelve (resultado, segundos, pico MB asignado)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    sales, items, _ = generate(SyntheticConfig(rows=args.rows, test_rows=0, seed=args.seed))
+    sales["date"] = pd.to_datetime(sales["date"], format="%d.%m.%Y")
+    sales["item_category_id"] = dense_lookup(
+        sales["item_id"], items["item_id"], items["item_category_id"]
+    )
+    sales["period"] = month_periods(sales)
+    until = int(sales["period"].max())
+
+    def with_groupby():
+        out = {}
+        grouped = sales.groupby("item_category_id")["item_cnt_day"]
+        prior = sales[sales["period"] < until].groupby("item_category_id")["item_cnt_day"]
+        for name, stat in FEATURES.items():
+            out[name] = grouped.transform(stat).to_numpy()
+            out[f"{name}_prior"] = (
+                sales["item_category_id"].map(prior.agg(stat)).to_numpy(dtype=np.float64)
+            )
+        return out
+
+    def with_cube():
+        cube = AggregationCube.from_frame(sales, ["item_cnt_day"], period_column="period")
+        categories = sales["item_category_id"]
+        out = cube.lookup_many(FEATURES, "item_cnt_day", categories)
+        prior = cube.lookup_many(FEATURES, "item_cnt_day", categories, until=until)
+        out.update({f"{name}_prior": values for name, values in prior.items()})
+        return out
+
+    (reference, t_ref, m_ref), (result, t_cube, m_cube) = measure(with_groupby), measure(with_cube)
+    for name in reference:
+        np.testing.assert_allclose(result[name], reference[name], rtol=RTOL, equal_nan=True)
+    logger.info(
+        f"{len(reference)} features: groupby {t_ref:.3f}s / {m_ref:,.0f} MB  |  "
+        f"cubo {t_cube:.3f}s / {m_cube:,.0f} MB  ({t_ref / t_cube:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark de la caché de predicciones del servidor (``src/prediction_cache.py``).
+
+Sobre un conjunto sintético procesado entrena un modelo, escribe su bundle y
+simula consultas repetidas de servicios: ``--requests`` solicitudes de
+``--pairs-per-request`` pares tomados con distribución Zipf de un universo de
+``--distinct-pairs`` pares. Para cada tamaño de caché reporta tasa de aciertos,
+desalojos y latencia media y p99 de ``Predictor.predict`` frente a la versión
+sin caché, con y sin el nivel SQLite, y verifica que las predicciones
+coincidan (salvo redondeo del último bit). Al final reescribe el bundle y
+comprueba que la caché se invalide.
+
+Uso:
+    python benchmarks/bench_cache.py --rows 1000000 --cache-sizes 1000 10000 100000
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.data_processor import DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.feature_matrix import open_feature_matrix
+from src.prediction_cache import PredictionCache
+from src.serving import Predictor
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark the serving prediction cache')
+    parser.add_argument('--rows', type=int, default=1_000_000,
+                      help='Sales rows')
+    parser.add_argument('--requests', type=int, default=5000,
+                      help='Requests per measurement')
+    parser.add_argument('--pairs-per-request', type=int, default=20,
+                      help='shop/item pairs per request')
+    parser.add_argument('--distinct-pairs', type=int, default=50_000,
+                      help='Universe of shop/item pairs the requests draw from')
+    parser.add_argument('--zipf', type=float, default=1.2,
+                      help='Zipf exponent of pair popularity')
+    parser.add_argument('--cache-sizes', type=int, nargs='+', default=[1000, 10_000, 100_000],
+                      help='In-memory cache sizes to measure')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def workload(args) -> list:
+    """Solicitudes (shop_ids, item_ids) con popularidad Zipf sobre un universo de pares."""
+    rng = np.random.default_rng(args.seed)
+    shops = rng.integers(0, 60, args.distinct_pairs)
+    items = rng.integers(0, 22170, args.distinct_pairs)
+    picks = (rng.zipf(args.zipf, (args.requests, args.pairs_per_request)) - 1) % args.distinct_pairs
+    return [(shops[p], items[p]) for p in picks]
+
+
+def replay(predictor: Predictor, requests: list) -> tuple:
+    """Latencias por solicitud (ms) y predicciones concatenadas."""
+    latencies, outputs = [], []
+    for shop_ids, item_ids in requests:
+        start = time.perf_counter()
+        outputs.append(predictor.predict(shop_ids, item_ids))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), np.concatenate(outputs)
+
+
+def main():
+    """Función principal del benchmark"""
+    from train import DEFAULT_PARAMS, save_bundle, train_model
+
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = write(Path(tmp), replace(SyntheticConfig(), rows=args.rows, seed=args.seed))
+        DataProcessor(data_path).process_all()
+        engineer = FeatureEngineer(data_path)
+        engineer.create_all_features()
+        X, y, _ = open_feature_matrix(engineer.prep_path)
+        params = {**DEFAULT_PARAMS, "n_estimators": 200}
+        model, score = train_model(X, y, params)
+        bundle_dir = Path(tmp) / "bundle"
+        save_bundle(engineer, model, bundle_dir, params, score)
+        model_path = Path(tmp) / "model.joblib"
+        requests = workload(args)
+
+        def predictor(cache=None):
+            return Predictor(data_path, model_path, bundle_path=bundle_dir, cache=cache)
+
+        latencies, expected = replay(predictor(), requests)
+        logger.info(
+            f"{'sin caché':<24} media {latencies.mean():6.3f} ms  "
+            f"p99 {np.percentile(latencies, 99):6.3f} ms"
+        )
+        for size in args.cache_sizes:
+            for db in (None, Path(tmp) / f"cache_{size}.sqlite"):
+                cache = PredictionCache(size, db)
+                latencies, values = replay(predictor(cache), requests)
+                np.testing.assert_allclose(values, expected, rtol=1e-12, atol=1e-12)
+                stats = cache.stats()
+                label = f"{size:,} pares{' + SQLite' if db else ''}"
+                logger.info(
+                    f"{label:<24} media {latencies.mean():6.3f} ms  "
+                    f"p99 {np.percentile(latencies, 99):6.3f} ms  "
+                    f"aciertos {stats['hit_rate']:6.1%}  desalojos {stats['evictions']:,}"
+                )
+                cache.close()
+
+        # Un nuevo entrenamiento escribe otra versión del bundle: la caché se invalida
+        cache = PredictionCache(args.cache_sizes[-1])
+        served = predictor(cache)
+        served.check_interval_s = 0.0
+        replay(served, requests[:100])
+        time.sleep(1.1)
+        save_bundle(engineer, model, bundle_dir, params, score)
+        replay(served, requests[:100])
+        assert served.reloads == 1 and cache.invalidations == 1, cache.stats()
+        logger.info(f"Nuevo bundle {served.model_version}: caché invalidada y modelo recargado")
+        logger.info("Predicciones con caché iguales a las calculadas sin caché")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark de subconjuntos de features (``src/feature_registry.py``).
+
+Sobre un conjunto sintético procesado mide ``create_all_features`` y
+``create_test_features_from_stats`` con todas las features y con los
+subconjuntos típicos de una ablación, y reporta los nodos del registro que
+evalúa cada uno. Verifica que cada columna de un subconjunto sea idéntica a
+la misma columna del cálculo completo.
+
+Uso:
+    python benchmarks/bench_features.py --rows 3000000
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.data_processor import DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.feature_registry import REGISTRY
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Subconjuntos de ablación
+SUBSETS = [
+    ["trend_2m", "trend_volatility_ratio"],
+    ["sales_ema_2m", "sales_volatility"],
+    ["sales_ema_2m", "category_avg"],
+]
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark feature subsets')
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                      help='Sales rows')
+    parser.add_argument('--granularity', type=str, default='daily',
+                      choices=['daily', 'monthly'],
+                      help='Training rows: one per sale or one per month/shop/item')
+    parser.add_argument('--repeat', type=int, default=3,
+                      help='Repetitions per measurement (best is reported)')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def best(func, repeat: int) -> tuple:
+    """Mejor tiempo de ``repeat`` ejecuciones y el último resultado."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = write(Path(tmp), replace(SyntheticConfig(), rows=args.rows, seed=args.seed))
+        DataProcessor(data_path).process_all()
+
+        results = {}
+        for features in [None, *SUBSETS]:
+            engineer = FeatureEngineer(data_path, granularity=args.granularity, features=features)
+            train = best(lambda: np.array(engineer.create_all_features()[0]), args.repeat)
+            test_df = engineer.store.read("test_processed")
+            stats = engineer.load_historical_stats()
+            serve = best(
+                lambda: engineer.create_test_features_from_stats(test_df, stats), args.repeat
+            )
+            results[tuple(engineer.features)] = (train, serve)
+            nodes = [
+                name for name in REGISTRY.plan(engineer.features, "train")
+                if name not in engineer.features
+            ]
+            logger.info(
+                f"{', '.join(engineer.features) if features else 'todas':<48} "
+                f"entrenamiento {train[0]:7.3f}s  test {serve[0]:7.3f}s  "
+                f"intermedios: {', '.join(nodes) or '-'}"
+            )
+
+        full_columns = REGISTRY.features()
+        (full_train, full_X), (full_serve, full_test) = results[tuple(full_columns)]
+        for columns, ((train, X), (serve, test)) in results.items():
+            idx = [full_columns.index(name) for name in columns]
+            assert np.array_equal(X, full_X[:, idx]), columns
+            assert test.equals(full_test[list(columns)]), columns
+            if list(columns) != full_columns:
+                logger.info(
+                    f"{', '.join(columns):<48} entrenamiento {full_train / train:5.2f}x  "
+                    f"test {full_serve / serve:5.2f}x más rápido que todas"
+                )
+        logger.info("Columnas de cada subconjunto idénticas al cálculo completo")
+
+
+if __name__ == "__main__":
+    main()
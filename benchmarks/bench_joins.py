@@ -0,0 +1,130 @@
+"""
+Benchmark de los joins por llave frente a ``pd.merge``.
+
+Compara, con datos sintéticos:
+    - ventas x items por ``item_id`` (``dense_lookup``)
+    - filas shop/item x estadísticas agregadas por par (``join_columns`` con
+      llave compuesta densa y con llaves empaquetadas ordenadas)
+
+Reporta tiempo y pico de memoria asignada (tracemalloc) de cada camino y
+verifica que las columnas resultantes coincidan.
+
+Uso:
+    python benchmarks/bench_joins.py --rows 3000000 --pairs 400000
+"""
+
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+import tracemalloc
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, generate
+from src.joins import dense_lookup, join_columns
+from src.stats_index import PAIR_STATS, pack_keys
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark key joins against pandas merge')
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                      help='Sales rows (left side of the item join)')
+    parser.add_argument('--pairs', type=int, default=400_000,
+                      help='Left rows of the shop/item join')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def measure(func):
+    """Ejecuta ``func`` y devuelve (resultado, segundos, pico MB asignado)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def report(name: str, merge_stats: tuple, join_stats: tuple):
+    """Registra la comparación de un caso."""
+    (_, t_merge, m_merge), (_, t_join, m_join) = merge_stats, join_stats
+    logger.info(
+        f"{name}: merge {t_merge:.3f}s / {m_merge:,.0f} MB  |  "
+        f"join {t_join:.3f}s / {m_join:,.0f} MB  ({t_merge / t_join:.1f}x)"
+    )
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    sales, items, _ = generate(SyntheticConfig(rows=args.rows, test_rows=0, seed=args.seed))
+    sales = sales.drop(columns=["date"])
+
+    # 1. Ventas x items por item_id
+    def item_merge():
+        return sales.merge(items[["item_id", "item_category_id"]], on="item_id", how="left")
+
+    def item_join():
+        return dense_lookup(sales["item_id"], items["item_id"], items["item_category_id"])
+
+    merged = measure(item_merge)
+    joined = measure(item_join)
+    assert np.array_equal(merged[0]["item_category_id"].to_numpy(), joined[0])
+    report("item_id -> categoría", merged, joined)
+
+    # 2. Pares shop/item x estadísticas por par
+    stats = (
+        sales.groupby(["shop_id", "item_id"])
+        .agg({"item_cnt_day": ["mean", "std"], "item_price": ["mean", "std"]})
+        .reset_index()
+    )
+    stats.columns = ["shop_id", "item_id", *PAIR_STATS]
+    rng = np.random.default_rng(args.seed)
+    left = stats[["shop_id", "item_id"]].sample(
+        args.pairs, replace=True, random_state=args.seed
+    ).reset_index(drop=True)
+    left.loc[rng.random(len(left)) < 0.3, "item_id"] += 1_000_000  # pares sin historial
+
+    def pair_merge():
+        return left.merge(stats, on=["shop_id", "item_id"], how="left")
+
+    def pair_join():
+        return join_columns(
+            (left["shop_id"], left["item_id"]),
+            (stats["shop_id"], stats["item_id"]),
+            {name: stats[name] for name in PAIR_STATS},
+        )
+
+    def packed_join():
+        return join_columns(
+            pack_keys(left["shop_id"], left["item_id"]),
+            pack_keys(stats["shop_id"], stats["item_id"]),
+            {name: stats[name] for name in PAIR_STATS},
+        )
+
+    merged = measure(pair_merge)
+    for label, func in [("densa", pair_join), ("ordenada", packed_join)]:
+        joined = measure(func)
+        for name in PAIR_STATS:
+            assert np.array_equal(
+                merged[0][name].to_numpy(), joined[0][name], equal_nan=True
+            ), name
+        report(f"shop/item -> estadísticas ({label})", merged, joined)
+
+
+if __name__ == "__main__":
+    main()
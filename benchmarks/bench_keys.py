@@ -0,0 +1,144 @@
+"""
+Benchmark de los códigos densos de pares shop/item (``src/keys.py``).
+
+Sobre un conjunto sintético procesado compara, con y sin la columna
+``pair_code``:
+    - índice por grupo: ``lexsort`` de dos columnas vs radix sort del código
+    - ``HistoricalStats.build``: ``np.unique`` de llaves vs ``bincount`` por código
+    - features de test con historial: ``groupby`` + join vs gather por código
+    - ventanas con el motor pandas (``--pandas-rows`` primeras filas):
+      ``groupby`` de dos columnas vs un código
+    - ``create_all_features`` completo
+y ``create_all_features`` con el backend de dtypes numpy vs pyarrow. Verifica
+que los resultados coincidan, y que ``preprocess_sales`` con columnas pyarrow
+dé lo mismo en uno y en varios procesos (``n_jobs``).
+
+Uso:
+    python benchmarks/bench_keys.py --rows 3000000
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.data_processor import DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.group_engine import GroupSegments
+from src.keys import PAIR_CODE, PairIndex
+from src.stats_index import HistoricalStats
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark dense shop/item pair codes')
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                      help='Sales rows')
+    parser.add_argument('--pandas-rows', type=int, default=20_000,
+                      help='Rows for the (slow) pandas-engine window comparison')
+    parser.add_argument('--repeat', type=int, default=3,
+                      help='Repetitions per measurement (best is reported)')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def best(func, repeat: int) -> tuple:
+    """Mejor tiempo de ``repeat`` ejecuciones y el último resultado."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def report(name: str, without: tuple, with_codes: tuple):
+    """Registra una comparación (tiempo, resultado) sin y con códigos."""
+    logger.info(
+        f"{name:<28} sin códigos {without[0]:7.3f}s  con códigos {with_codes[0]:7.3f}s  "
+        f"({without[0] / with_codes[0]:.1f}x)"
+    )
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = write(Path(tmp), replace(SyntheticConfig(), rows=args.rows, seed=args.seed))
+        DataProcessor(data_path).process_all()
+
+        coded = FeatureEngineer(data_path)
+        plain = FeatureEngineer(data_path)
+        plain.pair_index_path = data_path / "processed" / "missing.npy"
+        sales, items, test = coded.load_processed_data()
+        sales_plain = sales.drop(columns=[PAIR_CODE])
+        test_plain = test.drop(columns=[PAIR_CODE])
+        keys = PairIndex.load(coded.pair_index_path).keys
+
+        a = best(lambda: GroupSegments.from_frame(sales, ["shop_id", "item_id"]), args.repeat)
+        b = best(lambda: GroupSegments.from_codes(sales[PAIR_CODE]), args.repeat)
+        assert np.array_equal(a[1].order, b[1].order)
+        report("índice por grupo", a, b)
+
+        a = best(lambda: HistoricalStats.build(sales_plain, items), args.repeat)
+        b = best(lambda: HistoricalStats.build(sales, items, keys), args.repeat)
+        assert np.array_equal(a[1].pair_stats, b[1].pair_stats, equal_nan=True)
+        report("HistoricalStats.build", a, b)
+
+        a = best(lambda: plain.create_all_features_for_test(test_plain, sales_plain, items), args.repeat)
+        b = best(lambda: coded.create_all_features_for_test(test, sales, items), args.repeat)
+        np.testing.assert_allclose(a[1].to_numpy(), b[1].to_numpy(), rtol=1e-4, atol=1e-6)
+        report("features de test (historial)", a, b)
+
+        columns = ["sales_ema_2m", "trend_2m", "sales_volatility"]
+        pandas_engine = FeatureEngineer(data_path, engine="pandas")
+        head, head_plain = sales.head(args.pandas_rows), sales_plain.head(args.pandas_rows)
+        a = best(lambda: pandas_engine.create_price_features(
+            pandas_engine.create_time_features(head_plain.copy()))[columns], 1)
+        b = best(lambda: pandas_engine.create_price_features(
+            pandas_engine.create_time_features(head.copy()))[columns], 1)
+        assert a[1].equals(b[1])
+        report("ventanas motor pandas", a, b)
+
+        a = best(lambda: np.array(plain.create_all_features()[0]), 1)
+        b = best(lambda: np.array(coded.create_all_features()[0]), 1)
+        assert np.array_equal(a[1], b[1])
+        report("create_all_features", a, b)
+
+        arrow = FeatureEngineer(data_path, dtype_backend="pyarrow")
+        c = best(lambda: np.array(arrow.create_all_features()[0]), 1)
+        assert np.array_equal(b[1], c[1])
+        logger.info(
+            f"{'dtype backend':<28} numpy {b[0]:7.3f}s  pyarrow {c[0]:7.3f}s  "
+            f"({b[0] / c[0]:.2f}x)"
+        )
+
+        serial = DataProcessor(data_path, dtype_backend="pyarrow")
+        parallel = DataProcessor(data_path, dtype_backend="pyarrow", n_jobs=2)
+        pd.testing.assert_frame_equal(
+            serial.preprocess_sales(serial.load_sales()),
+            parallel.preprocess_sales(parallel.load_sales()),
+        )
+        logger.info("preprocess_sales pyarrow: n_jobs=1 y n_jobs=2 coinciden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark de la carga concurrente de los archivos crudos.
+
+Compara ``DataProcessor`` con un lector (secuencial) y con ``--readers``
+lectores, en disco local y con un volumen de red simulado: cada lectura paga
+una latencia fija más su tamaño dividido por el ancho de banda por conexión
+(``time.sleep``, que como la E/S real libera el GIL). Mide ``load_data`` y
+``process_all`` (donde ``preprocess_sales`` arranca mientras items y test
+siguen cargando) y verifica que las tablas sean idénticas.
+
+Uso:
+    python benchmarks/bench_loading.py --rows 3000000 --readers 4
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import os
+import sys
+import time
+import argparse
+import logging
+import tempfile
+
+import pandas as pd
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src import loaders
+from src.data_processor import DataProcessor, PROCESSED_TABLES
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark concurrent loading of raw files')
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                      help='Sales rows')
+    parser.add_argument('--readers', type=int, default=4,
+                      help='Concurrent readers')
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                      help='Simulated per-request latency of the network volume')
+    parser.add_argument('--stream-mbps', type=float, default=40.0,
+                      help='Simulated bandwidth per connection (MB/s)')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+class SimulatedVolume:
+    """Agrega a cada lectura la demora de un volumen de red."""
+
+    def __init__(self, latency_ms: float, stream_mbps: float):
+        self.latency = latency_ms / 1000
+        self.bandwidth = stream_mbps * 1024**2
+
+    def delay(self, n_bytes: int):
+        """Espera lo que tardaría en llegar una lectura de ``n_bytes``."""
+        time.sleep(self.latency + n_bytes / self.bandwidth)
+
+    def attach(self, processor: DataProcessor):
+        """Envuelve las lecturas del procesador (y los rangos de ventas)."""
+        read_range = loaders.read_range
+
+        def slow_range(path, start, end):
+            self.delay(end - start)
+            return read_range(path, start, end)
+
+        loaders.read_range = slow_range
+        sales_path = processor.data_path / "sales_train.csv"
+        splits = min(processor.n_readers, os.path.getsize(sales_path) // loaders.MIN_RANGE_BYTES)
+        wrapped = {"load_items": "items.csv", "load_test": "test.csv"}
+        if splits <= 1:
+            wrapped["load_sales"] = "sales_train.csv"
+        for method, filename in wrapped.items():
+            original = getattr(processor, method)
+            size = os.path.getsize(processor.data_path / filename)
+
+            def slow(original=original, size=size):
+                self.delay(size)
+                return original()
+
+            setattr(processor, method, slow)
+        return read_range
+
+
+def measure(data_path: Path, n_readers: int, volume) -> dict:
+    """Tiempo de ``load_data`` y de ``process_all`` con ``n_readers``."""
+    processor = DataProcessor(data_path, n_readers=n_readers)
+    restore = volume.attach(processor) if volume else None
+    try:
+        start = time.perf_counter()
+        frames = processor.load_data()
+        load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        processor.process_all()
+        process_s = time.perf_counter() - start
+    finally:
+        if restore:
+            loaders.read_range = restore
+    tables = {name: processor.store.read(name) for name in PROCESSED_TABLES}
+    return {"load_s": load_s, "process_s": process_s, "frames": frames, "tables": tables}
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = write(Path(tmp), replace(SyntheticConfig(), rows=args.rows, seed=args.seed))
+        size = os.path.getsize(data_path / "sales_train.csv") / 1024**2
+        logger.info(f"sales_train.csv: {size:,.0f} MB, {args.rows:,} filas")
+
+        volumes = {
+            "local": None,
+            f"red {args.latency_ms:.0f} ms, {args.stream_mbps:.0f} MB/s": SimulatedVolume(
+                args.latency_ms, args.stream_mbps
+            ),
+        }
+        for label, volume in volumes.items():
+            sequential = measure(data_path, 1, volume)
+            concurrent = measure(data_path, args.readers, volume)
+            for a, b in zip(sequential["frames"], concurrent["frames"]):
+                pd.testing.assert_frame_equal(a, b)
+            for name in PROCESSED_TABLES:
+                pd.testing.assert_frame_equal(
+                    sequential["tables"][name], concurrent["tables"][name]
+                )
+            logger.info(
+                f"{label:<22} load_data {sequential['load_s']:6.2f}s -> "
+                f"{concurrent['load_s']:6.2f}s ({sequential['load_s'] / concurrent['load_s']:.2f}x)  "
+                f"process_all {sequential['process_s']:6.2f}s -> "
+                f"{concurrent['process_s']:6.2f}s "
+                f"({sequential['process_s'] / concurrent['process_s']:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
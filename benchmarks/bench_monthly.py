@@ -0,0 +1,118 @@
+"""
+Benchmark del modo mensual frente al diario.
+
+Genera un conjunto sintético, lo procesa y, para cada granularidad, mide las
+filas de entrenamiento, el tiempo de features (``create_all_features``), el
+tiempo de ajuste de LightGBM y el RMSE (log1p) del último mes: el modelo se
+entrena con los bloques anteriores y se evalúa contra ``item_cnt_month``
+real de cada par tienda/item del último bloque, con features servidas desde
+el índice histórico como en inferencia.
+
+Uso:
+    python benchmarks/bench_monthly.py --rows 2000000
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.data_processor import DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.monthly import aggregate_monthly
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PARAMS = {"n_estimators": 200, "learning_rate": 0.05, "num_leaves": 31, "verbose": -1}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark monthly against daily training rows')
+    parser.add_argument('--rows', type=int, default=2_000_000,
+                      help='Sales rows')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    parser.add_argument('--workdir', type=str, default=None,
+                      help='Directory for the synthetic data (default: temporary)')
+    return parser.parse_args()
+
+
+def holdout(data_path: Path) -> tuple:
+    """
+    Separa el último bloque del historial procesado.
+
+    Returns:
+        tuple: (last_block, target) con el ``item_cnt_month`` real por par del
+            último bloque
+    """
+    store = FeatureEngineer(data_path).store
+    sales = store.read("sales_processed")
+    last_block = int(sales["date_block_num"].max())
+    target = aggregate_monthly(sales[sales["date_block_num"] == last_block])
+    store.write(sales[sales["date_block_num"] < last_block], "sales_processed")
+    return last_block, target
+
+
+def run(data_path: Path, granularity: str, target) -> dict:
+    """Features, ajuste y RMSE del último mes para una granularidad."""
+    import lightgbm as lgb
+
+    engineer = FeatureEngineer(data_path, granularity=granularity)
+    start = time.perf_counter()
+    X, y = engineer.create_all_features()
+    features_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = lgb.LGBMRegressor(**PARAMS).fit(np.asarray(X), np.asarray(y))
+    fit_s = time.perf_counter() - start
+
+    test = target[["shop_id", "item_id"]]
+    features = engineer.create_all_features_for_test(
+        test, stats=engineer.load_historical_stats()
+    )
+    pred = model.predict(engineer.scaler.transform(features))
+    rmse = float(np.sqrt(np.mean((pred - target["item_cnt_log"].to_numpy()) ** 2)))
+    return {"rows": len(X), "features_s": features_s, "fit_s": fit_s, "rmse": rmse}
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(args.workdir or tmp)
+        write(data_path, replace(SyntheticConfig(), rows=args.rows, seed=args.seed))
+        DataProcessor(data_path).process_all()
+        last_block, target = holdout(data_path)
+        logger.info(f"Validación: bloque {last_block} ({len(target):,} pares tienda/item)")
+
+        results = {g: run(data_path, g, target) for g in ("daily", "monthly")}
+        for granularity, r in results.items():
+            logger.info(
+                f"{granularity:<8} filas {r['rows']:>10,}  features {r['features_s']:6.2f}s  "
+                f"ajuste {r['fit_s']:6.2f}s  RMSE último mes {r['rmse']:.4f}"
+            )
+        daily, monthly = results["daily"], results["monthly"]
+        logger.info(
+            f"mensual: {daily['rows'] / monthly['rows']:.1f}x menos filas, "
+            f"features {daily['features_s'] / monthly['features_s']:.1f}x, "
+            f"ajuste {daily['fit_s'] / monthly['fit_s']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
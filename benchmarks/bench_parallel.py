@@ -0,0 +1,82 @@
+"""
+Benchmark de escalamiento de las features de ventana por número de procesos.
+
+Ejecuta ``FeatureEngineer.create_window_features_parallel`` con 1, 2, 4, ...
+hasta ``--max-workers`` procesos y verifica que todas las ejecuciones
+coincidan con el cálculo en un solo proceso.
+
+Uso:
+    python benchmarks/bench_parallel.py --rows 3000000 --groups 400000 --max-workers 8
+"""
+
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.feature_engineering import FeatureEngineer
+from src.parallel import default_workers
+from benchmarks.bench_group_engine import FEATURES
+from benchmarks.synthetic import make_sales
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark parallel feature engineering')
+    parser.add_argument('--rows', type=int, default=2_000_000,
+                      help='Number of synthetic sales rows')
+    parser.add_argument('--groups', type=int, default=200_000,
+                      help='Number of distinct shop/item pairs')
+    parser.add_argument('--max-workers', type=int, default=default_workers(),
+                      help='Largest worker count to test')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    sales = make_sales(args.rows, args.groups, args.seed)
+
+    workers = [1]
+    while workers[-1] * 2 <= args.max_workers:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != args.max_workers:
+        workers.append(args.max_workers)
+
+    baseline = None
+    base_time = None
+    for n in workers:
+        engineer = FeatureEngineer(Path("data"), n_jobs=n)
+        df = sales.copy()
+        start = time.perf_counter()
+        if n == 1:
+            df = engineer.create_time_features(df)
+            df = engineer.create_price_features(df)
+        else:
+            df = engineer.create_window_features_parallel(df)
+        elapsed = time.perf_counter() - start
+        values = df[FEATURES].to_numpy()
+
+        if baseline is None:
+            baseline, base_time = values, elapsed
+        elif not np.array_equal(values, baseline):
+            raise AssertionError(f"Resultados distintos con {n} procesos")
+        logger.info(f"{n:>3} procesos: {elapsed:.2f}s (aceleración {base_time / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Latencia y paridad del predictor rápido frente a ``LGBMRegressor.predict``.
+
+Compara el camino actual (DataFrame -> ``model.predict`` -> ``expm1``/recorte)
+con los backends ``booster`` y ``numpy`` de ``src.fast_predict`` para lotes de
+1, 100 y 100k filas, y verifica que las predicciones coincidan. Sin
+``--model-path`` se entrena un modelo con los parámetros por defecto sobre
+datos aleatorios con el mismo número de features.
+
+Uso:
+    python benchmarks/bench_predict.py --model-path models/model.joblib
+    python benchmarks/bench_predict.py --batch-sizes 1 100 100000 --num-threads 4
+"""
+
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.fast_predict import BACKENDS, FastPredictor, to_counts
+from src.feature_engineering import FeatureEngineer
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Diferencia máxima aceptada entre caminos (conteos)
+PARITY_TOL = 1e-6
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark fast model scoring')
+    parser.add_argument('--model-path', type=str, default=None,
+                      help='Trained model.joblib (default: train one on random data)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 100_000],
+                      help='Rows per predict call')
+    parser.add_argument('--num-threads', type=int, default=0,
+                      help='LightGBM threads for the booster backend (0 = default)')
+    parser.add_argument('--budget-s', type=float, default=2.0,
+                      help='Approximate time spent per backend and batch size')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def make_model(n_features: int, seed: int):
+    """Entrena un modelo con los parámetros de ``train.py`` sobre datos aleatorios."""
+    import lightgbm as lgb
+    from train import DEFAULT_PARAMS
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(50_000, n_features)).astype(np.float32)
+    y = np.log1p(np.abs(X[:, 0] * 2 + X[:, 1] ** 2 + rng.normal(size=len(X))))
+    model = lgb.LGBMRegressor(**DEFAULT_PARAMS, verbose=-1)
+    model.fit(X, y)
+    return model
+
+
+def sklearn_predict(model, features: pd.DataFrame) -> np.ndarray:
+    """Camino actual de ``inference.py``."""
+    return np.expm1(model.predict(features)).clip(0, 20)
+
+
+def time_calls(func, features, budget_s: float) -> np.ndarray:
+    """Latencias (ms) de llamadas repetidas hasta agotar ``budget_s``."""
+    func(features)
+    latencies = []
+    deadline = time.perf_counter() + budget_s
+    while not latencies or (time.perf_counter() < deadline and len(latencies) < 10_000):
+        start = time.perf_counter()
+        func(features)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.asarray(latencies)
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    columns = FeatureEngineer(Path("data"))._get_feature_columns()
+    model = (
+        joblib.load(args.model_path) if args.model_path
+        else make_model(len(columns), args.seed)
+    )
+    predictors = {"sklearn": lambda X: sklearn_predict(model, X)}
+    for backend in BACKENDS:
+        predictors[backend] = FastPredictor(model, backend, args.num_threads).predict
+
+    rng = np.random.default_rng(args.seed)
+    data = pd.DataFrame(
+        rng.normal(size=(max(args.batch_sizes), len(columns))), columns=columns
+    )
+
+    # Paridad contra el camino actual
+    sample = data.iloc[:10_000]
+    reference = predictors["sklearn"](sample)
+    for backend in BACKENDS:
+        diff = np.abs(predictors[backend](sample) - reference).max()
+        logger.info(f"Paridad {backend}: diferencia máxima {diff:.2e}")
+        if diff > PARITY_TOL:
+            raise AssertionError(f"El backend {backend} difiere del camino actual ({diff})")
+    raw = FastPredictor(model).predict_raw(sample)
+    assert np.array_equal(to_counts(raw), predictors["booster"](sample))
+
+    for batch in args.batch_sizes:
+        features = data.iloc[:batch]
+        base = None
+        for name, func in predictors.items():
+            latencies = time_calls(func, features, args.budget_s)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            base = base or p50
+            logger.info(
+                f"lote {batch:>7}  {name:<8} p50 {p50:9.3f} ms  p99 {p99:9.3f} ms  "
+                f"{batch / p50 * 1000:>12,.0f} filas/s  ({base / p50:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
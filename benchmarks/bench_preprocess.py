@@ -0,0 +1,186 @@
+"""
+Benchmark de memoria de ``preprocess_sales`` (antes y después de la versión sin copias).
+
+Genera un archivo de ventas sintético de ``--scale`` veces ``--base-rows``
+filas y, en un proceso nuevo por medición, compara la implementación anterior
+(filtro con máscara booleana sobre el frame completo, asignación de columnas y
+conversión de fechas de la columna completa, reproducidas aquí como
+referencia) con la actual:
+    - preprocess_sales: tiempo, pico de RSS sobre el RSS con las ventas ya
+      cargadas (memoria libre devuelta al sistema con ``malloc_trim`` y VmHWM
+      reiniciado por ``/proc/self/clear_refs``), memoria reservada durante la
+      etapa (tracemalloc; no descuenta lo liberado de la entrada) y arreglos
+      reservados
+    - process_all: pico de RSS del proceso completo de preparación
+
+Uso:
+    python benchmarks/bench_preprocess.py --base-rows 3000000 --scale 10
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+import gc
+import json
+import ctypes
+import argparse
+import logging
+import subprocess
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.data_processor import SALES_DATE_FORMAT
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Código de cada proceso: carga las ventas y mide una etapa con una variante
+_CHILD = """
+import json, sys, tempfile, time, tracemalloc
+sys.path.insert(0, {root!r})
+from pathlib import Path
+from benchmarks.bench_preprocess import (
+    legacy_parse_dates, legacy_preprocess, release_free_memory, rss_mb, peak_rss_mb,
+)
+from src import profiling
+from src.data_processor import DataProcessor
+
+if {variant!r} == "antes":
+    DataProcessor.preprocess_sales = legacy_preprocess
+    DataProcessor._parse_sales_dates = staticmethod(legacy_parse_dates)
+processor = DataProcessor(Path({data!r}))
+result = {{}}
+if {stage!r} == "preprocess_sales":
+    sales = processor.load_sales()
+    profiling.enable(Path(tempfile.mkdtemp()) / "report.json")
+    release_free_memory()
+    base = rss_mb()
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    tracemalloc.start()
+    start = time.perf_counter()
+    processed = processor.preprocess_sales(sales)
+    result["time_s"] = time.perf_counter() - start
+    result["py_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    result["rss_peak_mb"] = peak_rss_mb() - base
+    stages = profiling.profiler.stages
+    result["allocations"] = stages[-1].get("allocations") if stages else None
+    result["rows"] = len(processed)
+else:
+    start = time.perf_counter()
+    processor.process_all()
+    result["time_s"] = time.perf_counter() - start
+    result["rss_peak_mb"] = peak_rss_mb()
+print(json.dumps(result))
+"""
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark preprocess_sales peak memory')
+    parser.add_argument('--base-rows', type=int, default=3_000_000,
+                      help='Sales rows at scale 1x')
+    parser.add_argument('--scale', type=int, default=10,
+                      help='Multiplier of --base-rows for the synthetic sales file')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    parser.add_argument('--workdir', type=str, default=None,
+                      help='Directory for the synthetic data (default: temporary)')
+    return parser.parse_args()
+
+
+def _status_mb(field: str) -> float:
+    """Campo de ``/proc/self/status`` en MB."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def rss_mb() -> float:
+    """RSS actual del proceso en MB."""
+    return _status_mb("VmRSS:")
+
+
+def peak_rss_mb() -> float:
+    """RSS máximo del proceso en MB (desde el último reinicio de VmHWM)."""
+    return _status_mb("VmHWM:")
+
+
+def release_free_memory():
+    """Devuelve al sistema la memoria libre del heap (glibc), para medir RSS limpio."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def legacy_parse_dates(sales: pd.DataFrame) -> pd.DataFrame:
+    """Conversión de fechas anterior: ``pd.to_datetime`` de la columna completa."""
+    sales["date"] = pd.to_datetime(sales["date"], format=SALES_DATE_FORMAT)
+    return sales
+
+
+def legacy_preprocess(self, sales_df: pd.DataFrame) -> pd.DataFrame:
+    """``preprocess_sales`` anterior: filtra el frame completo y asigna columnas."""
+    sales_df["month"] = sales_df["date"].dt.month.astype("int8")
+    sales_df["year"] = sales_df["date"].dt.year.astype("int16")
+    sales_df["item_cnt_day"] = sales_df["item_cnt_day"].clip(0, 20)
+    sales_df = sales_df[sales_df["item_price"] > 0]
+    sales_df["item_cnt_log"] = np.log1p(sales_df["item_cnt_day"])
+    return sales_df
+
+
+def run_child(data_path: Path, variant: str, stage: str) -> dict:
+    """Ejecuta una medición en un proceso nuevo."""
+    code = _CHILD.format(root=str(PROJECT_ROOT), data=str(data_path), variant=variant, stage=stage)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    rows = args.base_rows * args.scale
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(args.workdir or tmp)
+        write(data_path, replace(SyntheticConfig(), rows=rows, seed=args.seed))
+        logger.info(f"sales_train.csv: {rows:,} filas ({args.scale}x {args.base_rows:,})")
+
+        for stage in ("preprocess_sales", "process_all"):
+            results = {variant: run_child(data_path, variant, stage) for variant in ("antes", "después")}
+            for variant, r in results.items():
+                detail = ""
+                if stage == "preprocess_sales":
+                    allocations = r["allocations"] if r["allocations"] is not None else "-"
+                    detail = (
+                        f"  reservado {r['py_peak_mb']:8,.0f} MB  arreglos {allocations}"
+                    )
+                logger.info(
+                    f"{stage:<17} {variant:<8} {r['time_s']:7.2f}s  "
+                    f"pico RSS {r['rss_peak_mb']:8,.0f} MB{detail}"
+                )
+            before, after = results["antes"], results["después"]
+            logger.info(
+                f"{stage:<17} pico RSS {before['rss_peak_mb'] / after['rss_peak_mb']:.2f}x menor, "
+                f"tiempo {before['time_s'] / after['time_s']:.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Generador de carga para el servidor de predicciones.
+
+Envía solicitudes concurrentes a ``/predict`` y reporta latencia p50/p99 y
+throughput. Si no se indica ``--url`` se levanta el servidor en el mismo
+proceso (requiere un modelo entrenado y ``processed/historical_stats``).
+
+Uso:
+    python benchmarks/bench_server.py --data-dir data --clients 16 --requests 2000
+    python benchmarks/bench_server.py --url http://127.0.0.1:8080
+"""
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import json
+import time
+import argparse
+import logging
+import threading
+import urllib.request
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+import serve
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Load generator for serve.py')
+    parser.add_argument('--url', type=str, default=None,
+                      help='Existing server URL; if omitted an in-process server is started')
+    parser.add_argument('--data-dir', type=str, default='data',
+                      help='Directory containing processed data')
+    parser.add_argument('--model-dir', type=str, default='models',
+                      help='Directory containing trained model')
+    parser.add_argument('--model-name', type=str, default=None,
+                      help='Model file to serve instead of the bundle')
+    parser.add_argument('--clients', type=int, default=16,
+                      help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000,
+                      help='Total requests')
+    parser.add_argument('--pairs-per-request', type=int, default=1,
+                      help='shop/item pairs per request')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                      help='Batching window for the in-process server')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def post_predict(url: str, shop_ids: list, item_ids: list) -> float:
+    """Envía una solicitud y devuelve su latencia en segundos."""
+    body = json.dumps({"shop_id": shop_ids, "item_id": item_ids}).encode()
+    request = urllib.request.Request(
+        f"{url}/predict", data=body, headers={"Content-Type": "application/json"}
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    server = batcher = None
+    url = args.url
+    if url is None:
+        argv = [
+            "--data-dir", args.data_dir,
+            "--model-dir", args.model_dir,
+            "--port", "0",
+            "--max-wait-ms", str(args.max_wait_ms),
+        ]
+        if args.model_name:
+            argv += ["--model-name", args.model_name]
+        server_args = serve.parse_args(argv)
+        server, batcher = serve.build_server(server_args)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        url = f"http://{host}:{port}"
+
+    rng = np.random.default_rng(args.seed)
+    n = args.pairs_per_request
+    payloads = [
+        (rng.integers(0, 60, n).tolist(), rng.integers(0, 22170, n).tolist())
+        for _ in range(args.requests)
+    ]
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            latencies = list(pool.map(lambda p: post_predict(url, *p), payloads))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            batcher.stop()
+
+    latencies_ms = np.array(latencies) * 1000
+    logger.info(f"Solicitudes: {args.requests:,} | clientes: {args.clients}")
+    logger.info(f"p50: {np.percentile(latencies_ms, 50):.2f} ms")
+    logger.info(f"p99: {np.percentile(latencies_ms, 99):.2f} ms")
+    logger.info(f"Throughput: {args.requests / elapsed:,.0f} req/s")
+    if batcher is not None:
+        logger.info(f"Lotes: {batcher.batches:,} ({batcher.requests / max(batcher.batches, 1):.1f} req/lote)")
+
+
+if __name__ == "__main__":
+    main()
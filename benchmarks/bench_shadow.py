@@ -0,0 +1,132 @@
+"""
+Benchmark de la evaluación de varios modelos (``inference.py --models``).
+
+Sobre un conjunto sintético procesado entrena varios modelos con distinto
+número de árboles, escribe un bundle por modelo y compara:
+    - antes: una ejecución por modelo (lee el test, construye las features y
+      predice, como ``inference.py`` N veces)
+    - después: features una sola vez y ``ShadowScorer`` con 1 hilo y con un
+      hilo por modelo
+Verifica que las predicciones de cada modelo coincidan y reporta el reporte de
+diferencias contra el primero. La ganancia del pool de hilos depende de los
+núcleos disponibles (``nproc``); la de construir las features una vez, no.
+
+Uso:
+    python benchmarks/bench_shadow.py --rows 3000000 --rounds 100 200 300
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+import time
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.bundle import ModelBundle
+from src.data_processor import DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.feature_matrix import open_feature_matrix
+from src.parallel import default_workers
+from src.shadow import ShadowScorer
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark multi-model scoring')
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                      help='Sales rows')
+    parser.add_argument('--rounds', type=int, nargs='+', default=[100, 200, 300],
+                      help='Boosting rounds of each model (one model per value)')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    return parser.parse_args()
+
+
+def separate_runs(bundles: dict, data_path: Path, num_threads: int) -> tuple:
+    """Una ejecución completa por modelo (abrir, leer test, features, predecir)."""
+    predictions = {}
+    start = time.perf_counter()
+    for name, bundle_dir in bundles.items():
+        model = ModelBundle.open(bundle_dir, "booster", num_threads)
+        engineer = FeatureEngineer(data_path)
+        engineer.match_columns(model.feature_columns)
+        test_df = engineer.store.read("test_processed")
+        features = engineer.create_all_features_for_test(test_df, stats=model.stats)
+        predictions[name] = model.predict(features)
+    return time.perf_counter() - start, predictions
+
+
+def shared_run(bundles: dict, data_path: Path, workers: int, num_threads: int) -> tuple:
+    """Features una vez y todos los modelos en ``ShadowScorer``."""
+    start = time.perf_counter()
+    models = {
+        name: ModelBundle.open(bundle_dir, "booster", num_threads)
+        for name, bundle_dir in bundles.items()
+    }
+    engineer = FeatureEngineer(data_path)
+    reference = next(iter(models.values()))
+    engineer.match_columns(reference.feature_columns)
+    test_df = engineer.store.read("test_processed")
+    features = engineer.create_all_features_for_test(test_df, stats=reference.stats)
+    with ShadowScorer(models, workers) as scorer:
+        predictions = scorer.score(features)
+    return time.perf_counter() - start, predictions, scorer.report()
+
+
+def main():
+    """Función principal del benchmark"""
+    from train import DEFAULT_PARAMS, save_bundle, train_model
+
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = write(Path(tmp), replace(SyntheticConfig(), rows=args.rows, seed=args.seed))
+        DataProcessor(data_path).process_all()
+        engineer = FeatureEngineer(data_path)
+        engineer.create_all_features()
+        X, y, _ = open_feature_matrix(engineer.prep_path)
+
+        bundles = {}
+        for rounds in args.rounds:
+            params = {**DEFAULT_PARAMS, "n_estimators": rounds}
+            model, score = train_model(X, y, params)
+            name = f"rounds_{rounds}"
+            bundles[name] = save_bundle(engineer, model, Path(tmp) / name, params, score)
+        n_models = len(bundles)
+        cpus = default_workers()
+        logger.info(f"{n_models} modelos, {cpus} CPU(s)")
+
+        before, expected = separate_runs(bundles, data_path, 0)
+        logger.info(f"{'antes (N ejecuciones)':<28} {before:7.2f}s")
+        for workers in sorted({1, n_models}):
+            threads = max(1, cpus // workers)
+            elapsed, predictions, report = shared_run(bundles, data_path, workers, threads)
+            for name in bundles:
+                np.testing.assert_allclose(predictions[name], expected[name], rtol=1e-6, atol=1e-6)
+            logger.info(
+                f"{f'después ({workers} hilo(s))':<28} {elapsed:7.2f}s  "
+                f"({before / elapsed:.2f}x)"
+            )
+        for name, diff in report["diffs"].items():
+            logger.info(
+                f"{name} vs {report['reference']}: MAE {diff['mean_abs_diff']:.4f}  "
+                f"corr {diff['corr']:.4f}  cambiadas {diff['changed_share']:.2%}"
+            )
+        logger.info("Predicciones de cada modelo idénticas a su ejecución por separado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Tiempo de arranque en frío hasta la primera predicción.
+
+Lanza un proceso nuevo por medición (importaciones incluidas) y compara:
+    - joblib: ``model.joblib`` + ``scaler.joblib`` + índice histórico
+    - bundle-booster: bundle versionado con ``lightgbm.Booster``
+    - bundle-numpy: bundle versionado con el ensamble compilado (sin LightGBM)
+
+Cada proceso predice un par (shop_id, item_id) y reporta el tiempo de
+importación, de carga y total.
+
+Uso:
+    python benchmarks/bench_startup.py --data-dir data --model-dir models
+"""
+
+from pathlib import Path
+import sys
+import json
+import argparse
+import logging
+import subprocess
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Código de cada proceso: importa, carga y predice una fila
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from pathlib import Path
+from src.serving import Predictor
+imported = time.perf_counter()
+predictor = Predictor(
+    Path({data!r}), Path({model!r}), fast_predict={backend!r},
+    bundle_path={bundle!r} and Path({bundle!r}),
+)
+loaded = time.perf_counter()
+predictor.predict([0], [0])
+done = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start, "load_s": loaded - imported, "total_s": done - start,
+}}))
+"""
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark cold-start time to first prediction')
+    parser.add_argument('--data-dir', type=str, default='data',
+                      help='Directory containing processed data')
+    parser.add_argument('--model-dir', type=str, default='models',
+                      help='Directory with model.joblib and bundle/')
+    parser.add_argument('--repeat', type=int, default=5,
+                      help='Processes launched per variant')
+    return parser.parse_args()
+
+
+def run_child(data_dir: Path, model_path: Path, backend, bundle) -> dict:
+    """Ejecuta una medición en un proceso nuevo."""
+    code = _CHILD.format(
+        root=str(PROJECT_ROOT), data=str(data_dir), model=str(model_path),
+        backend=backend, bundle=bundle and str(bundle),
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    data_dir = Path(args.data_dir)
+    model_dir = Path(args.model_dir)
+    variants = {
+        "joblib": (None, None),
+        "bundle-booster": ("booster", model_dir / "bundle"),
+        "bundle-numpy": ("numpy", model_dir / "bundle"),
+    }
+    for name, (backend, bundle) in variants.items():
+        runs = [
+            run_child(data_dir, model_dir / "model.joblib", backend, bundle)
+            for _ in range(args.repeat)
+        ]
+        median = {key: np.median([run[key] for run in runs]) for key in runs[0]}
+        logger.info(
+            f"{name:<15} import {median['import_s'] * 1000:7.0f} ms  "
+            f"carga {median['load_s'] * 1000:7.1f} ms  "
+            f"total {median['total_s'] * 1000:7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark del ajuste sobre un Dataset de LightGBM cacheado (``train.py``).
+
+Genera y procesa un conjunto sintético, calcula la matriz de features
+(``X_train.npy`` memory-mapped) y, en un proceso nuevo por medición, compara:
+    - antes: ``train_test_split`` de la matriz (copias de entrenamiento y
+      validación) y ``LGBMRegressor.fit``, que vuelve a calcular los bins
+    - después (sin binario): ``train_model`` construye el Dataset, guarda el
+      ``.bin`` y valida con subconjuntos por índice
+    - después (con binario): ``train_model`` carga los bins del ``.bin``
+Reporta tiempo de ajuste, pico de RSS y R² de validación.
+
+Uso:
+    python benchmarks/bench_train.py --rows 3000000
+"""
+
+from dataclasses import replace
+from pathlib import Path
+import sys
+import json
+import argparse
+import logging
+import subprocess
+import tempfile
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.data_processor import DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.feature_matrix import X_FILE, Y_FILE, lgb_binary_path
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.WARNING
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Parámetros de train.py
+PARAMS = {
+    "n_estimators": 100,
+    "learning_rate": 0.1,
+    "num_leaves": 31,
+    "random_state": 42,
+    "verbose": -1,
+}
+
+# Código de cada proceso: abre la matriz y mide el ajuste con una variante
+_CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from pathlib import Path
+from benchmarks.bench_preprocess import peak_rss_mb, rss_mb
+from src.feature_matrix import open_feature_matrix
+
+params = json.loads({params!r})
+X, y, _ = open_feature_matrix(Path({prep!r}))
+base = rss_mb()
+start = time.perf_counter()
+if {variant!r} == "antes":
+    import lightgbm as lgb
+    from sklearn.model_selection import train_test_split
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = lgb.LGBMRegressor(**params)
+    model.fit(X_train, y_train)
+    score = model.score(X_val, y_val)
+else:
+    from train import train_model
+    model, score = train_model(X, y, params, Path({binary!r}))
+result = {{
+    "time_s": time.perf_counter() - start,
+    "rss_peak_mb": peak_rss_mb() - base,
+    "score": float(score),
+}}
+print(json.dumps(result))
+"""
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark fitting on a cached LightGBM Dataset')
+    parser.add_argument('--rows', type=int, default=3_000_000,
+                      help='Sales rows')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed')
+    parser.add_argument('--workdir', type=str, default=None,
+                      help='Directory for the synthetic data (default: temporary)')
+    return parser.parse_args()
+
+
+def run_child(prep_path: Path, binary_path: Path, variant: str) -> dict:
+    """Ejecuta una medición en un proceso nuevo."""
+    code = _CHILD.format(
+        root=str(PROJECT_ROOT), prep=str(prep_path), binary=str(binary_path),
+        params=json.dumps(PARAMS), variant=variant,
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Función principal del benchmark"""
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(args.workdir or tmp)
+        write(data_path, replace(SyntheticConfig(), rows=args.rows, seed=args.seed))
+        DataProcessor(data_path).process_all()
+        engineer = FeatureEngineer(data_path)
+        engineer.create_all_features()
+        prep_path = data_path / "processed"
+        binary_path = lgb_binary_path(prep_path / X_FILE, prep_path / Y_FILE, PARAMS)
+        logger.info(f"Matriz de features: {args.rows:,} filas de ventas")
+
+        results = {}
+        for variant, label in (
+            ("antes", "antes"),
+            ("después", "después (sin .bin)"),
+            ("después", "después (con .bin)"),
+        ):
+            results[label] = r = run_child(prep_path, binary_path, variant)
+            logger.info(
+                f"{label:<20} ajuste {r['time_s']:7.2f}s  "
+                f"pico RSS {r['rss_peak_mb']:8,.0f} MB  R² {r['score']:.4f}"
+            )
+        before = results["antes"]
+        for label in ("después (sin .bin)", "después (con .bin)"):
+            after = results[label]
+            logger.info(
+                f"{label:<20} tiempo {before['time_s'] / after['time_s']:.2f}x, "
+                f"pico RSS {before['rss_peak_mb'] / max(after['rss_peak_mb'], 1.0):.2f}x menor"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Suite de benchmarks reproducible del pipeline completo.
+
+Para cada escala (múltiplo de ``--base-rows``) genera un conjunto sintético con
+``benchmarks.synthetic``, ejecuta las etapas del pipeline y registra tiempo de
+pared, tiempo de CPU, filas por segundo y memoria (RSS) de cada una. Los
+resultados se guardan como JSON junto con las versiones del entorno y el
+commit, para comparar ejecuciones entre cambios con ``--compare``.
+
+Etapas medidas:
+    load_data, preprocess_sales, process_all, create_time_features,
+    create_price_features, create_category_features, create_all_features,
+    create_all_features_for_test (groupby e índice histórico), train_model y
+    model.predict
+
+Uso:
+    python -m benchmarks.suite --scales 1 10 100 --out benchmarks/results/run.json
+    python -m benchmarks.suite --compare base.json new.json
+"""
+
+from dataclasses import asdict, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+import joblib
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import SyntheticConfig, write
+from src.data_processor import DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.profiling import RunProfiler
+from train import DEFAULT_PARAMS, train_model
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+
+def _environment() -> dict:
+    """Versiones y máquina de la ejecución."""
+    import lightgbm
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "lightgbm": lightgbm.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+class SuiteRunner:
+    """
+    Ejecuta y registra las etapas de una escala.
+
+    Attributes:
+        scale (int): Multiplicador de filas
+        repeat (int): Repeticiones por etapa (se guarda la más rápida)
+        results (list): Registros de etapas
+    """
+
+    def __init__(self, scale: int, repeat: int = 1):
+        self.scale = scale
+        self.repeat = repeat
+        self.results = []
+        self._profiler = RunProfiler()
+        self._profiler.enable(Path(os.devnull))
+
+    def run(
+        self,
+        name: str,
+        func: Callable,
+        setup: Optional[Callable] = None,
+        rows: Optional[int] = None,
+    ):
+        """
+        Mide ``func(*setup())`` y devuelve el resultado de la última repetición.
+
+        Args:
+            name (str): Nombre de la etapa
+            func (Callable): Función a medir
+            setup (Callable, optional): Prepara los argumentos fuera de la medición
+            rows (int, optional): Filas procesadas; por defecto las del resultado
+        """
+        best = None
+        result = None
+        for _ in range(self.repeat):
+            args = setup() if setup is not None else ()
+            with self._profiler.stage(name) as record:
+                result = func(*args)
+            if best is None or record["wall_s"] < best["wall_s"]:
+                best = record
+        if rows is None:
+            rows = len(result[0] if isinstance(result, tuple) else result)
+        self.results.append({
+            "scale": self.scale,
+            "stage": name,
+            "rows": rows,
+            "wall_s": best["wall_s"],
+            "cpu_s": best["cpu_s"],
+            "rows_per_s": round(rows / best["wall_s"], 1) if best["wall_s"] else None,
+            "rss_delta_mb": best["rss_delta_mb"],
+            "rss_peak_mb": best["rss_peak_mb"],
+        })
+        logger.info(f"[{self.scale}x] {name}: {best['wall_s']:.3f}s ({rows:,} filas)")
+        return result
+
+
+def run_scale(
+    config: SyntheticConfig, scale: int, params: dict, repeat: int, workdir: Path
+) -> list:
+    """
+    Ejecuta todas las etapas sobre un conjunto sintético de ``scale`` veces.
+
+    Returns:
+        list: Registros de las etapas
+    """
+    data_path = workdir / f"scale_{scale}"
+    write(data_path, replace(config, rows=config.rows * scale))
+    runner = SuiteRunner(scale, repeat)
+
+    # Preparación de datos
+    processor = DataProcessor(data_path)
+    sales_raw, items_df, _ = runner.run("load_data", processor.load_data)
+    runner.run(
+        "preprocess_sales", processor.preprocess_sales,
+        lambda raw=sales_raw: (raw.copy(),),
+    )
+    runner.run("process_all", processor.process_all, rows=len(sales_raw))
+    # La lambda ya no se llama; se libera la copia cruda antes de las features
+    del sales_raw
+
+    # Features por etapa sobre las ventas procesadas
+    engineer = FeatureEngineer(data_path)
+    sales_df, items_df, test_df = engineer.load_processed_data()
+    runner.run(
+        "create_time_features", engineer.create_time_features,
+        lambda: (sales_df.copy(),),
+    )
+    runner.run(
+        "create_price_features", engineer.create_price_features,
+        lambda: (sales_df.copy(),),
+    )
+    runner.run(
+        "create_category_features", engineer.create_category_features,
+        lambda: (sales_df.copy(), items_df),
+    )
+    X, y = runner.run("create_all_features", engineer.create_all_features)
+
+    # Features de test: groupby sobre el historial e índice precalculado
+    X_test = runner.run(
+        "create_all_features_for_test", engineer.create_all_features_for_test,
+        lambda: (test_df, sales_df, items_df),
+    )
+    stats = engineer.load_historical_stats()
+    runner.run(
+        "create_test_features_from_stats", engineer.create_test_features_from_stats,
+        lambda: (test_df, stats),
+    )
+
+    # Modelo
+    model, _ = runner.run(
+        "train_model", train_model, lambda: (X, y, params), rows=len(X)
+    )
+    scaler = joblib.load(data_path / "processed" / "scaler.joblib")
+    X_test_scaled = scaler.transform(X_test)
+    runner.run("model.predict", model.predict, lambda: (X_test_scaled,))
+    return runner.results
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> int:
+    """
+    Compara dos resultados por (escala, etapa).
+
+    Args:
+        base_path (Path): Resultados de referencia
+        new_path (Path): Resultados nuevos
+        threshold (float): Aumento relativo de tiempo considerado regresión
+
+    Returns:
+        int: Número de regresiones
+    """
+    with open(base_path) as f:
+        base = {(r["scale"], r["stage"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'escala':>6}  {'etapa':<32} {'base s':>9} {'nuevo s':>9} {'ratio':>7}")
+    for record in new:
+        ref = base.get((record["scale"], record["stage"]))
+        if ref is None or not ref["wall_s"]:
+            continue
+        ratio = record["wall_s"] / ref["wall_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions += 1
+            flag = "  <-- regresión"
+        print(
+            f"{record['scale']:>5}x  {record['stage']:<32} {ref['wall_s']:>9.3f} "
+            f"{record['wall_s']:>9.3f} {ratio:>6.2f}x{flag}"
+        )
+    return regressions
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Run the pipeline benchmark suite')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                      help='Row multipliers of --base-rows to benchmark')
+    parser.add_argument('--base-rows', type=int, default=30_000,
+                      help='Sales rows at scale 1x')
+    parser.add_argument('--n-shops', type=int, default=SyntheticConfig.n_shops,
+                      help='Number of shops')
+    parser.add_argument('--n-items', type=int, default=SyntheticConfig.n_items,
+                      help='Number of items')
+    parser.add_argument('--n-categories', type=int, default=SyntheticConfig.n_categories,
+                      help='Number of item categories')
+    parser.add_argument('--category-skew', type=float, default=SyntheticConfig.category_skew,
+                      help='Zipf exponent of category sizes')
+    parser.add_argument('--item-skew', type=float, default=SyntheticConfig.item_skew,
+                      help='Zipf exponent of item popularity')
+    parser.add_argument('--n-days', type=int, default=SyntheticConfig.n_days,
+                      help='Days of sales history')
+    parser.add_argument('--test-rows', type=int, default=SyntheticConfig.test_rows,
+                      help='Rows of the synthetic test set')
+    parser.add_argument('--seed', type=int, default=SyntheticConfig.seed,
+                      help='Random seed')
+    parser.add_argument('--n-estimators', type=int, default=100,
+                      help='Boosting rounds for train_model')
+    parser.add_argument('--repeat', type=int, default=1,
+                      help='Repetitions per stage (fastest is kept)')
+    parser.add_argument('--workdir', type=str, default=None,
+                      help='Directory for generated data (default: a temporary directory)')
+    parser.add_argument('--out', type=str, default=None,
+                      help='Results JSON (default: benchmarks/results/<timestamp>_<commit>.json)')
+    parser.add_argument('--compare', type=str, nargs=2, default=None,
+                      metavar=('BASE', 'NEW'),
+                      help='Compare two results files instead of running')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                      help='With --compare, relative slowdown reported as a regression')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal de la suite"""
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+    args = parse_args()
+    if args.compare:
+        regressions = compare(Path(args.compare[0]), Path(args.compare[1]), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    config = SyntheticConfig(
+        rows=args.base_rows,
+        n_shops=args.n_shops,
+        n_items=args.n_items,
+        n_categories=args.n_categories,
+        category_skew=args.category_skew,
+        item_skew=args.item_skew,
+        n_days=args.n_days,
+        test_rows=args.test_rows,
+        seed=args.seed,
+    )
+    params = {**DEFAULT_PARAMS, "n_estimators": args.n_estimators, "verbose": -1}
+    environment = _environment()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.workdir) if args.workdir else Path(tmp)
+        for scale in args.scales:
+            results.extend(run_scale(config, scale, params, args.repeat, workdir))
+
+    if args.out:
+        out_path = Path(args.out)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out_path = RESULTS_DIR / f"{stamp}_{environment['commit'] or 'local'}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment,
+        "config": asdict(config),
+        "scales": args.scales,
+        "params": params,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Resultados guardados en: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Generador de datos sintéticos con el esquema de los archivos crudos.
+
+Produce ``sales_train.csv``, ``items.csv`` y ``test.csv`` con las mismas
+columnas y formatos que espera ``DataProcessor.load_data``, de forma
+reproducible a partir de una semilla. Permite configurar el número de filas,
+tiendas, items y categorías, el sesgo de popularidad de categorías e items y
+el rango de fechas.
+
+Uso:
+    python -m benchmarks.synthetic --out data --rows 3000000
+"""
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyntheticConfig:
+    """
+    Parámetros del conjunto sintético.
+
+    Attributes:
+        rows (int): Filas de ventas
+        n_shops (int): Número de tiendas
+        n_items (int): Número de items
+        n_categories (int): Número de categorías
+        category_skew (float): Exponente Zipf del tamaño de categorías (0 = uniforme)
+        item_skew (float): Exponente Zipf de la popularidad de items (0 = uniforme)
+        start_date (str): Primera fecha (YYYY-MM-DD)
+        n_days (int): Días de historial
+        test_rows (int): Filas del conjunto de test
+        seed (int): Semilla aleatoria
+    """
+
+    rows: int = 100_000
+    n_shops: int = 60
+    n_items: int = 22_170
+    n_categories: int = 84
+    category_skew: float = 1.0
+    item_skew: float = 1.1
+    start_date: str = "2013-01-01"
+    n_days: int = 1034
+    test_rows: int = 214_200
+    seed: int = 42
+
+
+def _zipf_weights(n: int, skew: float) -> np.ndarray:
+    """Probabilidades proporcionales a 1 / rango^skew."""
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def generate(config: SyntheticConfig) -> tuple:
+    """
+    Genera los tres DataFrames crudos.
+
+    Args:
+        config (SyntheticConfig): Parámetros del conjunto
+
+    Returns:
+        tuple: (sales, items, test) con el esquema de los CSV originales
+    """
+    rng = np.random.default_rng(config.seed)
+
+    # Items: categoría con tamaños sesgados
+    categories = rng.choice(
+        config.n_categories,
+        size=config.n_items,
+        p=_zipf_weights(config.n_categories, config.category_skew),
+    )
+    items = pd.DataFrame({
+        "item_name": [f"item {i}" for i in range(config.n_items)],
+        "item_id": np.arange(config.n_items),
+        "item_category_id": categories,
+    })
+
+    # Ventas: items populares con más filas, ordenadas por fecha como el original
+    popularity = rng.permutation(config.n_items)
+    item_ids = popularity[
+        rng.choice(
+            config.n_items,
+            size=config.rows,
+            p=_zipf_weights(config.n_items, config.item_skew),
+        )
+    ]
+    shop_ids = rng.integers(0, config.n_shops, config.rows)
+    day = np.sort(rng.integers(0, config.n_days, config.rows))
+    dates = pd.Timestamp(config.start_date) + pd.to_timedelta(day, unit="D")
+    start = pd.Timestamp(config.start_date)
+    date_block = (dates.year - start.year) * 12 + dates.month - start.month
+
+    base_price = np.round(rng.lognormal(6.0, 1.2, config.n_items), 2)
+    prices = np.round(base_price[item_ids] * rng.uniform(0.9, 1.1, config.rows), 2)
+    prices[rng.random(config.rows) < 1e-6] = -1.0
+
+    counts = rng.poisson(0.3, config.rows) + 1.0
+    counts[rng.random(config.rows) < 0.0025] = -1.0
+    spikes = rng.random(config.rows) < 1e-4
+    counts[spikes] = rng.integers(20, 1000, spikes.sum())
+
+    sales = pd.DataFrame({
+        "date": dates.strftime("%d.%m.%Y"),
+        "date_block_num": date_block,
+        "shop_id": shop_ids,
+        "item_id": item_ids,
+        "item_price": prices,
+        "item_cnt_day": counts,
+    })
+
+    test = pd.DataFrame({
+        "ID": np.arange(config.test_rows),
+        "shop_id": rng.integers(0, config.n_shops, config.test_rows),
+        "item_id": rng.integers(0, config.n_items, config.test_rows),
+    })
+    return sales, items, test
+
+
+def write(directory: Path, config: SyntheticConfig) -> Path:
+    """
+    Genera el conjunto y lo escribe como CSV en ``directory``.
+
+    Args:
+        directory (Path): Directorio de destino
+        config (SyntheticConfig): Parámetros del conjunto
+
+    Returns:
+        Path: ``directory``
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    sales, items, test = generate(config)
+    sales.to_csv(directory / "sales_train.csv", index=False)
+    items.to_csv(directory / "items.csv", index=False)
+    test.to_csv(directory / "test.csv", index=False)
+    logger.info(f"Datos sintéticos ({config.rows:,} filas) escritos en: {directory}")
+    return directory
+
+
+def make_sales(rows: int, groups: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Ventas ya preprocesadas con aproximadamente ``groups`` pares shop/item.
+
+    Atajo para benchmarks que solo necesitan las columnas de
+    ``sales_processed``.
+
+    Args:
+        rows (int): Número de filas
+        groups (int): Número aproximado de pares (shop_id, item_id)
+        seed (int): Semilla aleatoria
+
+    Returns:
+        pd.DataFrame: Ventas con 'date' como datetime
+    """
+    n_shops = 60
+    config = SyntheticConfig(
+        rows=rows,
+        n_shops=n_shops,
+        n_items=max(groups // n_shops, 1),
+        item_skew=0.0,
+        test_rows=0,
+        seed=seed,
+    )
+    sales, _, _ = generate(config)
+    sales["date"] = pd.to_datetime(sales["date"], format="%d.%m.%Y")
+    sales["item_cnt_day"] = sales["item_cnt_day"].clip(0, 20)
+    return sales[sales["item_price"] > 0].reset_index(drop=True)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    defaults = SyntheticConfig()
+    parser = argparse.ArgumentParser(description='Generate synthetic raw sales data')
+    parser.add_argument('--out', type=str, required=True,
+                      help='Output directory')
+    for field, value in asdict(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value,
+                          help=f'default: {value}')
+    return parser.parse_args()
+
+
+def main():
+    """Función principal del generador"""
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+    args = parse_args()
+    config = SyntheticConfig(**{
+        field: getattr(args, field) for field in asdict(SyntheticConfig())
+    })
+    write(Path(args.out), config)
+
+
+if __name__ == "__main__":
+    main()
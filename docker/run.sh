@@ -2,12 +2,13 @@
 
 # Función para mostrar el uso
 show_usage() {
-    echo "Uso: $0 [prep|train|inference] [opciones]"
+    echo "Uso: $0 [prep|train|inference|serve] [opciones]"
     echo ""
     echo "Comandos:"
     echo "  prep      - Ejecuta el preprocesamiento de datos"
     echo "  train     - Ejecuta el contenedor de entrenamiento"
     echo "  inference - Ejecuta el contenedor de inferencia"
+    echo "  serve     - Levanta el servidor HTTP de predicciones"
     echo ""
     echo "Opciones para train:"
     echo "  --data-dir DIR      - Directorio de datos (default: data)"
@@ -17,8 +18,14 @@ show_usage() {
     echo "Opciones para inference:"
     echo "  --data-dir DIR      - Directorio de datos (default: data)"
     echo "  --model-dir DIR     - Directorio del modelo (default: models)"
-    echo "  --model-name NAME   - Nombre del modelo (default: model.joblib)"
+    echo "  --model-name NAME   - Usa ese archivo en lugar de <model-dir>/bundle"
     echo "  --output-dir DIR    - Directorio de salida (default: data/predictions)"
+    echo ""
+    echo "Opciones para serve:"
+    echo "  --data-dir DIR      - Directorio de datos (default: data)"
+    echo "  --model-dir DIR     - Directorio del modelo (default: models)"
+    echo "  --model-name NAME   - Usa ese archivo en lugar de <model-dir>/bundle"
+    echo "  --port PORT         - Puerto HTTP (default: 8080)"
 }
 
 # Verificar comando principal
@@ -36,12 +43,17 @@ MODELS_VOLUME="$(pwd)/models:/app/models"
 
 # Procesar argumentos adicionales
 EXTRA_ARGS=""
+SERVE_PORT=8080
 while [[ $# -gt 0 ]]; do
     case $1 in
         --data-dir|--model-dir|--model-name|--output-dir)
             EXTRA_ARGS="$EXTRA_ARGS $1 $2"
             shift 2
             ;;
+        --port)
+            SERVE_PORT=$2
+            shift 2
+            ;;
         *)
             echo "Argumento desconocido: $1"
             show_usage
@@ -71,6 +83,16 @@ case $COMMAND in
             -v $MODELS_VOLUME \
             ml-price-inference:latest $EXTRA_ARGS
         ;;
+    "serve")
+        echo "Levantando servidor de predicciones en el puerto $SERVE_PORT..."
+        docker run --rm \
+            -v $DATA_VOLUME \
+            -v $MODELS_VOLUME \
+            -p $SERVE_PORT:$SERVE_PORT \
+            --entrypoint python \
+            ml-price-inference:latest serve.py \
+            --host 0.0.0.0 --port $SERVE_PORT $EXTRA_ARGS
+        ;;
     *)
         show_usage
         exit 1
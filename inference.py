@@ -1,23 +1,35 @@
 """
 Script principal para realizar predicciones con el modelo entrenado.
+
+pandas, joblib, LightGBM y sklearn se importan dentro de las funciones que los
+usan, de modo que ``--help`` y los errores de argumentos no pagan su carga.
+
+Con ``--models champion=<ruta> challenger=<ruta> ...`` las features de test se
+construyen una sola vez y cada lote se evalúa con todos los modelos en un pool
+de hilos (``src/shadow.py``); se escribe un CSV por modelo y un reporte de
+diferencias contra el primero.
 """
 
 from pathlib import Path
 import sys
 import logging
-import joblib
-import pandas as pd
 import numpy as np
 import argparse
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+import json
 
 # Agregar el directorio raíz al path
 PROJECT_ROOT = Path(__file__).parent
 sys.path.append(str(PROJECT_ROOT))
 
-from src.feature_engineering import FeatureEngineer
-from src.data_processor import DataProcessor
+from src.fast_predict import BACKENDS
+from src.profiling import add_profiling_args, configure_from_args, stage, write_report
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from src.feature_engineering import FeatureEngineer
 
 # Configurar logging
 logging.basicConfig(
@@ -32,79 +44,354 @@ def parse_args():
                       help='Directory containing input data')
     parser.add_argument('--model-dir', type=str, default='models',
                       help='Directory containing trained model')
-    parser.add_argument('--model-name', type=str, default='model.joblib',
-                      help='Name of the model file')
+    parser.add_argument('--model-name', type=str, default=None,
+                      help='Name of the model file (default: model.joblib); naming it '
+                           'uses that file instead of the bundle')
+    parser.add_argument('--bundle-dir', type=str, default=None,
+                      help='Model bundle written by train.py (default: <model-dir>/bundle; '
+                           'falls back to model.joblib + scaler.joblib if missing)')
     parser.add_argument('--output-dir', type=str, default='data/predictions',
                       help='Directory to save predictions')
-    return parser.parse_args()
+    parser.add_argument('--chunksize', type=int, default=None,
+                      help='Stream test rows in chunks of this many rows (flat memory)')
+    parser.add_argument('--fast-predict', type=str, default=None, choices=list(BACKENDS),
+                      help='Score with the native Booster or the compiled NumPy ensemble '
+                           '(bundles default to booster)')
+    parser.add_argument('--num-threads', type=int, default=0,
+                      help='LightGBM threads for --fast-predict booster (0 = default)')
+    parser.add_argument('--models', type=model_spec, nargs='+', default=None,
+                      metavar='NAME=PATH',
+                      help='Score several models on the same test features (the first is '
+                           'the champion of the diff report); PATH is a bundle directory '
+                           'or a model.joblib file')
+    parser.add_argument('--score-workers', type=int, default=None,
+                      help='Threads scoring models concurrently with --models '
+                           '(default: one per model)')
+    parser.add_argument('--diff-threshold', type=float, default=0.5,
+                      help='Absolute prediction difference counted as a changed row '
+                           'in the --models diff report')
+    add_profiling_args(parser)
+    args = parser.parse_args()
+    if args.model_name and args.bundle_dir:
+        parser.error('--model-name and --bundle-dir are mutually exclusive')
+    return args
+
+def model_spec(value: str) -> Tuple[str, Path]:
+    """Argumento ``NAME=PATH`` de ``--models``."""
+    name, sep, path = value.partition("=")
+    if not sep or not name or not path:
+        raise argparse.ArgumentTypeError(f"Se esperaba NAME=PATH: {value}")
+    return name, Path(path)
 
 def load_model(model_path: Path) -> Optional[object]:
     """Carga el modelo entrenado."""
+    import joblib
+
     try:
         return joblib.load(model_path)
     except Exception as e:
         logger.error(f"Error cargando modelo: {str(e)}")
         return None
 
-def load_model_and_scaler():
+def load_model_and_scaler(
+    model_path: Optional[Path] = None, scaler_path: Optional[Path] = None
+):
     """
     Carga el modelo entrenado y el scaler.
 
+    Args:
+        model_path (Path, optional): Modelo (por defecto ``models/model.joblib``)
+        scaler_path (Path, optional): Scaler guardado por ``create_all_features``
+            (por defecto ``data/processed/scaler.joblib``)
+
     Returns:
         tuple: (model, scaler)
     """
+    import joblib
+
     try:
-        model = joblib.load(PROJECT_ROOT / "models" / "model.joblib")
-        scaler = joblib.load(PROJECT_ROOT / "data" / "prep" / "scaler.joblib")
+        model = joblib.load(model_path or PROJECT_ROOT / "models" / "model.joblib")
+        scaler = joblib.load(
+            scaler_path or PROJECT_ROOT / "data" / "processed" / "scaler.joblib"
+        )
         return model, scaler
     except Exception as e:
         logger.error(f"Error cargando modelo o scaler: {str(e)}")
         raise
 
-def generate_predictions(args):
+def open_model(
+    args, engineer, path: Optional[Path] = None, num_threads: Optional[int] = None
+):
     """
-    Genera predicciones usando el modelo entrenado.
+    Abre el bundle del modelo o, si no existe, ``model.joblib`` y ``scaler.joblib``.
+
+    Un ``--model-name`` explícito se usa en lugar del bundle.
+
+    Args:
+        args: Argumentos de línea de comandos
+        engineer (FeatureEngineer): Ingeniero de features del directorio de datos
+        path (Path, optional): Bundle (raíz o versión) o archivo ``.joblib`` de
+            ``--models``; un archivo se evalúa con el Booster nativo para
+            poder limitar sus hilos
+        num_threads (int, optional): Hilos de LightGBM (por defecto ``--num-threads``)
+
+    Returns:
+        ModelBundle: Modelo con su scaler (y el índice histórico si es un bundle)
     """
-    try:
-        # 1. Cargar modelo
-        logger.info("Cargando modelo...")
-        model_path = Path(args.model_dir) / args.model_name
-        model = load_model(model_path)
-        if model is None:
-            raise ValueError("No se pudo cargar el modelo")
+    from src.bundle import LATEST_FILE, MANIFEST_FILE, ModelBundle
 
-        # 2. Preparar features para test
-        logger.info("Preparando features de test...")
-        data_path = Path(args.data_dir)
-        engineer = FeatureEngineer(data_path)
-        sales_df, items_df, test_df = engineer.load_processed_data()
+    num_threads = args.num_threads if num_threads is None else num_threads
+    if path is not None and Path(path).is_file():
+        engineer.match_columns()
+        model, scaler = load_model_and_scaler(Path(path), engineer.prep_path / "scaler.joblib")
+        return ModelBundle.from_model(
+            model, scaler, engineer._get_feature_columns(),
+            args.fast_predict or "booster", num_threads,
+        )
+
+    model_path = Path(args.model_dir) / (args.model_name or "model.joblib")
+    bundle_dir = Path(path or args.bundle_dir or Path(args.model_dir) / "bundle")
+    if path is None and args.model_name:
+        # Un --model-name explícito manda sobre el bundle
+        logger.info(f"Modelo pedido con --model-name: {model_path} (no se usa el bundle)")
+    elif (bundle_dir / LATEST_FILE).exists() or (bundle_dir / MANIFEST_FILE).exists():
+        bundle = ModelBundle.open(bundle_dir, args.fast_predict or "booster", num_threads)
+        try:
+            engineer.match_columns(bundle.feature_columns)
+        except ValueError as e:
+            raise ValueError(
+                f"Las columnas del bundle {bundle.manifest['version']} no coinciden "
+                f"con las features registradas ({e}); reentrene el modelo"
+            )
+        return bundle
+    elif path is not None or args.bundle_dir:
+        raise FileNotFoundError(f"No existe el bundle {bundle_dir}")
+    else:
+        logger.info(f"Sin bundle en {bundle_dir}; se usan model.joblib y scaler.joblib")
+
+    # Features de la última matriz de entrenamiento (la del scaler guardado)
+    engineer.match_columns()
+    model, scaler = load_model_and_scaler(model_path, engineer.prep_path / "scaler.joblib")
+    return ModelBundle.from_model(
+        model, scaler, engineer._get_feature_columns(), args.fast_predict, args.num_threads
+    )
+
+def open_models(args, engineer) -> Tuple[Dict[str, object], Dict[str, dict]]:
+    """
+    Abre los modelos de ``--models`` y ajusta las features a la unión de sus columnas.
+
+    Sin ``--num-threads``, los hilos de LightGBM se reparten entre los modelos
+    que se evalúan a la vez.
+
+    Args:
+        args: Argumentos de línea de comandos
+        engineer (FeatureEngineer): Ingeniero de features del directorio de datos
+
+    Returns:
+        tuple: (modelos por nombre, metadatos por nombre: ruta y versión)
+    """
+    from src.feature_registry import REGISTRY
+    from src.parallel import default_workers
+
+    names = [name for name, _ in args.models]
+    duplicated = sorted({name for name in names if names.count(name) > 1})
+    if duplicated:
+        raise ValueError(f"Nombres de modelo repetidos en --models: {', '.join(duplicated)}")
+
+    workers = min(args.score_workers or len(names), len(names))
+    num_threads = args.num_threads or max(1, default_workers() // workers)
+    models, sources, columns = {}, {}, set()
+    for name, path in args.models:
+        model = open_model(args, engineer, path, num_threads)
+        models[name] = model
+        sources[name] = {"path": str(path), "version": model.manifest.get("version")}
+        columns.update(model.feature_columns)
+        logger.info(f"Modelo {name}: {path} ({len(model.feature_columns)} features)")
+    engineer.match_columns(REGISTRY.select(columns))
+    return models, sources
+
+def row_ids(test_df: "pd.DataFrame", offset: int = 0) -> np.ndarray:
+    """
+    IDs de salida de las filas de test.
+
+    Se usa la columna ``ID`` del archivo de test; si no existe, la posición
+    global de la fila (``offset`` + posición dentro de la parte), que coincide
+    con el índice del DataFrame completo.
+
+    Args:
+        test_df (pd.DataFrame): Filas de test
+        offset (int): Filas leídas antes de esta parte
 
-        # 3. Crear features de test
+    Returns:
+        np.ndarray: IDs de las filas
+    """
+    if "ID" in test_df.columns:
+        return test_df["ID"].to_numpy()
+    return np.arange(offset, offset + len(test_df))
+
+def reference_stats(scorer, engineer: "FeatureEngineer"):
+    """Índice histórico del primer modelo (bundle) o el del directorio de datos."""
+    model = scorer.models[scorer.reference]
+    return model.stats if model.stats is not None else engineer.load_historical_stats()
+
+def stream_predictions(
+    scorer, engineer: "FeatureEngineer", output_files: Dict[str, Path], chunksize: int
+) -> dict:
+    """
+    Predice el conjunto de test por partes y agrega cada parte a los archivos de salida.
+
+    Cada parte se une contra el índice histórico, se predice con todos los
+    modelos y se escribe, de modo que la memoria no depende del número de
+    filas de test.
+
+    Args:
+        scorer (ShadowScorer): Modelos con su scaler
+        engineer (FeatureEngineer): Ingeniero de features del directorio de datos
+        output_files (dict): nombre del modelo -> CSV de salida (ID, item_cnt_month)
+        chunksize (int): Filas de test por parte
+
+    Returns:
+        dict: nombre del modelo -> resumen de predicciones (count, mean, std, min, max)
+    """
+    import pandas as pd
+
+    stats = reference_stats(scorer, engineer)
+    if stats is None:
+        logger.info("Sin índice histórico; se construye una sola vez...")
+        sales_df, items_df, _ = engineer.load_processed_data(columns={
+            "sales": ["shop_id", "item_id", "item_price", "item_cnt_day"],
+            "items": ["item_id", "item_category_id"],
+            "test": ["shop_id", "item_id"],
+        })
+        engineer.save_historical_stats(sales_df, items_df)
+        del sales_df, items_df
+        stats = engineer.load_historical_stats()
+
+    count = 0
+    for i, chunk in enumerate(engineer.store.iter_chunks("test_processed", chunksize)):
+        with stage("predict_chunk") as record:
+            record["rows"] = len(chunk)
+            features = engineer.create_all_features_for_test(chunk, stats=stats)
+            predictions = scorer.score(features)
+            ids = row_ids(chunk, offset=count)
+            for name, output_file in output_files.items():
+                pd.DataFrame({"ID": ids, "item_cnt_month": predictions[name]}).to_csv(
+                    output_file, index=False, mode="w" if i == 0 else "a", header=i == 0
+                )
+
+        count += len(chunk)
+        logger.info(f"Parte {i + 1}: {count:,} filas predichas")
+
+    return {name: scorer.summaries[name].to_dict() for name in output_files}
+
+def predict_all(
+    scorer, engineer: "FeatureEngineer", output_files: Dict[str, Path]
+) -> dict:
+    """
+    Predice el conjunto de test completo en memoria.
+
+    Args:
+        scorer (ShadowScorer): Modelos con su scaler
+        engineer (FeatureEngineer): Ingeniero de features del directorio de datos
+        output_files (dict): nombre del modelo -> CSV de salida (ID, item_cnt_month)
+
+    Returns:
+        dict: nombre del modelo -> resumen de predicciones (count, mean, std, min, max)
+    """
+    import pandas as pd
+
+    stats = reference_stats(scorer, engineer)
+
+    # Crear features de test
+    if stats is not None:
+        # Join contra el índice precalculado en entrenamiento
+        with stage("load_test") as record:
+            test_df = engineer.store.read("test_processed")
+            record["rows"] = len(test_df)
+        test_features = engineer.create_all_features_for_test(test_df, stats=stats)
+    else:
+        logger.info("Sin índice histórico; se recalculan estadísticas...")
+        sales_df, items_df, test_df = engineer.load_processed_data(columns={
+            "sales": ["shop_id", "item_id", "item_price", "item_cnt_day"],
+            "items": ["item_id", "item_category_id"],
+        })
         test_features = engineer.create_all_features_for_test(
             test_df, sales_df, items_df
         )
 
-        # 4. Realizar predicciones
-        logger.info("Generando predicciones...")
-        predictions = model.predict(test_features)
-        predictions = np.expm1(predictions).clip(0, 20)
+    # Realizar predicciones
+    logger.info("Generando predicciones...")
+    with stage("predict") as record:
+        record["rows"] = len(test_features)
+        predictions = scorer.score(test_features)
 
-        # 5. Crear DataFrame de predicciones
-        submission = pd.DataFrame({"ID": test_df.index, "item_cnt_month": predictions})
+    # Guardar predicciones
+    ids = row_ids(test_df)
+    with stage("write_predictions") as record:
+        record["rows"] = len(ids)
+        for name, output_file in output_files.items():
+            submission = pd.DataFrame({"ID": ids, "item_cnt_month": predictions[name]})
+            submission.to_csv(output_file, index=False)
 
-        # 6. Guardar predicciones
+    return {name: scorer.summaries[name].to_dict() for name in output_files}
+
+def generate_predictions(args):
+    """
+    Genera predicciones usando el modelo entrenado.
+    """
+    from src.feature_engineering import FeatureEngineer
+    from src.shadow import ShadowScorer
+
+    try:
+        # 1. Cargar modelo(s) (bundle versionado o model.joblib + scaler.joblib)
+        logger.info("Cargando modelo...")
+        engineer = FeatureEngineer(Path(args.data_dir))
+        with stage("load_model"):
+            if args.models:
+                models, sources = open_models(args, engineer)
+            else:
+                models, sources = {"model": open_model(args, engineer)}, {}
+
+        # 2. Preparar features para test
+        logger.info("Preparando features de test...")
         output_path = Path(args.output_dir)
         output_path.mkdir(exist_ok=True, parents=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+        if args.models:
+            output_files = {
+                name: output_path / f"predictions_{timestamp}_{name}.csv" for name in models
+            }
+        else:
+            output_files = {"model": output_path / f"predictions_{timestamp}.csv"}
+
+        with ShadowScorer(models, args.score_workers, args.diff_threshold) as scorer:
+            if args.chunksize:
+                # Modo streaming: memoria constante respecto al tamaño del test
+                summaries = stream_predictions(scorer, engineer, output_files, args.chunksize)
+            else:
+                summaries = predict_all(scorer, engineer, output_files)
 
-        output_file = output_path / f"predictions_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
-        submission.to_csv(output_file, index=False)
+        for name, output_file in output_files.items():
+            summary = summaries[name]
+            logger.info(f"✅ Predicciones guardadas en: {output_file}")
+            logger.info("\nEstadísticas de predicciones:")
+            logger.info(f"Media: {summary['mean']:.4f}")
+            logger.info(f"Desv. Est.: {summary['std']:.4f}")
+            logger.info(f"Min: {summary['min']:.4f}")
+            logger.info(f"Max: {summary['max']:.4f}")
 
-        logger.info(f"✅ Predicciones guardadas en: {output_file}")
-        logger.info("\nEstadísticas de predicciones:")
-        logger.info(f"Media: {predictions.mean():.4f}")
-        logger.info(f"Desv. Est.: {predictions.std():.4f}")
-        logger.info(f"Min: {predictions.min():.4f}")
-        logger.info(f"Max: {predictions.max():.4f}")
+        if args.models:
+            report_file = output_path / f"diff_{timestamp}.json"
+            report = scorer.report(sources)
+            with open(report_file, "w") as f:
+                json.dump(report, f, indent=2)
+            for name, diff in report["diffs"].items():
+                logger.info(
+                    f"{name} vs {scorer.reference}: MAE {diff['mean_abs_diff']:.4f}, "
+                    f"máx {diff['max_abs_diff']:.4f}, "
+                    f"{diff['changed_share']:.2%} filas con |dif| > {diff['threshold']}"
+                )
+            logger.info(f"Reporte de diferencias guardado en: {report_file}")
 
     except Exception as e:
         logger.error(f"❌ Error en predicciones: {str(e)}")
@@ -114,7 +401,9 @@ def main():
     """Función principal para ejecutar las predicciones"""
     try:
         args = parse_args()
+        configure_from_args(args)
         generate_predictions(args)
+        write_report()
     except Exception as e:
         logger.error(f"Error en main: {str(e)}")
         raise
@@ -4,7 +4,12 @@ Este script procesa los datos crudos y los prepara para el entrenamiento.
 """
 
 from pathlib import Path
-from src.data_processor import DataProcessor
+from src.data_processor import PROCESSED_TABLES, DataProcessor
+from src.feature_engineering import FeatureEngineer
+from src.profiling import add_profiling_args, configure_from_args, write_report
+from src.stage_cache import StageCache
+from src.storage import FORMATS
+import argparse
 import logging
 
 # Configurar logging
@@ -14,18 +19,80 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Prepare raw sales data')
+    parser.add_argument('--data-dir', type=str, default='data',
+                      help='Directory containing input data')
+    parser.add_argument('--storage-format', type=str, default='parquet',
+                      choices=list(FORMATS),
+                      help='File format for the processed/ directory')
+    parser.add_argument('--chunksize', type=int, default=None,
+                      help='Process sales in chunks of this many rows')
+    parser.add_argument('--n-jobs', type=int, default=1,
+                      help='Worker processes for preprocessing and the --verify recompute')
+    parser.add_argument('--readers', type=int, default=1,
+                      help='Threads reading the sales, items and test files concurrently')
+    parser.add_argument('--dtype-backend', type=str, default='numpy',
+                      choices=['numpy', 'pyarrow'],
+                      help='Column dtypes of loaded frames: NumPy or Arrow-backed (pd.ArrowDtype)')
+    parser.add_argument('--append', type=str, default=None,
+                      help='CSV with new sales days to append incrementally')
+    parser.add_argument('--verify', action='store_true',
+                      help='With --append, check the result against a full recompute')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                      help='Stage cache directory; skips preprocessing when inputs are unchanged')
+    parser.add_argument('--cache-max-gb', type=float, default=10.0,
+                      help='Maximum stage cache size (LRU eviction)')
+    parser.add_argument('--cache-fingerprint', type=str, default='mtime',
+                      choices=['mtime', 'hash'],
+                      help='How input files are fingerprinted for the cache')
+    add_profiling_args(parser)
+    return parser.parse_args()
+
+
 def main():
     """Función principal para ejecutar el procesamiento de datos"""
     try:
+        args = parse_args()
+        configure_from_args(args)
+
         # Configurar rutas
-        data_path = Path("data")
+        data_path = Path(args.data_dir)
 
         # Inicializar procesador
-        processor = DataProcessor(data_path)
+        processor = DataProcessor(
+            data_path, storage_format=args.storage_format, n_jobs=args.n_jobs,
+            n_readers=args.readers, dtype_backend=args.dtype_backend,
+        )
 
         # Ejecutar procesamiento
-        processor.process_all()
+        if args.append:
+            # Solo las filas nuevas: ventas procesadas y features incrementales.
+            # El estado se comprueba antes de tocar sales_processed.
+            engineer = FeatureEngineer(
+                data_path, storage_format=args.storage_format, n_jobs=args.n_jobs,
+                n_readers=args.readers, dtype_backend=args.dtype_backend,
+            )
+            engineer.require_feature_state()
+            new_sales = processor.append_sales(Path(args.append))
+            engineer.update_features(new_sales, verify=args.verify)
+        elif args.cache_dir:
+            cache = StageCache(Path(args.cache_dir), int(args.cache_max_gb * 1024**3))
+            key = cache.key("prep", **processor.fingerprint(args.cache_fingerprint))
+            entry = cache.get("prep", key)
+            if entry is not None:
+                cache.restore(entry, processor.output_files())
+                for name in PROCESSED_TABLES:
+                    processor.store.remove_other_formats(name)
+                logger.info("Preprocesamiento omitido: entradas sin cambios")
+            else:
+                processor.process_all(chunksize=args.chunksize)
+                cache.put("prep", key, processor.output_files())
+        else:
+            processor.process_all(chunksize=args.chunksize)
 
+        write_report()
         logger.info("✅ Preparación de datos completada!")
 
     except Exception as e:
@@ -0,0 +1,223 @@
+"""
+Servidor HTTP de predicciones con micro-batching.
+
+Carga el modelo y el índice histórico una sola vez (y de nuevo si cambian en
+disco) y expone:
+    POST /predict  {"shop_id": [...], "item_id": [...]} -> {"item_cnt_month": [...]}
+    GET  /health   -> {"status": "ok", "batches": ..., "requests": ..., "cache": {...}}
+"""
+
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sys
+import json
+import logging
+import argparse
+from typing import Optional
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.fast_predict import BACKENDS
+from src.prediction_cache import PredictionCache
+from src.serving import MicroBatcher, Predictor
+
+# Configurar logging
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Id máximo aceptado en /predict (los ids de tienda e item son int32)
+MAX_ID = int(np.iinfo(np.int32).max)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Serve sales predictions over HTTP')
+    parser.add_argument('--data-dir', type=str, default='data',
+                      help='Directory containing processed data')
+    parser.add_argument('--model-dir', type=str, default='models',
+                      help='Directory containing trained model')
+    parser.add_argument('--model-name', type=str, default=None,
+                      help='Name of the model file (default: model.joblib); naming it '
+                           'uses that file instead of the bundle')
+    parser.add_argument('--bundle-dir', type=str, default=None,
+                      help='Model bundle written by train.py (default: <model-dir>/bundle, '
+                           'falling back to model.joblib + scaler.joblib if missing; '
+                           'an explicit path must exist)')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                      help='Host to bind')
+    parser.add_argument('--port', type=int, default=8080,
+                      help='Port to bind (0 picks a free port)')
+    parser.add_argument('--max-batch-size', type=int, default=4096,
+                      help='Maximum rows scored per model call')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                      help='Time window to collect concurrent requests')
+    parser.add_argument('--fast-predict', type=str, default=None, choices=list(BACKENDS),
+                      help='Score with the native Booster or the compiled NumPy ensemble '
+                           '(bundles default to numpy)')
+    parser.add_argument('--num-threads', type=int, default=0,
+                      help='LightGBM threads for --fast-predict booster (0 = default)')
+    parser.add_argument('--cache-size', type=int, default=100_000,
+                      help='shop/item predictions kept in the in-memory LRU cache (0 disables it)')
+    parser.add_argument('--cache-db', type=str, default=None,
+                      help='SQLite file for a second, on-disk prediction cache tier '
+                           '(requires --cache-size > 0)')
+    parser.add_argument('--check-interval-s', type=float, default=1.0,
+                      help='Seconds between checks for a new model or historical stats')
+    args = parser.parse_args(argv)
+    if args.model_name and args.bundle_dir:
+        parser.error('--model-name and --bundle-dir are mutually exclusive')
+    if args.cache_db and args.cache_size <= 0:
+        parser.error('--cache-db is a second tier of the in-memory cache and requires --cache-size > 0')
+    return args
+
+
+def parse_ids(values, name: str) -> np.ndarray:
+    """
+    Valida una lista de ids del cuerpo de ``/predict``.
+
+    Args:
+        values: Valor del campo en el JSON
+        name (str): Nombre del campo (para el mensaje de error)
+
+    Returns:
+        np.ndarray: Ids como int64
+
+    Raises:
+        ValueError: Si no es una lista de enteros entre 0 y ``MAX_ID``
+    """
+    if not isinstance(values, list):
+        raise ValueError(f"{name} debe ser una lista de enteros")
+    ids = np.asarray(values)
+    if ids.size == 0:
+        return ids.astype(np.int64)
+    if ids.ndim != 1 or ids.dtype.kind not in "iuf":
+        raise ValueError(f"{name} debe ser una lista de enteros")
+    if ids.dtype.kind == "f" and not (np.isfinite(ids).all() and (ids == np.round(ids)).all()):
+        raise ValueError(f"{name} debe ser una lista de enteros")
+    if (ids < 0).any() or (ids > MAX_ID).any():
+        raise ValueError(f"{name} fuera de rango: los ids van de 0 a {MAX_ID}")
+    return ids.astype(np.int64)
+
+
+def make_handler(batcher: MicroBatcher, predictor: Optional[Predictor] = None):
+    """Crea la clase de handler HTTP asociada a un micro-batcher (y su predictor)."""
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+        """Handler de las rutas /predict y /health."""
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            payload = {
+                "status": "ok",
+                "batches": batcher.batches,
+                "requests": batcher.requests,
+            }
+            if predictor is not None:
+                payload["model_version"] = predictor.model_version
+                payload["reloads"] = predictor.reloads
+                if predictor.cache is not None:
+                    payload["cache"] = predictor.cache.stats()
+            self._send_json(200, payload)
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                if not isinstance(payload, dict):
+                    raise ValueError("el cuerpo debe ser un objeto JSON")
+                for name in ("shop_id", "item_id"):
+                    if name not in payload:
+                        raise ValueError(f"falta el campo {name}")
+                shop_ids = parse_ids(payload["shop_id"], "shop_id")
+                item_ids = parse_ids(payload["item_id"], "item_id")
+                if len(shop_ids) != len(item_ids):
+                    raise ValueError("shop_id e item_id deben tener el mismo largo")
+            except (TypeError, ValueError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                predictions = batcher.submit(shop_ids, item_ids)
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"item_cnt_month": predictions.tolist()})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return PredictionHandler
+
+
+def build_server(args) -> tuple:
+    """
+    Carga el predictor y crea el servidor sin iniciarlo.
+
+    Returns:
+        tuple: (server, batcher)
+    """
+    cache = None
+    if args.cache_size > 0:
+        cache = PredictionCache(
+            args.cache_size, Path(args.cache_db) if args.cache_db else None
+        )
+    # Un --model-name explícito manda sobre el bundle
+    bundle_path = None
+    if not args.model_name:
+        bundle_path = Path(args.bundle_dir or Path(args.model_dir) / "bundle")
+    predictor = Predictor(
+        Path(args.data_dir), Path(args.model_dir) / (args.model_name or "model.joblib"),
+        fast_predict=args.fast_predict, num_threads=args.num_threads,
+        bundle_path=bundle_path,
+        cache=cache, check_interval_s=args.check_interval_s,
+        require_bundle=bool(args.bundle_dir),
+    )
+    batcher = MicroBatcher(
+        predictor.predict,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    ).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher, predictor))
+    server.daemon_threads = True
+    return server, batcher
+
+
+def main():
+    """Función principal para ejecutar el servidor"""
+    try:
+        args = parse_args()
+        server, batcher = build_server(args)
+        host, port = server.server_address[:2]
+        logger.info(f"✅ Servidor escuchando en http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Deteniendo servidor...")
+        finally:
+            server.server_close()
+            batcher.stop()
+    except Exception as e:
+        logger.error(f"❌ Error en servidor: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
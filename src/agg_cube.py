@@ -0,0 +1,348 @@
+"""
+Cubo de agregación por categoría y mes.
+
+Una sola pasada sobre las ventas (``np.bincount`` sobre la celda
+categoría x periodo) materializa conteos, sumas y sumas de cuadrados en
+arreglos densos. Las estadísticas por categoría (media, desviación) son la
+suma del cubo sobre los periodos, opcionalmente solo los anteriores a un corte
+(``until``) para no mirar el periodo de validación, y se sirven por fila con
+un *gather* O(1), sin volver a agrupar el historial.
+
+El cubo es aditivo: filas nuevas se acumulan con ``update`` y las
+estadísticas se vuelven a sumar a partir del cubo, sin tocar las ventas
+anteriores.
+
+Clases:
+    AggregationCube: Conteos, sumas y sumas de cuadrados por celda
+
+Funciones:
+    month_periods: Periodo mensual absoluto de cada fila (año * 12 + mes - 1)
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Ejes del cubo, en orden
+AXES = ("category", "period")
+
+# Estadísticas servidas por fila
+STATS = ("count", "sum", "mean", "std")
+
+# Celdas máximas del cubo denso
+MAX_CELLS = 1 << 26
+
+
+def month_periods(df: pd.DataFrame) -> np.ndarray:
+    """
+    Periodo mensual absoluto de cada fila.
+
+    Usa las columnas 'year' y 'month' de ``preprocess_sales`` y, si no
+    existen, la columna 'date'.
+
+    Args:
+        df (pd.DataFrame): Ventas con 'year' y 'month', o con 'date'
+
+    Returns:
+        np.ndarray: ``year * 12 + month - 1`` (int64)
+    """
+    if "year" in df.columns and "month" in df.columns:
+        year, month = df["year"], df["month"]
+    else:
+        date = pd.to_datetime(df["date"])
+        year, month = date.dt.year, date.dt.month
+    return year.to_numpy(dtype=np.int64) * 12 + month.to_numpy(dtype=np.int64) - 1
+
+
+class AggregationCube:
+    """
+    Conteos, sumas y sumas de cuadrados por (categoría, periodo).
+
+    Attributes:
+        columns (list): Columnas de valores agregadas
+        period_origin (int): Periodo del índice 0 del eje de periodos
+        count (np.ndarray): Filas por celda (n_categories, n_periods)
+        sums (dict): Suma por celda de cada columna
+        sumsq (dict): Suma de cuadrados por celda de cada columna
+    """
+
+    def __init__(
+        self,
+        count: np.ndarray,
+        sums: Dict[str, np.ndarray],
+        sumsq: Dict[str, np.ndarray],
+        period_origin: int = 0,
+    ):
+        self.count = count
+        self.sums = sums
+        self.sumsq = sumsq
+        self.columns = list(sums)
+        self.period_origin = period_origin
+        self._rollups = {}
+
+    @staticmethod
+    def _cells(categories, periods, period_origin: int) -> tuple:
+        """Coordenadas enteras por fila y máscara de filas válidas (categoría no NaN)."""
+        category = np.asarray(categories, dtype=np.float64)
+        valid = ~np.isnan(category)
+        coords = (
+            category[valid].astype(np.int64),
+            np.asarray(periods, dtype=np.int64)[valid] - period_origin,
+        )
+        if any(len(c) and c.min() < 0 for c in coords):
+            raise ValueError("Categorías y periodos deben ser >= origen")
+        return coords, valid
+
+    @staticmethod
+    def _accumulate(coords: tuple, valid: np.ndarray, values: Dict[str, object], shape: tuple):
+        """Una pasada de ``bincount`` por estadística sobre la celda de cada fila."""
+        size = int(np.prod(shape))
+        if size > MAX_CELLS:
+            raise ValueError(f"El cubo tendría {size:,} celdas (máximo {MAX_CELLS:,})")
+        cell = np.ravel_multi_index(coords, shape)
+        count = np.bincount(cell, minlength=size).reshape(shape)
+        sums, sumsq = {}, {}
+        for name, column in values.items():
+            x = np.asarray(column, dtype=np.float64)[valid]
+            sums[name] = np.bincount(cell, weights=x, minlength=size).reshape(shape)
+            sumsq[name] = np.bincount(cell, weights=x * x, minlength=size).reshape(shape)
+        return count, sums, sumsq
+
+    @classmethod
+    def build(cls, categories, periods, values: Dict[str, object]) -> "AggregationCube":
+        """
+        Construye el cubo en una sola pasada.
+
+        Las filas con categoría NaN (items desconocidos) se ignoran.
+
+        Args:
+            categories: Categoría por fila (puede contener NaN)
+            periods: Periodo por fila (``month_periods`` o ``date_block_num``)
+            values (dict): Columnas a agregar (nombre -> valores por fila)
+
+        Returns:
+            AggregationCube: Cubo construido
+        """
+        periods = np.asarray(periods, dtype=np.int64)
+        origin = int(periods.min()) if len(periods) else 0
+        coords, valid = cls._cells(categories, periods, origin)
+        shape = tuple(int(c.max()) + 1 if len(c) else 1 for c in coords)
+        count, sums, sumsq = cls._accumulate(coords, valid, values, shape)
+        return cls(count, sums, sumsq, origin)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        value_columns: Sequence[str] = ("item_cnt_day",),
+        period_column: Optional[str] = None,
+    ) -> "AggregationCube":
+        """
+        Construye el cubo desde un DataFrame de ventas.
+
+        Args:
+            df (pd.DataFrame): Ventas con 'item_category_id' y el periodo ('year'/'month', 'date' o ``period_column``)
+            value_columns (Sequence[str]): Columnas a agregar
+            period_column (str, optional): Columna de periodo (p. ej.
+                'date_block_num'); por defecto ``month_periods``
+
+        Returns:
+            AggregationCube: Cubo construido
+        """
+        periods = df[period_column].to_numpy() if period_column else month_periods(df)
+        return cls.build(
+            df["item_category_id"], periods, {name: df[name] for name in value_columns}
+        )
+
+    def update(self, categories, periods, values: Dict[str, object]):
+        """
+        Acumula filas nuevas en el cubo (los ejes crecen si hace falta).
+
+        Args:
+            categories: Categoría por fila (puede contener NaN)
+            periods: Periodo por fila, no anterior a ``period_origin``
+            values (dict): Valores de las mismas columnas del cubo
+        """
+        if set(values) != set(self.columns):
+            raise ValueError(f"Se esperaban las columnas {self.columns}")
+        coords, valid = self._cells(categories, periods, self.period_origin)
+        shape = tuple(
+            max(size, int(c.max()) + 1 if len(c) else 0)
+            for size, c in zip(self.count.shape, coords)
+        )
+        count, sums, sumsq = self._accumulate(coords, valid, values, shape)
+
+        def grow(current: np.ndarray) -> np.ndarray:
+            pad = [(0, new - old) for old, new in zip(current.shape, shape)]
+            return np.pad(current, pad)
+
+        self.count = grow(self.count) + count
+        for name in self.columns:
+            self.sums[name] = grow(self.sums[name]) + sums[name]
+            self.sumsq[name] = grow(self.sumsq[name]) + sumsq[name]
+        self._rollups = {}
+
+    def rollup(self, until: Optional[int] = None) -> tuple:
+        """
+        Conteos, sumas y sumas de cuadrados por categoría.
+
+        Args:
+            until (int, optional): Solo periodos anteriores a este (exclusivo,
+                en la misma escala que los periodos de ``build``)
+
+        Returns:
+            tuple: (count, sums, sumsq) con un valor por categoría
+        """
+        if until not in self._rollups:
+            stop = None if until is None else max(until - self.period_origin, 0)
+
+            def reduce(cube: np.ndarray) -> np.ndarray:
+                return cube[:, :stop].sum(axis=1)
+
+            self._rollups[until] = (
+                reduce(self.count),
+                {name: reduce(values) for name, values in self.sums.items()},
+                {name: reduce(values) for name, values in self.sumsq.items()},
+            )
+        return self._rollups[until]
+
+    def stat(self, stat: str, column: str, until: Optional[int] = None) -> np.ndarray:
+        """
+        Estadística de una columna para todas las categorías.
+
+        Args:
+            stat (str): "count", "sum", "mean" o "std" (ddof=1, como pandas)
+            column (str): Columna agregada
+            until (int, optional): Solo periodos anteriores a este
+
+        Returns:
+            np.ndarray: Valor por categoría (NaN sin datos)
+        """
+        count, sums, sumsq = self.rollup(until)
+        if stat == "count":
+            return count
+        if stat == "sum":
+            return sums[column]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sums[column] / count
+            if stat == "mean":
+                return mean
+            if stat == "std":
+                var = (sumsq[column] - count * mean * mean) / (count - 1)
+                return np.where(count > 1, np.sqrt(np.maximum(var, 0.0)), np.nan)
+        raise ValueError(f"Estadística no soportada: {stat}. Opciones: {', '.join(STATS)}")
+
+    def _category_index(self, categories) -> tuple:
+        """Índice entero de cada fila y máscara de categorías dentro del cubo."""
+        keys = np.asarray(categories)
+        if keys.dtype.kind == "f":
+            keys = np.where(np.isnan(keys), -1, keys)
+        keys = keys.astype(np.int64, copy=False)
+        ok = (keys >= 0) & (keys < self.count.shape[0])
+        return (keys if ok.all() else np.where(ok, keys, 0)), ok
+
+    def lookup_many(
+        self,
+        stats: Dict[str, str],
+        column: str,
+        categories,
+        until: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Varias estadísticas por fila, calculando el índice de categorías una vez.
+
+        Args:
+            stats (dict): nombre -> estadística ("count", "sum", "mean" o "std")
+            column (str): Columna agregada
+            categories: Categoría por fila (puede contener NaN)
+            until (int, optional): Solo periodos anteriores a este
+
+        Returns:
+            dict: nombre -> valor por fila (float64); NaN si la categoría no
+                existe o es NaN
+        """
+        keys, valid = self._category_index(categories)
+        out = {}
+        for name, stat in stats.items():
+            table = np.asarray(self.stat(stat, column, until), dtype=np.float64)
+            values = table.take(keys)
+            if not valid.all():
+                values[~valid] = np.nan
+            out[name] = values
+        return out
+
+    def lookup(
+        self, stat: str, column: str, categories, until: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Estadística de la categoría de cada fila (O(1) por fila).
+
+        Args:
+            stat (str): "count", "sum", "mean" o "std"
+            column (str): Columna agregada
+            categories: Categoría por fila (puede contener NaN)
+            until (int, optional): Solo periodos anteriores a este
+
+        Returns:
+            np.ndarray: Valor por fila (float64); NaN si la categoría no existe
+                o es NaN
+        """
+        return self.lookup_many({stat: stat}, column, categories, until)[stat]
+
+    def save(self, directory: Path):
+        """
+        Guarda el cubo como arreglos ``.npy``.
+
+        Args:
+            directory (Path): Directorio de destino
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "count.npy", self.count)
+        for i, name in enumerate(self.columns):
+            np.save(directory / f"sum_{i}.npy", self.sums[name])
+            np.save(directory / f"sumsq_{i}.npy", self.sumsq[name])
+        with open(directory / "meta.json", "w") as f:
+            json.dump({
+                "axes": list(AXES),
+                "columns": self.columns,
+                "period_origin": self.period_origin,
+                "shape": list(self.count.shape),
+            }, f)
+        logger.info(f"Cubo de agregación guardado en: {directory}")
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = False) -> Optional["AggregationCube"]:
+        """
+        Abre un cubo guardado.
+
+        Args:
+            directory (Path): Directorio del cubo
+            mmap (bool): Abrir los arreglos en modo memory-mapped (solo lectura)
+
+        Returns:
+            AggregationCube: Cubo, o None si no existe o tiene otros ejes
+        """
+        directory = Path(directory)
+        if not (directory / "meta.json").exists():
+            return None
+        with open(directory / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("axes") != list(AXES):
+            logger.warning(f"Cubo de agregación con otros ejes en {directory}; se ignora")
+            return None
+        mode = "r" if mmap else None
+        return cls(
+            np.load(directory / "count.npy", mmap_mode=mode),
+            {name: np.load(directory / f"sum_{i}.npy", mmap_mode=mode)
+             for i, name in enumerate(meta["columns"])},
+            {name: np.load(directory / f"sumsq_{i}.npy", mmap_mode=mode)
+             for i, name in enumerate(meta["columns"])},
+            meta["period_origin"],
+        )
@@ -0,0 +1,301 @@
+"""
+Paquete versionado del modelo para inferencia.
+
+Un bundle reúne en un solo directorio todo lo que la inferencia necesita del
+entrenamiento, de modo que no puedan desalinearse:
+
+    <raiz>/
+        LATEST                      versión activa
+        <version>/
+            manifest.json           formato, versión, columnas, backends
+            scaler_mean.npy         media del StandardScaler
+            scaler_scale.npy        escala del StandardScaler
+            model.txt               modelo LightGBM en formato texto
+            ensemble/*.npy          árboles compilados (``CompiledEnsemble``)
+            historical_stats/*.npy  índice ``HistoricalStats``
+
+Las partes numéricas son ``.npy`` que se abren memory-mapped: con el backend
+numpy, abrir un bundle no deserializa nada con joblib ni importa LightGBM o
+sklearn, y tarda milisegundos. El backend booster carga ``model.txt`` con
+``lightgbm.Booster`` (importado solo en ese caso).
+
+Clases:
+    ModelBundle: Columnas, scaler, modelo e índice histórico listos para predecir
+
+Funciones:
+    write_bundle: Escribe una nueva versión y la marca como activa
+    resolve_bundle: Directorio de la versión activa (o indicada) de un bundle
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+
+from src.fast_predict import BACKENDS, CompiledEnsemble, FastPredictor, to_counts
+from src.stats_index import HistoricalStats
+
+logger = logging.getLogger(__name__)
+
+# Versión del formato del directorio; cambia si cambia el layout
+BUNDLE_FORMAT = 1
+
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+
+
+def resolve_bundle(path: Path) -> Path:
+    """
+    Directorio de una versión del bundle.
+
+    Args:
+        path (Path): Raíz del bundle (se usa ``LATEST``) o una versión concreta
+
+    Returns:
+        Path: Directorio con ``manifest.json``
+    """
+    path = Path(path)
+    if (path / MANIFEST_FILE).exists():
+        return path
+    latest = path / LATEST_FILE
+    if not latest.exists():
+        raise FileNotFoundError(f"No existe un bundle en {path}; ejecute train.py primero")
+    return path / latest.read_text().strip()
+
+
+def write_bundle(
+    root: Path,
+    model,
+    feature_columns: List[str],
+    scaler_mean: np.ndarray,
+    scaler_scale: np.ndarray,
+    stats: HistoricalStats,
+    extra: Optional[dict] = None,
+) -> Path:
+    """
+    Escribe una nueva versión del bundle y actualiza ``LATEST``.
+
+    La versión se escribe en un directorio temporal y se renombra al final,
+    de modo que un lector nunca ve una versión a medio escribir.
+
+    Args:
+        root (Path): Raíz del bundle
+        model: ``LGBMRegressor`` o ``lightgbm.Booster`` entrenado
+        feature_columns (list): Columnas de features en el orden del modelo
+        scaler_mean (np.ndarray): ``StandardScaler.mean_``
+        scaler_scale (np.ndarray): ``StandardScaler.scale_``
+        stats (HistoricalStats): Índice histórico del entrenamiento
+        extra (dict, optional): Metadatos adicionales del manifiesto
+
+    Returns:
+        Path: Directorio de la versión escrita
+    """
+    try:
+        root = Path(root)
+        booster = getattr(model, "booster_", model)
+        model_text = booster.model_to_string()
+        version = (
+            f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-"
+            f"{hashlib.sha256(model_text.encode()).hexdigest()[:8]}"
+        )
+        tmp = root / f".tmp-{version}"
+        tmp.mkdir(parents=True)
+
+        (tmp / "model.txt").write_text(model_text)
+        np.save(tmp / "scaler_mean.npy", np.asarray(scaler_mean, dtype=np.float64))
+        np.save(tmp / "scaler_scale.npy", np.asarray(scaler_scale, dtype=np.float64))
+        stats.save(tmp / "historical_stats")
+
+        backends = ["booster"]
+        try:
+            CompiledEnsemble(booster).save(tmp / "ensemble")
+            backends.append("numpy")
+        except ValueError as e:
+            logger.warning(f"Ensamble no compilable; el bundle solo usa booster: {e}")
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "feature_columns": list(feature_columns),
+            "model_feature_names": booster.feature_name(),
+            "backends": backends,
+            **(extra or {}),
+        }
+        with open(tmp / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        target = root / version
+        os.replace(tmp, target)
+        latest_tmp = root / f".{LATEST_FILE}.tmp"
+        latest_tmp.write_text(version)
+        os.replace(latest_tmp, root / LATEST_FILE)
+        logger.info(f"Bundle del modelo guardado en: {target}")
+        return target
+
+    except Exception as e:
+        logger.error(f"Error escribiendo el bundle: {str(e)}")
+        if "tmp" in locals() and tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+class ModelBundle:
+    """
+    Modelo listo para predecir conteos a partir de features sin escalar.
+
+    Aplica el mismo ``StandardScaler`` que se usó para construir la matriz de
+    entrenamiento antes de evaluar el modelo.
+
+    Attributes:
+        feature_columns (list): Columnas de features esperadas
+        mean (np.ndarray): Media del scaler por columna
+        scale (np.ndarray): Escala del scaler por columna
+        stats (HistoricalStats): Índice histórico (None si no se incluye)
+        manifest (dict): Metadatos de la versión
+    """
+
+    def __init__(
+        self,
+        feature_columns: List[str],
+        mean: np.ndarray,
+        scale: np.ndarray,
+        scorer,
+        stats: Optional[HistoricalStats] = None,
+        manifest: Optional[dict] = None,
+    ):
+        """
+        Args:
+            feature_columns (list): Columnas de features esperadas
+            mean (np.ndarray): Media del scaler
+            scale (np.ndarray): Escala del scaler
+            scorer: ``FastPredictor`` o modelo con ``predict`` en escala log1p
+            stats (HistoricalStats, optional): Índice histórico
+            manifest (dict, optional): Metadatos de la versión
+        """
+        if len(mean) != len(feature_columns) or len(scale) != len(feature_columns):
+            raise ValueError("El scaler no coincide con las columnas de features")
+        self.feature_columns = list(feature_columns)
+        self.mean = mean
+        self.scale = scale
+        self.scorer = scorer
+        self.stats = stats
+        self.manifest = manifest or {}
+
+    @classmethod
+    def open(
+        cls, path: Path, backend: str = "numpy", num_threads: int = 0
+    ) -> "ModelBundle":
+        """
+        Abre una versión del bundle (memory-mapped).
+
+        Args:
+            path (Path): Raíz del bundle o directorio de una versión
+            backend (str): "numpy" (sin LightGBM) o "booster"
+            num_threads (int): Hilos de LightGBM para el backend booster
+
+        Returns:
+            ModelBundle: Bundle listo para ``predict``
+        """
+        try:
+            directory = resolve_bundle(path)
+            with open(directory / MANIFEST_FILE) as f:
+                manifest = json.load(f)
+            if manifest.get("format") != BUNDLE_FORMAT:
+                raise ValueError(
+                    f"Formato de bundle no soportado: {manifest.get('format')} "
+                    f"(se esperaba {BUNDLE_FORMAT})"
+                )
+            if backend not in BACKENDS:
+                raise ValueError(
+                    f"Backend no soportado: {backend}. Opciones: {', '.join(BACKENDS)}"
+                )
+            if backend not in manifest["backends"]:
+                raise ValueError(f"El bundle {manifest['version']} no incluye el backend {backend}")
+
+            if backend == "numpy":
+                scorer = FastPredictor.from_ensemble(
+                    CompiledEnsemble.load(directory / "ensemble"),
+                    manifest["model_feature_names"],
+                )
+            else:
+                import lightgbm as lgb
+
+                booster = lgb.Booster(model_file=str(directory / "model.txt"))
+                scorer = FastPredictor(booster, "booster", num_threads)
+
+            logger.info(f"Bundle {manifest['version']} abierto (backend {backend})")
+            return cls(
+                manifest["feature_columns"],
+                np.load(directory / "scaler_mean.npy", mmap_mode="r"),
+                np.load(directory / "scaler_scale.npy", mmap_mode="r"),
+                scorer,
+                HistoricalStats.load(directory / "historical_stats"),
+                manifest,
+            )
+
+        except Exception as e:
+            logger.error(f"Error abriendo el bundle: {str(e)}")
+            raise
+
+    @classmethod
+    def from_model(
+        cls,
+        model,
+        scaler,
+        feature_columns: List[str],
+        backend: Optional[str] = None,
+        num_threads: int = 0,
+    ) -> "ModelBundle":
+        """
+        Bundle en memoria a partir de ``model.joblib`` y ``scaler.joblib``.
+
+        Args:
+            model: ``LGBMRegressor`` entrenado
+            scaler (StandardScaler): Scaler ajustado en entrenamiento
+            feature_columns (list): Columnas de features en el orden del modelo
+            backend (str, optional): Backend de ``FastPredictor``; None usa
+                ``model.predict``
+            num_threads (int): Hilos de LightGBM para el backend booster
+
+        Returns:
+            ModelBundle: Bundle sin índice histórico
+        """
+        scorer = FastPredictor(model, backend, num_threads) if backend else model
+        return cls(feature_columns, scaler.mean_, scaler.scale_, scorer)
+
+    def transform(self, features) -> np.ndarray:
+        """
+        Escala las features como ``StandardScaler.transform``.
+
+        Args:
+            features: DataFrame con ``feature_columns`` o arreglo en ese orden
+
+        Returns:
+            np.ndarray: Matriz escalada float32 (n_rows, n_features)
+        """
+        if hasattr(features, "columns"):
+            features = features[self.feature_columns].to_numpy(dtype=np.float64)
+        X = (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+        return X.astype(np.float32)
+
+    def predict(self, features) -> np.ndarray:
+        """
+        Predice conteos ``item_cnt_month``.
+
+        Args:
+            features: Features sin escalar (DataFrame o arreglo)
+
+        Returns:
+            np.ndarray: ``expm1`` de la predicción, recortado a [0, 20]
+        """
+        X = self.transform(features)
+        if isinstance(self.scorer, FastPredictor):
+            return self.scorer.predict(X)
+        return to_counts(self.scorer.predict(X))
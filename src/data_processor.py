@@ -5,13 +5,21 @@ Clases:
     DataProcessor: Clase principal para procesamiento de datos
 """
 
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import logging
 from sklearn.preprocessing import StandardScaler
 import joblib
-from typing import Tuple, Optional
+from typing import Iterator, Tuple, Optional
+
+from src.keys import PAIR_CODE, PAIR_INDEX_FILE, PairIndex
+from src.loaders import read_csv_parallel, submit_all
+from src.parallel import parallel_preprocess
+from src.profiling import annotate, stage, timed
+from src.stage_cache import PROJECT_ROOT, file_fingerprint, source_fingerprint
+from src.storage import FrameStore, backend_dtypes
 
 # Configurar logging
 logging.basicConfig(
@@ -19,6 +27,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Esquemas de lectura: dtypes compactos declarados antes de parsear
+SALES_DTYPES = {
+    "date": "string",
+    "date_block_num": "int16",
+    "shop_id": "int16",
+    "item_id": "int32",
+    "item_price": "float32",
+    "item_cnt_day": "float32",
+}
+ITEMS_DTYPES = {
+    "item_id": "int32",
+    "item_category_id": "int16",
+}
+TEST_DTYPES = {
+    "ID": "int32",
+    "shop_id": "int16",
+    "item_id": "int32",
+}
+SALES_DATE_FORMAT = "%d.%m.%Y"
+
+# Filas por bloque de las transformaciones de ``preprocess_sales``; acota la
+# memoria temporal de cada paso independientemente del tamaño del historial
+PREPROCESS_BLOCK_ROWS = 1 << 20
+
+# Archivos crudos y tablas procesadas de la etapa de preparación
+RAW_FILES = ["sales_train.csv", "items.csv", "test.csv"]
+PROCESSED_TABLES = ["sales_processed", "items_processed", "test_processed"]
+
 
 class DataProcessor:
     """
@@ -27,102 +63,472 @@ class DataProcessor:
     Attributes:
         data_path (Path): Ruta base para los datos
         version (str): Versión del procesamiento
+        store (FrameStore): Almacén de las tablas procesadas
+        n_jobs (int): Procesos para el preprocesamiento
+        n_readers (int): Hilos de lectura de los archivos crudos
     """
 
-    def __init__(self, data_path: Path):
+    def __init__(
+        self,
+        data_path: Path,
+        storage_format: str = "parquet",
+        n_jobs: int = 1,
+        n_readers: int = 1,
+        dtype_backend: str = "numpy",
+    ):
         """
         Inicializa el procesador de datos.
 
         Args:
             data_path (Path): Ruta base donde se encuentran los datos
+            storage_format (str): Formato de ``processed/`` ("parquet",
+                "feather" o "csv")
+            n_jobs (int): Procesos para ``preprocess_sales``; con más de uno
+                las filas se reparten por tienda en un pool de procesos
+            n_readers (int): Hilos de lectura; con más de uno ventas, items y
+                test se leen a la vez y las ventas se parsean por rangos
+            dtype_backend (str): "numpy" o "pyarrow" (columnas ``pd.ArrowDtype``)
         """
         self.data_path = data_path
         self.processed_path = data_path / "processed"
         self.processed_path.mkdir(exist_ok=True)
+        self.store = FrameStore(self.processed_path, storage_format, dtype_backend)
+        self.n_jobs = n_jobs
+        self.n_readers = n_readers
+
+    def fingerprint(self, mode: str = "mtime") -> dict:
+        """
+        Entradas que determinan el resultado de ``process_all`` (para la caché).
+
+        Args:
+            mode (str): Modo de huella de archivos ("mtime" o "hash")
+
+        Returns:
+            dict: Huellas de archivos crudos, formato y código fuente
+        """
+        return {
+            "inputs": {
+                name: file_fingerprint(self.data_path / name, mode) for name in RAW_FILES
+            },
+            "storage_format": self.store.fmt,
+            "source": source_fingerprint([
+                PROJECT_ROOT / "src" / "data_processor.py",
+                PROJECT_ROOT / "src" / "storage.py",
+                PROJECT_ROOT / "src" / "parallel.py",
+                PROJECT_ROOT / "src" / "loaders.py",
+                PROJECT_ROOT / "src" / "keys.py",
+            ]),
+        }
 
+    def output_files(self) -> dict:
+        """Tablas que produce ``process_all`` (nombre -> ruta)."""
+        files = {
+            self.store.path(name).name: self.store.path(name) for name in PROCESSED_TABLES
+        }
+        files[PAIR_INDEX_FILE] = self.processed_path / PAIR_INDEX_FILE
+        return files
+
+    def _encode_sales(self, sales_df: pd.DataFrame, index: PairIndex) -> pd.DataFrame:
+        """Agrega 'pair_code' a ventas (o test), extendiendo el vocabulario."""
+        sales_df[PAIR_CODE] = index.extend(sales_df["shop_id"], sales_df["item_id"])
+        return sales_df
+
+    def _save_pair_index(self, index: PairIndex):
+        """Guarda el vocabulario de pares junto a las tablas procesadas."""
+        index.save(self.processed_path / PAIR_INDEX_FILE)
+        logger.info(f"Vocabulario de pares shop/item: {len(index):,} códigos")
+
+    @staticmethod
+    def _parse_sales_dates(sales: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convierte la columna 'date' de texto a datetime.
+
+        Se convierte por bloques de ``PREPROCESS_BLOCK_ROWS`` filas sobre un
+        arreglo reservado una vez: ``pd.to_datetime`` de la columna completa
+        materializa un objeto Python por fecha y duplica el pico de memoria
+        de la carga.
+        """
+        text = sales["date"]
+        if len(text) <= PREPROCESS_BLOCK_ROWS:
+            sales["date"] = pd.to_datetime(text, format=SALES_DATE_FORMAT)
+            return sales
+        dates = None
+        for start in range(0, len(text), PREPROCESS_BLOCK_ROWS):
+            block = pd.to_datetime(
+                text.iloc[start:start + PREPROCESS_BLOCK_ROWS], format=SALES_DATE_FORMAT
+            ).to_numpy()
+            if dates is None:
+                dates = np.empty(len(text), dtype=block.dtype)
+            dates[start:start + len(block)] = block
+        del text
+        sales["date"] = dates
+        return sales
+
+    @timed("load")
     def load_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
-        """Carga los datos desde archivos."""
+        """
+        Carga los datos desde archivos.
+
+        Los ids se leen como int16/int32, precios y cantidades como float32 y
+        la fecha de ventas se entrega ya convertida a datetime. Con
+        ``n_readers > 1`` los tres archivos se leen a la vez.
+        """
         try:
-            sales = pd.read_csv(self.data_path / "sales_train.csv")
-            items = pd.read_csv(self.data_path / "items.csv")
-            test = pd.read_csv(
-                self.data_path / "test.csv",
-                na_values=["null", "nan"]
-            )
-            return sales, items, test
+            if self.n_readers <= 1:
+                return self.load_sales(), self.load_items(), self.load_test()
+            with ThreadPoolExecutor(max_workers=self.n_readers) as pool:
+                futures = submit_all(pool, self._loaders())
+                return tuple(future.result() for future in futures.values())
         except Exception as e:
             logger.error(f"Error cargando datos: {str(e)}")
             raise
 
+    def _loaders(self) -> dict:
+        """Funciones de carga de cada archivo crudo, ventas primero."""
+        return {"sales": self.load_sales, "items": self.load_items, "test": self.load_test}
+
+    def load_sales(self) -> pd.DataFrame:
+        """Carga las ventas (por rangos en paralelo si ``n_readers > 1``)."""
+        return self._parse_sales_dates(read_csv_parallel(
+            self.data_path / "sales_train.csv", self.n_readers,
+            dtype=self._dtypes(SALES_DTYPES),
+        ))
+
+    def _dtypes(self, dtypes: dict) -> dict:
+        """Esquema de lectura en el backend de dtypes configurado."""
+        return backend_dtypes(dtypes, self.store.dtype_backend)
+
+    def load_items(self) -> pd.DataFrame:
+        """Carga el catálogo de items."""
+        return pd.read_csv(self.data_path / "items.csv", dtype=self._dtypes(ITEMS_DTYPES))
+
+    def load_test(self) -> pd.DataFrame:
+        """Carga el conjunto de test."""
+        return pd.read_csv(
+            self.data_path / "test.csv",
+            na_values=["null", "nan"],
+            dtype=self._dtypes(TEST_DTYPES),
+        )
+
+    def iter_sales(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Lee las ventas por partes con el esquema compacto.
+
+        Args:
+            chunksize (int): Número de filas por parte
+
+        Yields:
+            pd.DataFrame: Parte de ventas con la fecha convertida a datetime
+        """
+        try:
+            reader = pd.read_csv(
+                self.data_path / "sales_train.csv",
+                dtype=self._dtypes(SALES_DTYPES),
+                chunksize=chunksize,
+            )
+            for chunk in reader:
+                yield self._parse_sales_dates(chunk)
+        except Exception as e:
+            logger.error(f"Error cargando ventas por partes: {str(e)}")
+            raise
+
+    @timed("preprocess")
     def preprocess_sales(self, sales_df: pd.DataFrame) -> pd.DataFrame:
         """
         Preprocesa el DataFrame de ventas.
 
+        Descarta las filas con precio no positivo, recorta ``item_cnt_day`` a
+        [0, 20] y agrega 'month', 'year' e 'item_cnt_log' sin copiar el frame
+        completo: cada columna de ``sales_df`` pasa al resultado (compactada si
+        hay filas descartadas) y se quita de ``sales_df``, que queda sin
+        columnas. Así en memoria conviven el resto de la entrada y una sola
+        columna nueva, no dos frames.
+
         Args:
-            sales_df (pd.DataFrame): DataFrame de ventas crudo
+            sales_df (pd.DataFrame): DataFrame de ventas crudo (se consume)
 
         Returns:
-            pd.DataFrame: DataFrame de ventas procesado
+            pd.DataFrame: DataFrame de ventas procesado, con índice 0..n-1
         """
         try:
             logger.info("Preprocesando datos de ventas...")
 
             # Agregar información temporal
-            sales_df["date"] = pd.to_datetime(
-                sales_df["date"], format="%d.%m.%Y"
-            )  # Corregido el formato
-            sales_df["month"] = sales_df["date"].dt.month
-            sales_df["year"] = sales_df["date"].dt.year
+            if not pd.api.types.is_datetime64_any_dtype(sales_df["date"]):
+                sales_df = self._parse_sales_dates(sales_df)
+            if self.n_jobs > 1:
+                return self._preprocess_sales_parallel(sales_df)
 
-            # Limpiar valores extremos
-            sales_df["item_cnt_day"] = sales_df["item_cnt_day"].clip(0, 20)
-            sales_df = sales_df[sales_df["item_price"] > 0]
+            # Filas a conservar (precio positivo), evaluado una sola vez
+            keep = np.greater(sales_df["item_price"].to_numpy(), 0)
+            n = int(np.count_nonzero(keep))
+            columns, allocated = self._take_columns(sales_df, keep, n)
 
-            # Agregar ventas logarítmicas
-            sales_df["item_cnt_log"] = np.log1p(sales_df["item_cnt_day"])
+            # Recorte, log1p, mes y año en una pasada por bloques de filas,
+            # escribiendo directo en los arreglos de salida
+            counts_dtype = columns["item_cnt_day"].dtype
+            counts = np.asarray(columns["item_cnt_day"])
+            if n < len(keep) and counts.flags.writeable:
+                # Columna ya compactada (propia): se recorta en su lugar
+                clipped = counts
+            else:
+                clipped = np.empty_like(counts)
+                allocated.append(clipped.nbytes)
+            log_counts = np.empty(n, dtype=np.log1p(counts[:0]).dtype)
+            month = np.empty(n, dtype=np.int8)
+            year = np.empty(n, dtype=np.int16)
+            allocated += [log_counts.nbytes, month.nbytes, year.nbytes]
 
-            return sales_df
+            dates = np.asarray(columns["date"])
+            if n:
+                first_day, month_of, year_of = self._calendar(dates)
+            for start in range(0, n, PREPROCESS_BLOCK_ROWS):
+                block = slice(start, start + PREPROCESS_BLOCK_ROWS)
+                day = dates[block].astype("datetime64[D]").view(np.int64)
+                day -= first_day
+                np.take(month_of, day, out=month[block], mode="clip")
+                np.take(year_of, day, out=year[block], mode="clip")
+                np.clip(counts[block], 0, 20, out=clipped[block])
+                np.log1p(clipped[block], out=log_counts[block])
+
+            columns["month"] = month
+            columns["year"] = year
+            columns["item_cnt_day"] = self._backend_array(clipped, counts_dtype)
+            columns["item_cnt_log"] = self._backend_array(log_counts, counts_dtype)
+            self._report_allocations(allocated)
+            return pd.DataFrame(columns, index=pd.RangeIndex(n), copy=False)
 
         except Exception as e:
             logger.error(f"Error en preprocesamiento: {str(e)}")
             raise
 
+    @staticmethod
+    def _take_columns(sales_df: pd.DataFrame, keep: np.ndarray, n: int) -> Tuple[dict, list]:
+        """
+        Saca las columnas de ``sales_df``, compactándolas con ``keep``.
+
+        Si no se descarta ninguna fila las columnas pasan sin copiarse. Cada
+        columna se quita de ``sales_df`` antes de compactar la siguiente, de
+        modo que su memoria se libera en cuanto existe la versión filtrada.
+
+        Args:
+            sales_df (pd.DataFrame): Ventas; queda sin columnas
+            keep (np.ndarray): Máscara booleana de filas a conservar
+            n (int): Número de filas conservadas
+
+        Returns:
+            tuple: (columns, allocated) con los arreglos por nombre, en el
+                orden de ``sales_df``, y los bytes de cada arreglo reservado
+        """
+        dropped = len(keep) - n
+        allocated = [keep.nbytes]
+        columns = {}
+        for name in list(sales_df.columns):
+            values = sales_df.pop(name).array
+            if dropped:
+                values = values[keep]
+                allocated.append(values.nbytes)
+            columns[name] = values
+        if dropped:
+            logger.info(f"{dropped:,} filas con precio no positivo descartadas")
+        return columns, allocated
+
+    @staticmethod
+    def _backend_array(values: np.ndarray, dtype):
+        """Envuelve ``values`` como Arrow si la columna de origen lo era (NaN -> nulo)."""
+        if isinstance(dtype, pd.ArrowDtype):
+            import pyarrow as pa
+
+            return pd.arrays.ArrowExtensionArray(pa.array(values, from_pandas=True))
+        return values
+
+    @staticmethod
+    def _calendar(dates: np.ndarray) -> tuple:
+        """
+        Mes y año de cada día entre la primera y la última fecha.
+
+        Returns:
+            tuple: (first_day, month_of, year_of) con el primer día (en días
+                desde 1970) y tablas int8/int16 indexadas por días desde él
+        """
+        first_day = dates.min().astype("datetime64[D]")
+        days = pd.DatetimeIndex(np.arange(first_day, dates.max().astype("datetime64[D]") + 1))
+        return (
+            first_day.astype(np.int64),
+            days.month.to_numpy(dtype=np.int8),
+            days.year.to_numpy(dtype=np.int16),
+        )
+
+    @staticmethod
+    def _report_allocations(allocated: list):
+        """Registra cuántos arreglos de columna reservó el preprocesamiento."""
+        total_mb = sum(allocated) / 1024**2
+        logger.info(
+            f"Preprocesamiento: {len(allocated)} arreglos reservados ({total_mb:,.1f} MB), "
+            "sin copias del frame"
+        )
+        annotate(allocations=len(allocated), alloc_mb=round(total_mb, 1))
+
+    def _preprocess_sales_parallel(self, sales_df: pd.DataFrame) -> pd.DataFrame:
+        """Versión de ``preprocess_sales`` repartida por tienda entre procesos."""
+        counts_dtype = sales_df["item_cnt_day"].dtype
+        computed = parallel_preprocess(sales_df, self.n_jobs)
+        keep = computed.pop("keep")
+        n = int(np.count_nonzero(keep))
+        columns, allocated = self._take_columns(sales_df, keep, n)
+        derived = {
+            "month": computed.pop("month"),
+            "year": computed.pop("year"),
+            "item_cnt_day": computed.pop("item_cnt_day_clipped"),
+            "item_cnt_log": computed.pop("item_cnt_log"),
+        }
+        for name, values in derived.items():
+            columns[name] = values if n == len(keep) else values[keep]
+            allocated.append(columns[name].nbytes)
+        for name in ("item_cnt_day", "item_cnt_log"):
+            columns[name] = self._backend_array(columns[name], counts_dtype)
+        self._report_allocations(allocated)
+        return pd.DataFrame(columns, index=pd.RangeIndex(n), copy=False)
+
     def save_processed_data(self, data: pd.DataFrame, filename: str):
         """
         Guarda datos procesados.
 
         Args:
             data (pd.DataFrame): Datos a guardar
-            filename (str): Nombre del archivo
+            filename (str): Nombre de la tabla; la extensión la define el formato
         """
         try:
             # Guardar datos
-            output_path = self.processed_path / filename
-            data.to_csv(output_path, index=False)
+            with stage(f"save:{filename}") as record:
+                record["rows"] = len(data)
+                output_path = self.store.write(data, filename)
             logger.info(f"Datos guardados en: {output_path}")
 
         except Exception as e:
             logger.error(f"Error guardando datos: {str(e)}")
             raise
 
-    def process_all(self):
+    def process_all(self, chunksize: Optional[int] = None):
         """
         Ejecuta el pipeline completo de procesamiento.
+
+        Args:
+            chunksize (int, optional): Si se indica, las ventas se leen,
+                preprocesan y guardan por partes de ``chunksize`` filas, de modo
+                que la memoria no depende del tamaño del historial
         """
         try:
+            if chunksize:
+                index = self._process_sales_chunked(chunksize)
+                self.save_processed_data(self.load_items(), "items_processed")
+                self.save_processed_data(
+                    self._encode_sales(self.load_test(), index), "test_processed"
+                )
+                self._save_pair_index(index)
+                logger.info("✅ Procesamiento completo exitoso!")
+                return
+
+            if self.n_readers > 1:
+                self._process_all_concurrent()
+                logger.info("✅ Procesamiento completo exitoso!")
+                return
+
             # 1. Cargar datos
             sales_df, items_df, test_df = self.load_data()
 
-            # 2. Preprocesar ventas
+            # 2. Preprocesar ventas y codificar pares shop/item (una sola vez)
             sales_processed = self.preprocess_sales(sales_df)
+            index = PairIndex()
+            self._encode_sales(sales_processed, index)
+            self._encode_sales(test_df, index)
 
             # 3. Guardar datos procesados
-            self.save_processed_data(sales_processed, "sales_processed.csv")
-            self.save_processed_data(items_df, "items_processed.csv")
-            self.save_processed_data(test_df, "test_processed.csv")
+            self.save_processed_data(sales_processed, "sales_processed")
+            self.save_processed_data(items_df, "items_processed")
+            self.save_processed_data(test_df, "test_processed")
+            self._save_pair_index(index)
 
             logger.info("✅ Procesamiento completo exitoso!")
 
         except Exception as e:
             logger.error(f"❌ Error en procesamiento: {str(e)}")
             raise
+
+    def _process_all_concurrent(self):
+        """
+        Pipeline de ``process_all`` con lectores concurrentes.
+
+        Los tres archivos se empiezan a leer a la vez y ``preprocess_sales``
+        arranca en cuanto llegan las ventas, mientras items y test siguen
+        cargando en el pool.
+        """
+        with ThreadPoolExecutor(max_workers=self.n_readers) as pool:
+            futures = submit_all(pool, self._loaders())
+
+            # 1. Ventas: esperar solo a este archivo
+            with stage("load:sales"):
+                sales_df = futures["sales"].result()
+
+            # 2. Preprocesar y guardar ventas (items y test siguen cargando)
+            sales_processed = self.preprocess_sales(sales_df)
+            del sales_df
+            index = PairIndex()
+            self._encode_sales(sales_processed, index)
+            self.save_processed_data(sales_processed, "sales_processed")
+
+            # 3. Items y test, ya cargados o por terminar
+            with stage("load:items_test"):
+                items_df = futures["items"].result()
+                test_df = futures["test"].result()
+            self.save_processed_data(items_df, "items_processed")
+            self.save_processed_data(self._encode_sales(test_df, index), "test_processed")
+            self._save_pair_index(index)
+
+    def append_sales(self, raw_path: Path) -> pd.DataFrame:
+        """
+        Preprocesa ventas nuevas y las agrega a ``sales_processed``.
+
+        Args:
+            raw_path (Path): CSV con el mismo esquema que ``sales_train.csv``
+                y fechas posteriores al historial ya procesado
+
+        Returns:
+            pd.DataFrame: Filas nuevas preprocesadas
+        """
+        try:
+            new_sales = self._parse_sales_dates(
+                pd.read_csv(raw_path, dtype=self._dtypes(SALES_DTYPES))
+            )
+            new_processed = self.preprocess_sales(new_sales)
+            index = PairIndex.load(self.processed_path / PAIR_INDEX_FILE)
+            if index is not None:
+                # Los pares nuevos reciben códigos al final del vocabulario
+                self._encode_sales(new_processed, index)
+                self._save_pair_index(index)
+            output_path = self.store.append(new_processed, "sales_processed")
+            logger.info(f"{len(new_processed):,} filas agregadas a: {output_path}")
+            return new_processed
+        except Exception as e:
+            logger.error(f"Error agregando ventas: {str(e)}")
+            raise
+
+    def _process_sales_chunked(self, chunksize: int) -> PairIndex:
+        """
+        Preprocesa y guarda las ventas parte por parte.
+
+        Args:
+            chunksize (int): Número de filas por parte
+
+        Returns:
+            PairIndex: Vocabulario de pares de las ventas
+        """
+        logger.info(f"Procesando ventas por partes de {chunksize:,} filas...")
+        index = PairIndex()
+        chunks = (
+            self._encode_sales(self.preprocess_sales(chunk), index)
+            for chunk in self.iter_sales(chunksize)
+        )
+        output_path = self.store.write_chunks(chunks, "sales_processed")
+        logger.info(f"Datos guardados en: {output_path}")
+        return index
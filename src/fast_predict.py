@@ -0,0 +1,323 @@
+"""
+Predicción rápida sin el wrapper de sklearn.
+
+``LGBMRegressor.predict`` valida la entrada y convierte el DataFrame en cada
+llamada; con lotes pequeños ese costo domina la latencia. ``FastPredictor``
+ordena las columnas una vez, pasa un arreglo float32 contiguo directamente al
+modelo y aplica el post-proceso (``expm1`` y recorte a [0, 20]).
+
+Backends:
+    booster: ``lightgbm.Booster.predict`` nativo, con número de hilos configurable
+    numpy: Ensamble compilado a arreglos planos y evaluado de forma vectorizada
+        sobre todos los árboles a la vez (sin llamadas a LightGBM)
+
+El módulo solo importa NumPy: un ensamble compilado y guardado (ver
+``src.bundle``) se evalúa sin cargar LightGBM, pandas ni joblib.
+
+Clases:
+    CompiledEnsemble: Árboles de un Booster como arreglos de NumPy
+    FastPredictor: Predictor de conteos sobre arreglos contiguos
+"""
+
+from pathlib import Path
+from typing import List
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("booster", "numpy")
+
+# Objetivos cuya predicción es la suma cruda de las hojas
+_IDENTITY_OBJECTIVES = ("regression", "regression_l1", "huber", "fair", "quantile", "mape")
+
+# Umbral de cero de LightGBM (kZeroThreshold)
+_ZERO_THRESHOLD = 1e-35
+
+# Tipos de valor faltante por nodo
+_MISSING_NONE, _MISSING_ZERO, _MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {"None": _MISSING_NONE, "Zero": _MISSING_ZERO, "NaN": _MISSING_NAN}
+
+# Celdas (filas x árboles) evaluadas por bloque en el backend numpy
+_BLOCK_CELLS = 4_000_000
+
+# Arreglos por nodo de ``CompiledEnsemble`` (atributos ``_<nombre>``)
+_ENSEMBLE_ARRAYS = ("feature", "threshold", "child", "default_left", "missing", "value")
+
+
+def to_counts(raw: np.ndarray) -> np.ndarray:
+    """Convierte predicciones en escala log1p a conteos en [0, 20]."""
+    return np.clip(np.expm1(raw), 0, 20)
+
+
+class CompiledEnsemble:
+    """
+    Ensamble de árboles de LightGBM como arreglos planos.
+
+    Todos los nodos de todos los árboles comparten arreglos. Los hijos de cada
+    nodo ocupan posiciones consecutivas (el derecho es ``child + 1``) y las
+    hojas apuntan a sí mismas con umbral infinito, de modo que un nivel del
+    recorrido es ``node = child[node] + (x > threshold[node])`` para todas las
+    filas y árboles a la vez. Los árboles se ordenan por profundidad y en cada
+    nivel solo se actualizan los que aún no llegan a sus hojas.
+
+    Attributes:
+        roots (np.ndarray): Nodo raíz de cada árbol (ordenados por profundidad)
+        depth (int): Profundidad máxima del ensamble
+    """
+
+    def __init__(self, booster):
+        """
+        Compila el ensamble desde ``booster.dump_model()``.
+
+        Args:
+            booster (lightgbm.Booster): Modelo entrenado
+        """
+        dump = booster.dump_model()
+        objective = dump.get("objective", "regression").split()[0]
+        if objective not in _IDENTITY_OBJECTIVES:
+            raise ValueError(f"Objetivo no soportado por el backend numpy: {objective}")
+
+        feature, threshold, child = [], [], []
+        default_left, missing, value = [], [], []
+
+        def allocate() -> int:
+            feature.append(0)
+            threshold.append(np.inf)
+            child.append(len(child))
+            default_left.append(True)
+            missing.append(_MISSING_NONE)
+            value.append(0.0)
+            return len(child) - 1
+
+        roots, depths = [], []
+        for tree in dump["tree_info"]:
+            root = allocate()
+            depth = 0
+            stack = [(tree["tree_structure"], root, 0)]
+            while stack:
+                node, index, level = stack.pop()
+                if "leaf_value" in node:
+                    value[index] = node["leaf_value"]
+                    depth = max(depth, level)
+                    continue
+                if node.get("decision_type", "<=") != "<=":
+                    raise ValueError("Splits categóricos no soportados por el backend numpy")
+                feature[index] = node["split_feature"]
+                threshold[index] = node["threshold"]
+                default_left[index] = node["default_left"]
+                missing[index] = _MISSING_TYPES[node["missing_type"]]
+                left = allocate()
+                allocate()
+                child[index] = left
+                stack.append((node["left_child"], left, level + 1))
+                stack.append((node["right_child"], left + 1, level + 1))
+            roots.append(root)
+            depths.append(depth)
+
+        order = np.argsort(depths, kind="stable")[::-1]
+        depths = np.asarray(depths)[order]
+        self.roots = np.asarray(roots, dtype=np.int64)[order]
+        self.depth = int(depths[0]) if len(depths) else 0
+        # Árboles activos (aún sin llegar a la hoja) en cada nivel
+        self._active = [int((depths > level).sum()) for level in range(self.depth)]
+        self._feature = np.asarray(feature, dtype=np.int64)
+        self._threshold = np.asarray(threshold, dtype=np.float64)
+        self._child = np.asarray(child, dtype=np.int64)
+        self._default_left = np.asarray(default_left, dtype=bool)
+        self._missing = np.asarray(missing, dtype=np.int8)
+        self._value = np.asarray(value, dtype=np.float64)
+        self._has_zero_missing = bool((self._missing == _MISSING_ZERO).any())
+
+    def save(self, directory: Path):
+        """
+        Guarda los arreglos del ensamble como ``.npy``.
+
+        Args:
+            directory (Path): Directorio de destino
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _ENSEMBLE_ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, f"_{name}"))
+        np.save(directory / "roots.npy", self.roots)
+        with open(directory / "ensemble.json", "w") as f:
+            json.dump({"depth": self.depth, "active": self._active}, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "CompiledEnsemble":
+        """
+        Abre un ensamble guardado con ``save`` sin pasar por LightGBM.
+
+        Args:
+            directory (Path): Directorio del ensamble
+            mmap (bool): Abrir los arreglos en modo memory-mapped
+
+        Returns:
+            CompiledEnsemble: Ensamble listo para ``predict``
+        """
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        with open(directory / "ensemble.json") as f:
+            meta = json.load(f)
+        ensemble = cls.__new__(cls)
+        for name in _ENSEMBLE_ARRAYS:
+            setattr(ensemble, f"_{name}", np.load(directory / f"{name}.npy", mmap_mode=mode))
+        ensemble.roots = np.load(directory / "roots.npy", mmap_mode=mode)
+        ensemble.depth = meta["depth"]
+        ensemble._active = meta["active"]
+        ensemble._has_zero_missing = bool((ensemble._missing == _MISSING_ZERO).any())
+        return ensemble
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Suma de las hojas de todos los árboles para cada fila.
+
+        Args:
+            X (np.ndarray): Matriz (n_rows, n_features)
+
+        Returns:
+            np.ndarray: Predicción cruda por fila (float64)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        out = np.empty(len(X), dtype=np.float64)
+        block = max(1, _BLOCK_CELLS // max(len(self.roots), 1))
+        for start in range(0, len(X), block):
+            out[start:start + block] = self._predict_block(X[start:start + block])
+        return out
+
+    def _go_right(self, x: np.ndarray, node: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+        """Decisión con el manejo de faltantes de LightGBM (NaN y cero)."""
+        missing = self._missing.take(node)
+        nan = np.isnan(x)
+        # Sin tipo NaN, LightGBM trata NaN como cero
+        x = np.where(nan & (missing != _MISSING_NAN), 0.0, x)
+        is_missing = ((missing == _MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD)) | (
+            (missing == _MISSING_NAN) & nan
+        )
+        return np.where(is_missing, ~self._default_left.take(node), x > threshold)
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        """Evalúa un bloque de filas contra todos los árboles a la vez."""
+        flat = X.ravel()
+        offsets = np.arange(len(X)) * X.shape[1]
+        general = self._has_zero_missing or bool(np.isnan(flat).any())
+        # Nodo actual de cada (árbol, fila)
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+        for active in self._active:
+            current = node[:active]
+            x = flat.take(self._feature.take(current) + offsets)
+            threshold = self._threshold.take(current)
+            if general:
+                go_right = self._go_right(x, current, threshold)
+            else:
+                go_right = x > threshold
+            node[:active] = self._child.take(current) + go_right
+        return self._value.take(node).sum(axis=0)
+
+
+class FastPredictor:
+    """
+    Predictor de conteos para un ``LGBMRegressor`` entrenado.
+
+    Attributes:
+        feature_names (list): Columnas en el orden del modelo (``Column_i`` si
+            se entrenó sobre un arreglo; entonces el orden es posicional)
+        backend (str): "booster" o "numpy"
+        num_threads (int): Hilos de LightGBM (0 = valor por defecto)
+    """
+
+    def __init__(self, model, backend: str = "booster", num_threads: int = 0):
+        """
+        Prepara el predictor.
+
+        Args:
+            model: ``LGBMRegressor`` o ``lightgbm.Booster`` entrenado
+            backend (str): "booster" o "numpy"
+            num_threads (int): Hilos para el backend booster
+        """
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Backend no soportado: {backend}. Opciones: {', '.join(BACKENDS)}"
+            )
+        self.booster = getattr(model, "booster_", model)
+        self.feature_names = self.booster.feature_name()
+        # Entrenado sobre un arreglo: LightGBM genera Column_i y el orden es posicional
+        self._positional = self.feature_names == [
+            f"Column_{i}" for i in range(len(self.feature_names))
+        ]
+        self.backend = backend
+        self.num_threads = num_threads
+        self._ensemble = CompiledEnsemble(self.booster) if backend == "numpy" else None
+
+    @classmethod
+    def from_path(
+        cls, model_path: Path, backend: str = "booster", num_threads: int = 0
+    ) -> "FastPredictor":
+        """Carga ``model.joblib`` y construye el predictor."""
+        import joblib
+
+        return cls(joblib.load(model_path), backend, num_threads)
+
+    @classmethod
+    def from_ensemble(
+        cls, ensemble: CompiledEnsemble, feature_names: List[str]
+    ) -> "FastPredictor":
+        """
+        Predictor del backend numpy sobre un ensamble ya compilado (sin Booster).
+
+        Args:
+            ensemble (CompiledEnsemble): Ensamble compilado o cargado
+            feature_names (list): Columnas en el orden del modelo
+
+        Returns:
+            FastPredictor: Predictor con ``booster`` en None
+        """
+        predictor = cls.__new__(cls)
+        predictor.booster = None
+        predictor.feature_names = list(feature_names)
+        predictor._positional = predictor.feature_names == [
+            f"Column_{i}" for i in range(len(predictor.feature_names))
+        ]
+        predictor.backend = "numpy"
+        predictor.num_threads = 0
+        predictor._ensemble = ensemble
+        return predictor
+
+    def to_array(self, X) -> np.ndarray:
+        """Matriz float32 contigua con las columnas en el orden del modelo."""
+        if hasattr(X, "columns"):
+            if not self._positional:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float32)
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def predict_raw(self, X) -> np.ndarray:
+        """
+        Predicción en la escala del modelo (log1p).
+
+        Args:
+            X: Features como DataFrame o arreglo (n_rows, n_features)
+
+        Returns:
+            np.ndarray: Predicción cruda
+        """
+        X = self.to_array(X)
+        if self._ensemble is not None:
+            return self._ensemble.predict(X)
+        params = {"num_threads": self.num_threads} if self.num_threads else {}
+        return self.booster.predict(X, **params)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predice conteos ``item_cnt_month``.
+
+        Args:
+            X: Features como DataFrame o arreglo (n_rows, n_features)
+
+        Returns:
+            np.ndarray: ``expm1`` de la predicción, recortado a [0, 20]
+        """
+        return to_counts(self.predict_raw(X))
@@ -5,14 +5,113 @@ Este módulo contiene las funciones y clases necesarias para transformar
 los datos procesados en features útiles para el modelo.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import json
 import logging
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-import joblib
+
+from src.agg_cube import AggregationCube, month_periods
+from src.feature_matrix import X_FILE, Y_FILE, META_FILE, scale_to_array, write_feature_matrix
+from src.feature_registry import REGISTRY, ServeContext, TrainContext
+from src.group_engine import GroupSegments
+from src.parallel import parallel_window_features
+from src.profiling import stage, timed
+from src.incremental import IncrementalFeatureState
+from src.stage_cache import PROJECT_ROOT, file_fingerprint, source_fingerprint
+from src.joins import dense_lookup, fillna, join_columns
+from src.keys import PAIR_CODE, PAIR_INDEX_FILE, PairIndex
+from src.loaders import submit_all
+from src.monthly import aggregate_monthly, monthly_stats, monthly_windows
+from src.stats_index import HistoricalStats, PAIR_STATS, grouped_pair_stats
+from src.storage import FrameStore
 
 logger = logging.getLogger(__name__)
 
+# Granularidad de las filas de entrenamiento -> columna de conteo
+GRANULARITIES = {"daily": "item_cnt_day", "monthly": "item_cnt_month"}
+
+# Ventanas por shop/item (en paralelo se calculan las tres juntas)
+WINDOW_FEATURES = ("sales_ema_2m", "trend_2m", "sales_volatility")
+
+
+class _WindowColumns:
+    """
+    Ventanas por shop/item de un frame, calculadas al primer acceso.
+
+    Cada ventana se calcula una sola vez y el índice por shop/item solo se
+    construye si alguna ventana (o el llamador) lo pide.
+
+    Attributes:
+        kind (str): "daily" (motor del ingeniero), "parallel" (las tres
+            ventanas en un pool de procesos) o "monthly" (grilla mensual,
+            rezagadas un mes)
+    """
+
+    def __init__(
+        self,
+        engineer: "FeatureEngineer",
+        df: pd.DataFrame,
+        segments: Optional[GroupSegments] = None,
+        kind: str = "daily",
+    ):
+        self.engineer = engineer
+        self.df = df
+        self.kind = kind
+        self._segments = segments
+        self._values = {}
+
+    @property
+    def segments(self) -> GroupSegments:
+        """Índice por shop/item de ``df`` (se construye al primer uso)."""
+        if self._segments is None:
+            self._segments = self.engineer._segments(self.df)
+        return self._segments
+
+    def __getitem__(self, name: str):
+        if name not in self._values:
+            self._values.update(self._compute(name))
+        return self._values[name]
+
+    def _compute(self, name: str) -> dict:
+        """Valores de la ventana ``name`` (o de las tres en paralelo)."""
+        df = self.df
+        if self.kind == "monthly":
+            values = monthly_windows(df, self.segments, [name])[name]
+            return {name: fillna(self.segments.shift(values))}
+
+        if self.kind == "parallel":
+            features = parallel_window_features(df, self.engineer.n_jobs)
+            return {
+                column: values if column == "sales_ema_2m" else fillna(values)
+                for column, values in features.items()
+            }
+
+        if self.engineer._use_numpy_engine(df):
+            windows = {
+                "sales_ema_2m": lambda: self.segments.ewm_mean(df["item_cnt_day"], span=2),
+                "trend_2m": lambda: fillna(
+                    self.segments.rolling_mean(df["item_price"], window=2)
+                ),
+                "sales_volatility": lambda: fillna(
+                    self.segments.rolling_std(df["item_cnt_day"], window=3)
+                ),
+            }
+            return {name: windows[name]()}
+
+        group_cols = [PAIR_CODE] if PAIR_CODE in df.columns else ["shop_id", "item_id"]
+        windows = {
+            "sales_ema_2m": lambda: df.groupby(group_cols)["item_cnt_day"]
+            .transform(lambda x: x.ewm(span=2, adjust=False).mean()),
+            "trend_2m": lambda: df.groupby(group_cols)["item_price"]
+            .transform(lambda x: x.rolling(2, min_periods=1).mean()),
+            "sales_volatility": lambda: df.groupby(group_cols)["item_cnt_day"]
+            .transform(lambda x: x.rolling(3, min_periods=1).std()),
+        }
+        return {name: windows[name]().fillna(0)}
+
 
 class FeatureEngineer:
     """
@@ -21,94 +120,348 @@ class FeatureEngineer:
     Attributes:
         data_path (Path): Ruta base para los datos
         scaler (StandardScaler): Scaler para normalizar features
+        engine (str): Motor de ventanas por grupo ("numpy" o "pandas")
+        store (FrameStore): Almacén de las tablas procesadas
+        n_jobs (int): Procesos para las features de ventana
+        granularity (str): "daily" (una fila por venta) o "monthly" (una fila
+            por mes/tienda/item, ver ``src.monthly``)
+        count_column (str): Columna de conteo según la granularidad
+        n_readers (int): Hilos de lectura de las tablas procesadas
+        cube (AggregationCube): Cubo categoría x mes del último
+            cálculo de entrenamiento (None si las features pedidas no lo usan)
+        features (list): Features que se calculan, en el orden de columnas
+            del modelo (subconjunto de ``REGISTRY``)
     """
 
-    def __init__(self, data_path: Path):
+    def __init__(
+        self,
+        data_path: Path,
+        engine: str = "numpy",
+        storage_format: str = "parquet",
+        n_jobs: int = 1,
+        granularity: str = "daily",
+        n_readers: int = 1,
+        dtype_backend: str = "numpy",
+        features: Optional[Sequence[str]] = None,
+    ):
         """
         Inicializa el ingeniero de features.
 
         Args:
             data_path (Path): Ruta base donde se encuentran los datos
+            engine (str): "numpy" usa el motor vectorizado de ``group_engine``;
+                "pandas" conserva el camino original con ``transform(lambda)``
+            storage_format (str): Formato preferido de ``processed/``; si no
+                existe se lee el formato disponible
+            n_jobs (int): Procesos para las features de tiempo y precio; con
+                más de uno las tiendas se reparten en un pool de procesos
+                (solo en modo diario)
+            granularity (str): "daily" o "monthly"
+            n_readers (int): Hilos para leer ventas, items y test a la vez
+            dtype_backend (str): "numpy" o "pyarrow" para las tablas leídas
+            features (Sequence[str], optional): Subconjunto de features a
+                calcular; solo se evalúan sus dependencias (por defecto todas)
         """
+        if engine not in ("numpy", "pandas"):
+            raise ValueError(f"Motor no soportado: {engine}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(
+                f"Granularidad no soportada: {granularity}. "
+                f"Opciones: {', '.join(GRANULARITIES)}"
+            )
         self.data_path = data_path
         self.prep_path = data_path / "processed"
-        self.scaler = StandardScaler()
+        self._scaler = None
+        self.engine = engine
+        self.store = FrameStore(self.prep_path, storage_format, dtype_backend)
+        self.stats_path = self.prep_path / "historical_stats"
+        self.state_path = self.prep_path / "feature_state"
+        self.cube_path = self.prep_path / "agg_cube"
+        self.pair_index_path = self.prep_path / PAIR_INDEX_FILE
+        self.n_jobs = n_jobs
+        self.granularity = granularity
+        self.count_column = GRANULARITIES[granularity]
+        self.n_readers = n_readers
+        self.cube = None
+        self.features = REGISTRY.select(features)
+
+    @property
+    def scaler(self):
+        """``StandardScaler`` de las features; sklearn se importa al primer uso."""
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+
+            self._scaler = StandardScaler()
+        return self._scaler
 
     def _get_feature_columns(self) -> list:
         """Retorna la lista de columnas de features."""
-        return [
-            "sales_ema_2m",
-            "hierarchical_ma_interaction",
-            "trend_2m",
-            "sales_volatility",
-            "category_avg",
-            "trend_volatility_ratio",
-        ]
+        return list(self.features)
+
+    def requires(self, name: str) -> bool:
+        """Indica si las features pedidas necesitan el nodo ``name`` en entrenamiento."""
+        return name in REGISTRY.plan(self.features, "train")
+
+    def match_columns(self, columns: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Ajusta las features a las columnas de un modelo entrenado.
+
+        Args:
+            columns (Sequence[str], optional): Columnas del modelo; por defecto
+                las de la última matriz de entrenamiento guardada, si existe
+
+        Returns:
+            list: Features en uso
+
+        Raises:
+            ValueError: Si alguna columna no es una feature registrada o el
+                orden no es el de ``REGISTRY``
+        """
+        if columns is None:
+            meta_path = self.prep_path / META_FILE
+            if not meta_path.exists():
+                return self.features
+            with open(meta_path) as f:
+                columns = json.load(f)["columns"]
+        features = REGISTRY.select(columns)
+        if features != list(columns):
+            raise ValueError(
+                f"Orden de columnas distinto al del registro: {', '.join(columns)}"
+            )
+        self.features = features
+        return features
 
-    def load_processed_data(self) -> tuple:
+    def fingerprint(self, mode: str = "mtime", save_state: bool = False) -> dict:
+        """
+        Entradas que determinan el resultado de ``create_all_features`` (para la caché).
+
+        Args:
+            mode (str): Modo de huella de archivos ("mtime" o "hash")
+            save_state (bool): Si también se guarda el estado incremental
+
+        Returns:
+            dict: Huellas de tablas procesadas, features y código fuente
+        """
+        return {
+            "inputs": {
+                name: file_fingerprint(self.store.resolve(name)[0], mode)
+                for name in ("sales_processed", "items_processed")
+            },
+            "feature_columns": self._get_feature_columns(),
+            "engine": self.engine,
+            "pair_index": file_fingerprint(self.pair_index_path, mode)
+            if self.pair_index_path.exists() else None,
+            "granularity": self.granularity,
+            "save_state": save_state,
+            "source": source_fingerprint([
+                PROJECT_ROOT / "src" / name
+                for name in (
+                    "feature_engineering.py", "group_engine.py", "incremental.py",
+                    "agg_cube.py", "monthly.py", "keys.py", "feature_registry.py",
+                    "stats_index.py", "storage.py", "parallel.py",
+                )
+            ]),
+        }
+
+    def output_files(self, save_state: bool = False) -> dict:
+        """Archivos que produce ``create_all_features`` (nombre -> ruta)."""
+        files = {
+            X_FILE: self.prep_path / X_FILE,
+            Y_FILE: self.prep_path / Y_FILE,
+            META_FILE: self.prep_path / META_FILE,
+            "scaler.joblib": self.prep_path / "scaler.joblib",
+            "historical_stats": self.stats_path,
+        }
+        if self.requires("cube"):
+            files["agg_cube"] = self.cube_path
+        if save_state:
+            files["feature_state"] = self.state_path
+        return files
+
+    @timed("load_processed")
+    def load_processed_data(
+        self, columns: Optional[Dict[str, List[str]]] = None
+    ) -> tuple:
         """
         Carga los datos procesados.
 
+        Args:
+            columns (dict, optional): Columnas a leer por tabla, con llaves
+                "sales", "items" y "test"; las tablas omitidas se leen completas
+
         Returns:
             tuple: (sales_df, items_df, test_df) DataFrames procesados
         """
         try:
             logger.info("Cargando datos procesados...")
-            sales_df = pd.read_csv(self.prep_path / "sales_processed.csv")
-            items_df = pd.read_csv(self.prep_path / "items_processed.csv")
-            test_df = pd.read_csv(self.prep_path / "test_processed.csv")
-
-            return sales_df, items_df, test_df
+            columns = columns or {}
+            tables = {
+                key: (lambda name=name, key=key: self.store.read(name, columns.get(key)))
+                for key, name in (
+                    ("sales", "sales_processed"),
+                    ("items", "items_processed"),
+                    ("test", "test_processed"),
+                )
+            }
+            if self.n_readers <= 1:
+                return tuple(read() for read in tables.values())
+            with ThreadPoolExecutor(max_workers=self.n_readers) as pool:
+                futures = submit_all(pool, tables)
+                return tuple(future.result() for future in futures.values())
 
         except Exception as e:
             logger.error(f"Error cargando datos procesados: {str(e)}")
             raise
 
-    def create_time_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    @timed("build_historical_stats")
+    def save_historical_stats(
+        self,
+        sales_df: pd.DataFrame,
+        items_df: pd.DataFrame,
+        segments: Optional[GroupSegments] = None,
+    ) -> HistoricalStats:
+        """
+        Construye y guarda el índice de estadísticas históricas para inferencia.
+
+        En modo mensual el índice guarda el último valor de las ventanas de
+        cada par (las features del mes siguiente); ``sales_df`` puede ser el
+        historial diario o su agregación mensual.
+
+        Args:
+            sales_df (pd.DataFrame): Ventas procesadas
+            items_df (pd.DataFrame): Catálogo de items
+            segments (GroupSegments, optional): Índice por shop/item de la
+                agregación mensual (solo modo mensual)
+
+        Returns:
+            HistoricalStats: Índice construido
+        """
+        stats = self._build_historical_stats(sales_df, items_df, segments)
+        stats.save(self.stats_path)
+        return stats
+
+    def _build_historical_stats(
+        self,
+        sales_df: pd.DataFrame,
+        items_df: pd.DataFrame,
+        segments: Optional[GroupSegments] = None,
+    ) -> HistoricalStats:
+        """Índice histórico según la granularidad, sin guardarlo."""
+        if self.granularity == "daily":
+            return HistoricalStats.build(sales_df, items_df, self._pair_keys(sales_df))
+        if "item_cnt_month" not in sales_df.columns:
+            sales_df, segments = aggregate_monthly(sales_df), None
+        return monthly_stats(sales_df, items_df, segments)
+
+    def _pair_keys(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Llaves del vocabulario de pares si ``df`` trae 'pair_code'."""
+        if PAIR_CODE not in df.columns:
+            return None
+        index = PairIndex.load(self.pair_index_path)
+        return None if index is None else index.keys
+
+    def _pair_columns(self) -> List[str]:
+        """'pair_code' si las tablas procesadas lo incluyen."""
+        return [PAIR_CODE] if self.pair_index_path.exists() else []
+
+    @staticmethod
+    def _segments(df: pd.DataFrame) -> GroupSegments:
+        """Índice por shop/item; usa 'pair_code' (sin factorizar) si está disponible."""
+        if PAIR_CODE in df.columns:
+            return GroupSegments.from_codes(df[PAIR_CODE])
+        return GroupSegments.from_frame(df, ["shop_id", "item_id"])
+
+    def load_historical_stats(self) -> Optional[HistoricalStats]:
+        """
+        Abre el índice de estadísticas históricas (memory-mapped).
+
+        Returns:
+            HistoricalStats: Índice, o None si no se ha generado
+        """
+        return HistoricalStats.load(self.stats_path)
+
+    def load_aggregation_cube(self) -> Optional[AggregationCube]:
+        """
+        Abre el cubo de agregación guardado por ``create_all_features``.
+
+        Returns:
+            AggregationCube: Cubo, o None si no se ha generado
+        """
+        return AggregationCube.load(self.cube_path)
+
+    def _use_numpy_engine(self, df: pd.DataFrame) -> bool:
+        """Indica si se puede usar el motor vectorizado sobre ``df``."""
+        if self.engine != "numpy":
+            return False
+        # La recursión EWM asume valores sin NaN; si los hay se usa pandas
+        return not df[["item_cnt_day", "item_price"]].isna().any().any()
+
+    @timed()
+    def create_time_features(
+        self, df: pd.DataFrame, segments: Optional[GroupSegments] = None
+    ) -> pd.DataFrame:
         """
         Crea features basadas en tiempo.
 
         Args:
             df (pd.DataFrame): DataFrame con columna 'date'
+            segments (GroupSegments, optional): Índice por (shop_id, item_id)
+                ya construido, para no reordenar los datos en cada método
 
         Returns:
             pd.DataFrame: DataFrame con nuevas features temporales
         """
-        df["date"] = pd.to_datetime(df["date"])
-        group_cols = ["shop_id", "item_id"]
-        
-        df["sales_ema_2m"] = (
-            df.groupby(group_cols)["item_cnt_day"]
-            .transform(lambda x: x.ewm(span=2, adjust=False).mean())
-            .fillna(0)
-        )
+        if "date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["date"]):
+            df["date"] = pd.to_datetime(df["date"])
+        df["sales_ema_2m"] = _WindowColumns(self, df, segments)["sales_ema_2m"]
         return df
 
-    def create_price_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    @timed()
+    def create_price_features(
+        self, df: pd.DataFrame, segments: Optional[GroupSegments] = None
+    ) -> pd.DataFrame:
         """
         Crea features basadas en precio.
 
         Args:
             df (pd.DataFrame): DataFrame con columna 'item_price'
+            segments (GroupSegments, optional): Índice por (shop_id, item_id)
+                ya construido, para no reordenar los datos en cada método
 
         Returns:
             pd.DataFrame: DataFrame con nuevas features de precio
         """
-        group_cols = ["shop_id", "item_id"]
-        
-        df["trend_2m"] = (
-            df.groupby(group_cols)["item_price"]
-            .transform(lambda x: x.rolling(2, min_periods=1).mean())
-            .fillna(0)
-        )
-        
-        df["sales_volatility"] = (
-            df.groupby(group_cols)["item_cnt_day"]
-            .transform(lambda x: x.rolling(3, min_periods=1).std())
-            .fillna(0)
-        )
+        windows = _WindowColumns(self, df, segments)
+        df["trend_2m"] = windows["trend_2m"]
+        df["sales_volatility"] = windows["sales_volatility"]
         return df
 
+    @timed()
+    def create_monthly_features(
+        self, df: pd.DataFrame, segments: Optional[GroupSegments] = None
+    ) -> pd.DataFrame:
+        """
+        Crea las features de tiempo y precio sobre la grilla mensual.
+
+        Son las mismas ventanas que en modo diario, calculadas sobre
+        'item_cnt_month' y rezagadas un mes observado por shop/item, de modo
+        que la fila de un mes no incluye su propio objetivo.
+
+        Args:
+            df (pd.DataFrame): Salida de ``aggregate_monthly``
+            segments (GroupSegments, optional): Índice por (shop_id, item_id)
+
+        Returns:
+            pd.DataFrame: DataFrame con 'sales_ema_2m', 'trend_2m' y
+                'sales_volatility' (0 en el primer mes de cada par)
+        """
+        segments = segments or GroupSegments.from_frame(df, ["shop_id", "item_id"])
+        windows = _WindowColumns(self, df, segments, kind="monthly")
+        for name in WINDOW_FEATURES:
+            df[name] = windows[name]
+        return df
+
+    @timed()
     def create_category_features(
         self, df: pd.DataFrame, items_df: pd.DataFrame, is_train: bool = True
     ) -> pd.DataFrame:
@@ -121,81 +474,359 @@ class FeatureEngineer:
             is_train (bool): Indica si los datos son de entrenamiento
 
         Returns:
-            pd.DataFrame: DataFrame con nuevas features de categoría
+            pd.DataFrame: DataFrame con nuevas features de categoría (se
+                agregan las columnas a ``df``, sin copiar las existentes)
         """
-        # Merge con categorías
-        df = df.merge(
-            items_df[["item_id", "item_category_id"]], on="item_id", how="left"
-        )
-
         if is_train:
-            # Para datos de entrenamiento
-            df["category_avg"] = df.groupby("item_category_id")[
-                "item_cnt_day"
-            ].transform("mean")
+            # Para datos de entrenamiento: cubo tienda x categoría x mes en una pasada
+            values = REGISTRY.evaluate(
+                ["categories", "category_avg"], "train", self._train_context(df, items_df)
+            )
+            self.cube = values["cube"]
+            df["item_category_id"] = values["categories"]
         else:
             # Para datos de test, usar estadísticas históricas
-            category_stats = items_df.groupby("item_category_id").size().reset_index()
-            category_stats.columns = ["item_category_id", "category_count"]
-            df["category_avg"] = (
-                df["item_category_id"]
-                .map(category_stats.set_index("item_category_id")["category_count"])
-                .fillna(0)
+            df["item_category_id"] = self._categories(df, items_df)
+            values = REGISTRY.evaluate(["category_avg"], "serve", ServeContext(
+                None, lambda: self._category_count(df["item_category_id"], items_df)
+            ))
+        df["category_avg"] = values["category_avg"]
+        return df
+
+    @staticmethod
+    def _categories(df: pd.DataFrame, items_df: pd.DataFrame) -> np.ndarray:
+        """Categoría de cada fila (join por arreglo denso item_id -> categoría)."""
+        return dense_lookup(df["item_id"], items_df["item_id"], items_df["item_category_id"])
+
+    @staticmethod
+    def _category_count(categories, items_df: pd.DataFrame) -> np.ndarray:
+        """Items del catálogo en la categoría de cada fila (NaN si no existe)."""
+        values, counts = np.unique(items_df["item_category_id"], return_counts=True)
+        return dense_lookup(categories, values, counts)
+
+    def _train_context(
+        self,
+        df: pd.DataFrame,
+        items_df: pd.DataFrame,
+        windows: Optional[_WindowColumns] = None,
+    ) -> TrainContext:
+        """Intermedios de entrenamiento del registro sobre ``df``."""
+        def cube(categories):
+            return AggregationCube.build(
+                categories, month_periods(df), {self.count_column: df[self.count_column]}
             )
 
+        return TrainContext(
+            windows=lambda: windows if windows is not None else _WindowColumns(self, df),
+            categories=lambda: self._categories(df, items_df),
+            cube=cube,
+            count_column=self.count_column,
+        )
+
+    def create_derived_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Crea los ratios e interacciones pedidos sobre las features base.
+
+        Args:
+            df (pd.DataFrame): DataFrame con las features base de las que
+                dependen (p. ej. 'sales_ema_2m', 'trend_2m',
+                'sales_volatility' y 'category_avg')
+
+        Returns:
+            pd.DataFrame: DataFrame con las features derivadas (por defecto
+                'trend_volatility_ratio' y 'hierarchical_ma_interaction')
+        """
+        derived = REGISTRY.derived_features(self.features)
+        values = REGISTRY.evaluate(derived, "train", None, {
+            name: df[name] for name in REGISTRY.base_features(self.features)
+        })
+        for name in derived:
+            df[name] = values[name]
         return df
 
-    def create_all_features(self) -> tuple:
+    def _load_training_frame(self, extra_columns: Sequence[str] = ()) -> tuple:
+        """Carga ventas e items con las columnas que leen las features pedidas."""
+        # Índice histórico y objetivo; el resto según el plan de features
+        columns = ["shop_id", "item_id", "item_price", "item_cnt_day", "item_cnt_log"]
+        if self.granularity == "monthly":
+            columns += ["date_block_num", "month", "year"]
+        for column in (
+            *REGISTRY.sales_columns(self.features), *self._pair_columns(), *extra_columns
+        ):
+            if column not in columns:
+                columns.append(column)
+        sales_df, items_df, _ = self.load_processed_data(columns={
+            "sales": columns,
+            "items": ["item_id", "item_category_id"],
+        })
+        return sales_df, items_df
+
+    def _build_base_features(
+        self, sales_df: pd.DataFrame, items_df: pd.DataFrame
+    ) -> tuple:
+        """
+        Crea las features base pedidas (ventanas y categoría) y 'item_category_id'.
+
+        Solo se evalúan los nodos del registro de los que dependen
+        ``self.features``; las ventanas comparten un solo índice por shop/item.
+
+        Returns:
+            tuple: (df, windows) DataFrame con features y sus ventanas
+                (``windows.segments`` es el índice por shop/item)
+        """
+        if self.granularity == "monthly":
+            df, kind = aggregate_monthly(sales_df), "monthly"
+        elif self.n_jobs > 1 and self._use_numpy_engine(sales_df):
+            df, kind = sales_df, "parallel"
+        else:
+            df, kind = sales_df, "daily"
+
+        windows = _WindowColumns(self, df, kind=kind)
+        base = REGISTRY.base_features(self.features)
+        values = REGISTRY.evaluate(
+            ["categories", *base], "train", self._train_context(df, items_df, windows)
+        )
+        self.cube = values.get("cube")
+        df["item_category_id"] = values["categories"]
+        for name in base:
+            df[name] = values[name]
+        return df, windows
+
+    @timed()
+    def create_base_features(self, extra_columns: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        Crea las features base pedidas de todo el historial, sin ratios ni escalado.
+
+        Args:
+            extra_columns (Sequence[str]): Columnas adicionales de ventas a
+                conservar (por ejemplo 'date_block_num'); en modo mensual solo
+                se conservan las columnas de la agregación
+
+        Returns:
+            pd.DataFrame: Features base, 'item_cnt_log' y las columnas extra
+        """
+        sales_df, items_df = self._load_training_frame(extra_columns)
+        df, _ = self._build_base_features(sales_df, items_df)
+        return df
+
+    @timed()
+    def create_window_features_parallel(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Crea las features de tiempo y precio repartiendo tiendas entre procesos.
+
+        Produce los mismos valores que ``create_time_features`` y
+        ``create_price_features``.
+
+        Args:
+            df (pd.DataFrame): Ventas con 'date', 'shop_id', 'item_id',
+                'item_cnt_day' e 'item_price'
+
+        Returns:
+            pd.DataFrame: DataFrame con las features de ventana
+        """
+        if "date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["date"]):
+            df["date"] = pd.to_datetime(df["date"])
+        windows = _WindowColumns(self, df, kind="parallel")
+        for name in WINDOW_FEATURES:
+            df[name] = windows[name]
+        return df
+
+    def _finalize_training_features(self, df: pd.DataFrame, save: bool = True) -> tuple:
+        """
+        Crea ratios e interacciones, escala y guarda la matriz de entrenamiento.
+
+        Args:
+            df (pd.DataFrame): Features base con 'category_avg' e 'item_cnt_log'
+            save (bool): Guardar scaler y datos preparados
+
+        Returns:
+            tuple: (X_scaled, y) con X_scaled float32 (memory-mapped si ``save``)
+        """
+        # 1. Crear features finales
+        df = self.create_derived_features(df)
+
+        # 2. Seleccionar features finales
+        X = df[self.features]
+        y = df["item_cnt_log"]
+
+        # 3. Ajustar scaler
+        with stage("scale") as record:
+            record["rows"] = len(X)
+            self.scaler.fit(X)
+            if not save:
+                X_scaled = np.empty(X.shape, dtype=np.float32)
+                return scale_to_array(X, self.scaler, X_scaled), y
+
+            # 4. Guardar scaler
+            import joblib
+
+            joblib.dump(self.scaler, self.prep_path / "scaler.joblib")
+
+            # 5. Escalar y guardar datos preparados (float32 memory-mappable)
+            return write_feature_matrix(self.prep_path, X, y, self.scaler)
+
+    @timed()
+    def create_all_features(self, save_state: bool = False) -> tuple:
         """
         Crea todas las features y prepara datos para entrenamiento.
 
+        Args:
+            save_state (bool): Guardar el estado para ``update_features``
+
         Returns:
             tuple: (X, y) Features y target para entrenamiento
         """
         try:
-            # 1. Cargar datos
-            sales_df, items_df, _ = self.load_processed_data()
+            if save_state and self.granularity != "daily":
+                raise ValueError("El estado incremental solo está disponible en modo diario")
+            if save_state and self.features != REGISTRY.features():
+                raise ValueError("El estado incremental requiere todas las features")
+
+            # 1. Cargar datos (solo las columnas que leen las features pedidas)
+            sales_df, items_df = self._load_training_frame()
 
             # 2. Crear features
-            df = sales_df.pipe(self.create_time_features)
-            df = self.create_price_features(df)
-            df = self.create_category_features(df, items_df)
+            df, windows = self._build_base_features(sales_df, items_df)
 
-            # 3. Crear features finales
-            df["trend_volatility_ratio"] = df["trend_2m"] / df["sales_volatility"].clip(
-                lower=0.001
-            )
-            df["hierarchical_ma_interaction"] = (
-                df["category_avg"] * df["sales_ema_2m"] * df["trend_2m"]
-            )
+            # 3. Guardar estado incremental
+            if save_state:
+                state = IncrementalFeatureState.from_frame(df, windows.segments, self.cube)
+                state.append_rows(self.state_path, df)
+                state.save(self.state_path)
 
-            # 4. Seleccionar features finales
-            feature_cols = self._get_feature_columns()
+            # 4. Crear features finales, escalar y guardar
+            X_scaled, y = self._finalize_training_features(df)
 
-            X = df[feature_cols]
-            y = df["item_cnt_log"]
+            # 5. Guardar estadísticas históricas y cubo de agregación
+            if self.granularity == "monthly":
+                self.save_historical_stats(df, items_df, windows.segments)
+            else:
+                self.save_historical_stats(sales_df, items_df)
+            if self.cube is not None:
+                self.cube.save(self.cube_path)
 
-            # 5. Escalar features
-            X_scaled = self.scaler.fit_transform(X)
+            logger.info("✅ Features creadas exitosamente!")
+            return X_scaled, y
 
-            # 6. Guardar scaler
-            joblib.dump(self.scaler, self.prep_path / "scaler.joblib")
+        except Exception as e:
+            logger.error(f"❌ Error creando features: {str(e)}")
+            raise
+
+    @timed()
+    def require_feature_state(self) -> IncrementalFeatureState:
+        """
+        Carga el estado incremental, fallando si no se puede actualizar.
+
+        ``prep.py --append`` lo llama antes de modificar ``sales_processed``
+        para no agregar filas que luego no se pueden procesar.
 
-            # 7. Guardar datos preparados
-            pd.DataFrame(X_scaled, columns=feature_cols).to_csv(
-                self.prep_path / "X_train_scaled.csv", index=False
+        Returns:
+            IncrementalFeatureState: Estado guardado por ``--save-feature-state``
+
+        Raises:
+            ValueError: Si la granularidad no es diaria
+            FileNotFoundError: Si no existe el estado
+        """
+        if self.granularity != "daily":
+            raise ValueError("La actualización incremental solo está disponible en modo diario")
+        state = IncrementalFeatureState.load(self.state_path)
+        if state is None:
+            raise FileNotFoundError(
+                f"No existe estado incremental en {self.state_path}; "
+                "ejecute train.py --save-feature-state primero"
             )
-            y.to_csv(self.prep_path / "y_train.csv", index=False)
+        return state
 
-            logger.info("✅ Features creadas exitosamente!")
+    def update_features(self, new_sales_df: pd.DataFrame, verify: bool = False) -> tuple:
+        """
+        Actualiza las features de entrenamiento con filas nuevas de ventas.
+
+        Las ventanas por shop/item y el cubo de agregación se actualizan solo
+        con las filas nuevas a partir del estado guardado. Como ``category_avg``
+        cambia para todas las filas, la columna de categoría, el scaler y
+        ``X_train.npy`` se recalculan con operaciones vectorizadas sobre las
+        features base acumuladas (sin reordenar ni agrupar el historial).
+
+        Args:
+            new_sales_df (pd.DataFrame): Filas nuevas ya preprocesadas, que
+                también deben haberse agregado a ``sales_processed``
+            verify (bool): Recalcular todo desde cero y comprobar que el
+                resultado sea idéntico bit a bit
+
+        Returns:
+            tuple: (X, y) Features y target para entrenamiento
+        """
+        try:
+            state = self.require_feature_state()
+            items_df = self.store.read("items_processed", ["item_id", "item_category_id"])
+
+            # 1. Features base de las filas nuevas
+            new_df = new_sales_df.assign(item_category_id=dense_lookup(
+                new_sales_df["item_id"], items_df["item_id"], items_df["item_category_id"]
+            ))
+            base = state.update(new_df)
+            state.append_rows(self.state_path, base)
+            state.save(self.state_path)
+            self.cube = state.cube
+            self.cube.save(self.cube_path)
+            logger.info(f"Filas nuevas procesadas: {len(base):,}")
+
+            # 2. Recalcular categoría, escalar y guardar
+            df = state.read_rows(self.state_path)
+            df["category_avg"] = state.category_avg(df["item_category_id"])
+            X_scaled, y = self._finalize_training_features(df)
+
+            # 3. Estadísticas históricas para inferencia
+            sales_df = self.store.read(
+                "sales_processed",
+                ["shop_id", "item_id", "item_price", "item_cnt_day", *self._pair_columns()],
+            )
+            self.save_historical_stats(sales_df, items_df)
+
+            if verify:
+                self.verify_incremental(X_scaled, y)
+
+            logger.info("✅ Features actualizadas exitosamente!")
             return X_scaled, y
 
         except Exception as e:
-            logger.error(f"❌ Error creando features: {str(e)}")
+            logger.error(f"❌ Error actualizando features: {str(e)}")
             raise
 
+    def verify_incremental(self, X_scaled: np.ndarray, y: pd.Series):
+        """
+        Comprueba que una actualización incremental coincida con un recálculo completo.
+
+        Raises:
+            AssertionError: Si algún valor difiere (comparación bit a bit)
+        """
+        logger.info("Verificando contra recálculo completo...")
+        full = FeatureEngineer(
+            self.data_path, engine="numpy", features=self.features, n_jobs=self.n_jobs
+        )
+        full.store = self.store
+        sales_df, items_df = full._load_training_frame()
+        df, _ = full._build_base_features(sales_df, items_df)
+        X_full, y_full = full._finalize_training_features(df, save=False)
+
+        if not (
+            np.array_equal(X_scaled, X_full)
+            and np.array_equal(y.to_numpy(), y_full.to_numpy())
+        ):
+            diff = np.abs(X_scaled - X_full).max() if X_scaled.shape == X_full.shape else None
+            raise AssertionError(
+                f"La actualización incremental difiere del recálculo completo "
+                f"(diferencia máxima: {diff})"
+            )
+        logger.info("✅ Actualización incremental idéntica al recálculo completo")
+
+    @timed()
     def create_all_features_for_test(
-        self, test_df: pd.DataFrame, sales_df: pd.DataFrame, items_df: pd.DataFrame
+        self,
+        test_df: pd.DataFrame,
+        sales_df: Optional[pd.DataFrame] = None,
+        items_df: Optional[pd.DataFrame] = None,
+        stats: Optional[HistoricalStats] = None,
     ) -> pd.DataFrame:
         """
         Crea features para el conjunto de test.
@@ -204,50 +835,97 @@ class FeatureEngineer:
             test_df: DataFrame de test
             sales_df: DataFrame de ventas históricas
             items_df: DataFrame de items
+            stats: Índice precalculado; si se indica, no se usan
+                ``sales_df`` ni ``items_df``
 
         Returns:
             pd.DataFrame: Features preparadas para test
         """
-        try:
-            # 1. Crear features temporales usando datos históricos
-            historical_stats = (
-                sales_df.groupby(["shop_id", "item_id"])
-                .agg({"item_cnt_day": ["mean", "std"], "item_price": ["mean", "std"]})
-                .reset_index()
-            )
+        if stats is not None:
+            return self.create_test_features_from_stats(test_df, stats)
 
-            historical_stats.columns = [
-                "shop_id",
-                "item_id",
-                "sales_mean",
-                "sales_std",
-                "price_mean",
-                "price_std",
-            ]
-
-            # 2. Merge con datos de test
-            df = test_df.merge(historical_stats, on=["shop_id", "item_id"], how="left")
-
-            # 3. Crear features
-            df["sales_ema_2m"] = df["sales_mean"].fillna(0)
-            df["trend_2m"] = df["price_mean"].fillna(0)
-            df["sales_volatility"] = df["sales_std"].fillna(0)
-
-            # 4. Features de categoría (indicando que es test)
-            df = self.create_category_features(df, items_df, is_train=False)
-
-            # 5. Ratios e interacciones
-            df["trend_volatility_ratio"] = df["trend_2m"] / df["sales_volatility"].clip(
-                lower=0.001
+        try:
+            if self.granularity == "monthly":
+                return self.create_test_features_from_stats(
+                    test_df, self._build_historical_stats(sales_df, items_df)
+                )
+
+            def pair_stats():
+                if PAIR_CODE in sales_df.columns and PAIR_CODE in test_df.columns:
+                    # Estadísticas por código de par y gather por el código de test
+                    sales_codes = sales_df[PAIR_CODE].to_numpy()
+                    test_codes = test_df[PAIR_CODE].to_numpy()
+                    n_codes = int(max(sales_codes.max(initial=-1), test_codes.max(initial=-1))) + 1
+                    matrix = grouped_pair_stats(sales_codes, n_codes, sales_df)[test_codes]
+                    return {name: matrix[:, i] for i, name in enumerate(PAIR_STATS)}
+
+                # Estadísticas por shop/item con los datos históricos
+                historical_stats = (
+                    sales_df.groupby(["shop_id", "item_id"])
+                    .agg({"item_cnt_day": ["mean", "std"], "item_price": ["mean", "std"]})
+                    .reset_index()
+                )
+
+                historical_stats.columns = [
+                    "shop_id",
+                    "item_id",
+                    "sales_mean",
+                    "sales_std",
+                    "price_mean",
+                    "price_std",
+                ]
+
+                # Join con datos de test por llave compuesta shop/item
+                return join_columns(
+                    (test_df["shop_id"], test_df["item_id"]),
+                    (historical_stats["shop_id"], historical_stats["item_id"]),
+                    {name: historical_stats[name] for name in PAIR_STATS},
+                )
+
+            def category_count():
+                return self._category_count(self._categories(test_df, items_df), items_df)
+
+            # Solo se calculan las estadísticas que usan las features pedidas
+            values = REGISTRY.evaluate(
+                self.features, "serve", ServeContext(pair_stats, category_count)
             )
-            df["hierarchical_ma_interaction"] = (
-                df["category_avg"] * df["sales_ema_2m"] * df["trend_2m"]
+            return pd.DataFrame(
+                {name: values[name] for name in self.features}, index=test_df.index
             )
 
-            # 6. Seleccionar features finales
-            feature_cols = self._get_feature_columns()
+        except Exception as e:
+            logger.error(f"Error creando features de test: {str(e)}")
+            raise
+
+    @timed()
+    def create_test_features_from_stats(
+        self, test_df: pd.DataFrame, stats: HistoricalStats
+    ) -> pd.DataFrame:
+        """
+        Crea features de test con un join vectorizado contra el índice histórico.
 
-            return df[feature_cols]
+        Produce los mismos valores que ``create_all_features_for_test`` con el
+        historial completo, en tiempo proporcional a las filas de test.
+
+        Args:
+            test_df: DataFrame de test con 'shop_id' e 'item_id'
+            stats: Índice de estadísticas históricas
+
+        Returns:
+            pd.DataFrame: Features preparadas para test
+        """
+        try:
+            def pair_stats():
+                matrix = stats.lookup_pairs(test_df["shop_id"], test_df["item_id"])
+                return {name: matrix[:, i] for i, name in enumerate(PAIR_STATS)}
+
+            def category_count():
+                return stats.lookup_categories(test_df["item_id"])[1]
+
+            values = REGISTRY.evaluate(
+                self.features, "serve", ServeContext(pair_stats, category_count)
+            )
+            return pd.DataFrame({name: values[name] for name in self.features})
 
         except Exception as e:
             logger.error(f"Error creando features de test: {str(e)}")
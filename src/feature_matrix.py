@@ -0,0 +1,270 @@
+"""
+Matriz de features de entrenamiento en formato ``.npy`` memory-mappable.
+
+``create_all_features`` escribe la matriz escalada y el target como arreglos
+float32 contiguos (``X_train.npy`` y ``y_train.npy``) junto con un archivo de
+metadatos (``feature_matrix.json``) con los nombres de columnas, los parámetros
+del scaler y el número de filas. Cualquier consumidor puede abrirlos sin copia
+con ``np.load(..., mmap_mode="r")`` o construir un ``lgb.Dataset`` directamente.
+
+Los bins de LightGBM de una matriz se guardan como binario del Dataset
+(``X_train-<llave>.bin`` junto a la matriz). La llave es la huella de
+``X``/``y`` y de los parámetros que determinan los bins, de modo que entrenar
+de nuevo con otros parámetros (árboles, hojas, tasa de aprendizaje) carga los
+bins sin recalcularlos.
+
+Funciones:
+    write_feature_matrix: Escala y escribe la matriz por bloques
+    open_feature_matrix: Abre la matriz y el target (memory-mapped)
+    dataset_params: Parámetros de construcción de un ``lgb.Dataset``
+    lgb_binary_path: Binario del Dataset de una matriz guardada
+    load_or_build_dataset: ``lgb.Dataset`` desde su binario o construido
+    index_subset: Subconjunto de filas de un Dataset que comparte sus bins
+    to_lgb_dataset: Construye un ``lgb.Dataset`` desde la matriz guardada
+"""
+
+from pathlib import Path
+from typing import Optional
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.stage_cache import StageCache, file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+X_FILE = "X_train.npy"
+Y_FILE = "y_train.npy"
+META_FILE = "feature_matrix.json"
+
+# Parámetros de LightGBM (y sus alias de la API sklearn) que determinan los bins
+BIN_PARAMS = (
+    "max_bin", "min_data_in_bin", "subsample_for_bin", "bin_construct_sample_cnt",
+    "random_state", "seed", "data_random_seed", "use_missing", "zero_as_missing",
+)
+
+# Filas escaladas por bloque al escribir la matriz
+CHUNK_ROWS = 1_000_000
+
+
+def scale_to_array(
+    X: pd.DataFrame, scaler, out: np.ndarray, chunk_rows: int = CHUNK_ROWS
+) -> np.ndarray:
+    """
+    Aplica un scaler ya ajustado por bloques, escribiendo en ``out``.
+
+    Evita materializar la matriz escalada completa en float64.
+
+    Args:
+        X (pd.DataFrame): Features sin escalar
+        scaler (StandardScaler): Scaler ajustado
+        out (np.ndarray): Arreglo de destino (n_rows, n_features)
+        chunk_rows (int): Filas por bloque
+
+    Returns:
+        np.ndarray: ``out``
+    """
+    for start in range(0, len(X), chunk_rows):
+        stop = start + chunk_rows
+        out[start:stop] = scaler.transform(X.iloc[start:stop])
+    return out
+
+
+def write_feature_matrix(
+    directory: Path, X: pd.DataFrame, y: pd.Series, scaler
+) -> tuple:
+    """
+    Escala ``X`` con ``scaler`` y guarda la matriz y el target en float32.
+
+    Args:
+        directory (Path): Directorio de destino
+        X (pd.DataFrame): Features sin escalar
+        y (pd.Series): Target
+        scaler (StandardScaler): Scaler ajustado sobre ``X``
+
+    Returns:
+        tuple: (X_scaled, y) abiertos en modo memory-mapped
+    """
+    directory = Path(directory)
+    X_out = np.lib.format.open_memmap(
+        directory / X_FILE, mode="w+", dtype=np.float32, shape=X.shape
+    )
+    scale_to_array(X, scaler, X_out)
+    X_out.flush()
+    del X_out
+
+    np.save(directory / Y_FILE, np.ascontiguousarray(y.to_numpy(), dtype=np.float32))
+    meta = {
+        "columns": list(X.columns),
+        "target": y.name,
+        "n_rows": int(len(X)),
+        "dtype": "float32",
+        "scaler_mean": scaler.mean_.tolist(),
+        "scaler_scale": scaler.scale_.tolist(),
+    }
+    with open(directory / META_FILE, "w") as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f"Matriz de features guardada en: {directory / X_FILE}")
+
+    X_scaled, y_saved, _ = open_feature_matrix(directory)
+    return X_scaled, y_saved
+
+
+def open_feature_matrix(directory: Path, mmap: bool = True) -> tuple:
+    """
+    Abre la matriz de features guardada.
+
+    Args:
+        directory (Path): Directorio con ``X_train.npy`` y ``y_train.npy``
+        mmap (bool): Abrir sin copiar en memoria
+
+    Returns:
+        tuple: (X, y, meta) con X (n_rows, n_features) float32, y como
+            ``pd.Series`` y los metadatos del archivo JSON
+    """
+    directory = Path(directory)
+    with open(directory / META_FILE) as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    X = np.load(directory / X_FILE, mmap_mode=mode)
+    y = pd.Series(np.load(directory / Y_FILE, mmap_mode=mode), name=meta["target"])
+    return X, y, meta
+
+
+def dataset_params(params: Optional[dict] = None) -> dict:
+    """
+    Parámetros de construcción de un ``lgb.Dataset`` a partir de los del modelo.
+
+    Sin pre-filtro de features (que depende de ``min_child_samples``), los bins
+    solo dependen de ``BIN_PARAMS`` y sirven para cualquier otro parámetro.
+
+    Args:
+        params (dict, optional): Parámetros del modelo
+
+    Returns:
+        dict: Parámetros de binning de ``params`` más ``feature_pre_filter=False``
+    """
+    params = params or {}
+    return {
+        "feature_pre_filter": False,
+        "verbose": -1,
+        **{name: params[name] for name in BIN_PARAMS if name in params},
+    }
+
+
+def lgb_binary_path(
+    X_path: Path, y_path: Path, params: Optional[dict] = None, mode: str = "mtime"
+) -> Path:
+    """
+    Ruta del binario del Dataset de una matriz guardada.
+
+    Args:
+        X_path (Path): Matriz ``.npy``
+        y_path (Path): Target ``.npy``
+        params (dict, optional): Parámetros del modelo (solo cuentan ``BIN_PARAMS``)
+        mode (str): Huella de los archivos ("mtime" o "hash")
+
+    Returns:
+        Path: ``<X>-<llave>.bin`` junto a la matriz
+    """
+    X_path = Path(X_path)
+    key = StageCache.key(
+        "lgb_dataset",
+        X=file_fingerprint(X_path, mode),
+        y=file_fingerprint(y_path, mode),
+        params=dataset_params(params),
+    )
+    return X_path.with_name(f"{X_path.stem}-{key[:16]}.bin")
+
+
+def load_or_build_dataset(
+    X, y, binary_path: Optional[Path] = None, params: Optional[dict] = None
+):
+    """
+    ``lgb.Dataset`` construido, cargando los bins de ``binary_path`` si existe.
+
+    Si no existe, se construye desde ``X`` (sin copiar un arreglo float32
+    contiguo, p. ej. memory-mapped), se guarda el binario y se borran los
+    binarios anteriores de la misma matriz.
+
+    Args:
+        X: Matriz (n_rows, n_features)
+        y: Target
+        binary_path (Path, optional): Binario del Dataset (ver ``lgb_binary_path``)
+        params (dict, optional): Parámetros del modelo
+
+    Returns:
+        lgb.Dataset: Dataset construido (sin datos crudos)
+    """
+    import lightgbm as lgb
+
+    try:
+        params = dataset_params(params)
+        if binary_path is not None and Path(binary_path).exists():
+            logger.info(f"Bins de LightGBM cargados de: {binary_path}")
+            return lgb.Dataset(str(binary_path), params=params).construct()
+
+        dataset = lgb.Dataset(
+            X, label=np.asarray(y), params=params, free_raw_data=True
+        ).construct()
+        if binary_path is not None:
+            binary_path = Path(binary_path)
+            prefix = binary_path.name.rsplit("-", 1)[0]
+            for stale in binary_path.parent.glob(f"{prefix}-*.bin"):
+                stale.unlink()
+            tmp = binary_path.with_suffix(".tmp")
+            dataset.save_binary(str(tmp))
+            tmp.replace(binary_path)
+            logger.info(f"Bins de LightGBM guardados en: {binary_path}")
+        return dataset
+
+    except Exception as e:
+        logger.error(f"Error construyendo el Dataset de LightGBM: {str(e)}")
+        raise
+
+
+def index_subset(dataset, indices: np.ndarray):
+    """
+    Subconjunto de filas de un ``lgb.Dataset`` que comparte sus bins.
+
+    Usa la API pública ``Dataset.subset`` con los índices como arreglo int32
+    ordenado, sin una lista intermedia de enteros de Python. ``subset`` aún
+    guarda su propia lista ordenada (unos 36 bytes por fila) y la convierte a
+    int32 al construir el subconjunto.
+
+    Args:
+        dataset (lgb.Dataset): Dataset de referencia
+        indices (np.ndarray): Filas del subconjunto
+
+    Returns:
+        lgb.Dataset: Subconjunto (se construye junto con el entrenamiento)
+    """
+    return dataset.subset(np.sort(np.asarray(indices, dtype=np.int32)))
+
+
+def to_lgb_dataset(
+    directory: Path, binary_path: Optional[Path] = None, params: Optional[dict] = None
+):
+    """
+    Construye un ``lgb.Dataset`` desde la matriz guardada.
+
+    Args:
+        directory (Path): Directorio de la matriz
+        binary_path (Path, optional): Si se indica, guarda el binario de LightGBM
+        params (dict, optional): Parámetros de construcción del Dataset
+
+    Returns:
+        lgb.Dataset: Dataset construido
+    """
+    import lightgbm as lgb
+
+    X, y, meta = open_feature_matrix(directory)
+    dataset = lgb.Dataset(
+        X, label=y.to_numpy(), feature_name=meta["columns"], params=params,
+        free_raw_data=True,
+    )
+    if binary_path is not None:
+        dataset.save_binary(str(binary_path))
+    return dataset
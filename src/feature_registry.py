@@ -0,0 +1,371 @@
+"""
+Registro de features con dependencias declaradas y cálculo perezoso.
+
+Cada nodo del registro declara sus entradas (otras features o nodos
+intermedios compartidos, como el índice por shop/item o el cubo de
+agregación) y una implementación por modo:
+
+    train  <- sobre el historial de ventas (una fila por venta o por mes)
+    serve  <- sobre las estadísticas históricas de los pares a predecir
+
+Los ratios e interacciones se registran una sola vez con ``derived``: la
+misma función sirve para entrenamiento y para inferencia.
+
+Pedir un subconjunto de features evalúa solo el cierre de sus dependencias,
+en orden topológico y una sola vez por nodo; los intermedios compartidos se
+memorizan. Por ejemplo, con ``trend_2m`` y ``trend_volatility_ratio`` no se
+calculan la EWM, las categorías ni el cubo.
+
+Clases:
+    FeatureSpec: Declaración de un nodo
+    FeatureRegistry: Grafo de nodos, planificación y evaluación
+    TrainContext: Implementaciones de los intermedios de entrenamiento
+    ServeContext: Implementaciones de los intermedios de inferencia
+
+Constantes:
+    REGISTRY: Registro con las features del modelo
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from src.joins import fillna
+from src.profiling import stage
+
+logger = logging.getLogger(__name__)
+
+# Modos de evaluación
+MODES = ("train", "serve")
+
+
+class FeatureSpec:
+    """
+    Declaración de un nodo del grafo de features.
+
+    Attributes:
+        name (str): Nombre del nodo (columna si es una feature)
+        train (Callable): ``fn(ctx, inputs) -> valores`` en entrenamiento
+            (None si el nodo no existe en ese modo)
+        serve (Callable): ``fn(ctx, inputs) -> valores`` en inferencia
+        inputs (dict): Entradas por modo ("train"/"serve" -> nombres)
+        columns (tuple): Columnas de ventas que lee en entrenamiento
+        is_feature (bool): Si es una columna del modelo (False para intermedios)
+        derived (bool): Si se calcula solo a partir de otras features
+    """
+
+    __slots__ = ("name", "train", "serve", "inputs", "columns", "is_feature", "derived")
+
+    def __init__(
+        self,
+        name: str,
+        train: Optional[Callable] = None,
+        serve: Optional[Callable] = None,
+        train_inputs: Sequence[str] = (),
+        serve_inputs: Sequence[str] = (),
+        columns: Sequence[str] = (),
+        is_feature: bool = True,
+        derived: bool = False,
+    ):
+        self.name = name
+        self.train = train
+        self.serve = serve
+        self.inputs = {"train": tuple(train_inputs), "serve": tuple(serve_inputs)}
+        self.columns = tuple(columns)
+        self.is_feature = is_feature
+        self.derived = derived
+
+    def implementation(self, mode: str) -> Callable:
+        """Función del nodo en ``mode``."""
+        fn = getattr(self, mode)
+        if fn is None:
+            raise ValueError(f"El nodo '{self.name}' no tiene implementación de {mode}")
+        return fn
+
+
+class FeatureRegistry:
+    """
+    Grafo de features: registro, validación de subconjuntos y evaluación.
+
+    Los nodos se registran después de sus entradas, de modo que el orden de
+    registro es un orden topológico válido. El orden de las columnas del
+    modelo es independiente (los modelos entrenados dependen de él).
+
+    Attributes:
+        columns (list): Features en el orden de columnas del modelo
+    """
+
+    def __init__(self, columns: Sequence[str] = ()):
+        """
+        Args:
+            columns (Sequence[str]): Orden de columnas del modelo; las features
+                registradas que no aparecen se agregan al final
+        """
+        self._specs: Dict[str, FeatureSpec] = {}
+        self.columns = list(columns)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __getitem__(self, name: str) -> FeatureSpec:
+        return self._specs[name]
+
+    def register(self, spec: FeatureSpec) -> FeatureSpec:
+        """
+        Agrega un nodo al registro.
+
+        Raises:
+            ValueError: Si el nombre ya existe o alguna entrada no está registrada
+        """
+        if spec.name in self._specs:
+            raise ValueError(f"Nodo duplicado en el registro: {spec.name}")
+        for mode in MODES:
+            missing = [name for name in spec.inputs[mode] if name not in self._specs]
+            if missing:
+                raise ValueError(
+                    f"Entradas no registradas de '{spec.name}' ({mode}): {', '.join(missing)}"
+                )
+        self._specs[spec.name] = spec
+        if spec.is_feature and spec.name not in self.columns:
+            self.columns.append(spec.name)
+        return spec
+
+    def intermediate(self, name: str, **kwargs) -> FeatureSpec:
+        """Registra un nodo intermedio (no es columna del modelo)."""
+        return self.register(FeatureSpec(name, is_feature=False, **kwargs))
+
+    def feature(self, name: str, **kwargs) -> FeatureSpec:
+        """Registra una feature con implementaciones de entrenamiento e inferencia."""
+        return self.register(FeatureSpec(name, **kwargs))
+
+    def derived(self, name: str, fn: Callable, inputs: Sequence[str]) -> FeatureSpec:
+        """
+        Registra una feature derivada de otras features.
+
+        Args:
+            name (str): Nombre de la columna
+            fn (Callable): ``fn(inputs) -> valores``; se usa en ambos modos
+            inputs (Sequence[str]): Features de entrada
+        """
+        def implementation(ctx, values):
+            return fn(values)
+
+        return self.register(FeatureSpec(
+            name, implementation, implementation, inputs, inputs, derived=True
+        ))
+
+    def features(self) -> List[str]:
+        """Features registradas en el orden de columnas del modelo."""
+        return [name for name in self.columns if name in self._specs]
+
+    def select(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Valida un subconjunto de features.
+
+        Args:
+            names (Iterable[str], optional): Features pedidas; None = todas
+
+        Returns:
+            list: Features pedidas en el orden de columnas del modelo
+
+        Raises:
+            ValueError: Si el subconjunto está vacío o tiene nombres desconocidos
+        """
+        if names is None:
+            return self.features()
+        names = list(names)
+        unknown = [
+            name for name in names
+            if name not in self._specs or not self._specs[name].is_feature
+        ]
+        if unknown:
+            raise ValueError(
+                f"Features desconocidas: {', '.join(unknown)}. "
+                f"Opciones: {', '.join(self.features())}"
+            )
+        if not names:
+            raise ValueError("Se necesita al menos una feature")
+        requested = set(names)
+        return [name for name in self.features() if name in requested]
+
+    def plan(
+        self, names: Iterable[str], mode: str, known: Iterable[str] = ()
+    ) -> List[str]:
+        """
+        Nodos necesarios para calcular ``names`` en orden topológico.
+
+        Args:
+            names (Iterable[str]): Nodos pedidos
+            mode (str): "train" o "serve"
+            known (Iterable[str]): Nodos ya calculados; no se expanden sus entradas
+
+        Returns:
+            list: Nodos por calcular (sin los de ``known``)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo no soportado: {mode}")
+        known = set(known)
+        needed = set()
+        pending = [name for name in names if name not in known]
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            pending.extend(
+                entry for entry in self._specs[name].inputs[mode] if entry not in known
+            )
+        return [name for name in self._specs if name in needed]
+
+    def base_features(self, names: Iterable[str]) -> List[str]:
+        """Features no derivadas de las que dependen ``names`` (incluidas)."""
+        return [
+            name for name in self.plan(names, "serve")
+            if self._specs[name].is_feature and not self._specs[name].derived
+        ]
+
+    def derived_features(self, names: Iterable[str]) -> List[str]:
+        """Features derivadas de las que dependen ``names`` (incluidas)."""
+        return [name for name in self.plan(names, "serve") if self._specs[name].derived]
+
+    def sales_columns(self, names: Iterable[str]) -> List[str]:
+        """Columnas de ventas que leen en entrenamiento los nodos de ``names``."""
+        columns = []
+        for name in self.plan(names, "train"):
+            columns.extend(c for c in self._specs[name].columns if c not in columns)
+        return columns
+
+    def evaluate(
+        self,
+        names: Iterable[str],
+        mode: str,
+        ctx,
+        values: Optional[dict] = None,
+    ) -> dict:
+        """
+        Calcula ``names`` y sus dependencias, una vez por nodo.
+
+        Args:
+            names (Iterable[str]): Nodos pedidos
+            mode (str): "train" o "serve"
+            ctx: ``TrainContext`` o ``ServeContext``
+            values (dict, optional): Valores ya conocidos (no se recalculan)
+
+        Returns:
+            dict: nombre -> valores, con los de ``values`` y los calculados
+        """
+        values = {} if values is None else values
+        for name in self.plan(names, mode, known=values):
+            spec = self._specs[name]
+            fn = spec.implementation(mode)
+            with stage(f"feature:{name}"):
+                values[name] = fn(ctx, {entry: values[entry] for entry in spec.inputs[mode]})
+        return values
+
+
+class TrainContext:
+    """
+    Intermedios de entrenamiento, provistos por ``FeatureEngineer``.
+
+    Attributes:
+        windows (Callable): ``() -> mapping`` nombre de ventana -> valores
+        categories (Callable): ``() -> categoría por fila``
+        cube (Callable): ``(categories) -> AggregationCube``
+        count_column (str): Columna de conteo del cubo
+    """
+
+    def __init__(
+        self, windows: Callable, categories: Callable, cube: Callable, count_column: str
+    ):
+        self.windows = windows
+        self.categories = categories
+        self.cube = cube
+        self.count_column = count_column
+
+
+class ServeContext:
+    """
+    Intermedios de inferencia, provistos por ``FeatureEngineer``.
+
+    Attributes:
+        pair_stats (Callable): ``() -> dict`` con ``PAIR_STATS`` por fila
+        category_count (Callable): ``() -> items de la categoría por fila``
+    """
+
+    def __init__(self, pair_stats: Callable, category_count: Callable):
+        self.pair_stats = pair_stats
+        self.category_count = category_count
+
+
+def _window(name: str):
+    """Feature de ventana por shop/item (entrenamiento)."""
+    return lambda ctx, inputs: inputs["windows"][name]
+
+
+def _pair_stat(stat: str):
+    """Feature servida desde una estadística histórica del par."""
+    return lambda ctx, inputs: fillna(inputs["pair_stats"][stat])
+
+
+REGISTRY = FeatureRegistry([
+    "sales_ema_2m",
+    "hierarchical_ma_interaction",
+    "trend_2m",
+    "sales_volatility",
+    "category_avg",
+    "trend_volatility_ratio",
+])
+
+# Intermedios compartidos
+REGISTRY.intermediate(
+    "windows", train=lambda ctx, inputs: ctx.windows(),
+    columns=("shop_id", "item_id", "item_cnt_day", "item_price"),
+)
+REGISTRY.intermediate(
+    "categories", train=lambda ctx, inputs: ctx.categories(), columns=("item_id",)
+)
+REGISTRY.intermediate(
+    "cube", train=lambda ctx, inputs: ctx.cube(inputs["categories"]),
+    train_inputs=("categories",), columns=("month", "year"),
+)
+REGISTRY.intermediate("pair_stats", serve=lambda ctx, inputs: ctx.pair_stats())
+REGISTRY.intermediate("category_count", serve=lambda ctx, inputs: ctx.category_count())
+
+# Features base
+REGISTRY.feature(
+    "sales_ema_2m",
+    train=_window("sales_ema_2m"), train_inputs=("windows",),
+    serve=_pair_stat("sales_mean"), serve_inputs=("pair_stats",),
+)
+REGISTRY.feature(
+    "trend_2m",
+    train=_window("trend_2m"), train_inputs=("windows",),
+    serve=_pair_stat("price_mean"), serve_inputs=("pair_stats",),
+)
+REGISTRY.feature(
+    "sales_volatility",
+    train=_window("sales_volatility"), train_inputs=("windows",),
+    serve=_pair_stat("sales_std"), serve_inputs=("pair_stats",),
+)
+REGISTRY.feature(
+    "category_avg",
+    train=lambda ctx, inputs: inputs["cube"].lookup(
+        "mean", ctx.count_column, inputs["categories"]
+    ),
+    train_inputs=("cube", "categories"),
+    serve=lambda ctx, inputs: fillna(inputs["category_count"]),
+    serve_inputs=("category_count",),
+)
+
+# Ratios e interacciones (misma implementación en ambos modos)
+REGISTRY.derived(
+    "trend_volatility_ratio",
+    lambda v: v["trend_2m"] / np.maximum(v["sales_volatility"], 0.001),
+    ("trend_2m", "sales_volatility"),
+)
+REGISTRY.derived(
+    "hierarchical_ma_interaction",
+    lambda v: v["category_avg"] * v["sales_ema_2m"] * v["trend_2m"],
+    ("category_avg", "sales_ema_2m", "trend_2m"),
+)
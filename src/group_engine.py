@@ -0,0 +1,227 @@
+"""
+Motor vectorizado para operaciones de ventana por grupo.
+
+Este módulo reemplaza los ``groupby(...).transform(lambda ...)`` de
+``FeatureEngineer`` por operaciones sobre arreglos de NumPy. Los datos se
+ordenan una sola vez por las columnas de agrupación y cada grupo queda como un
+segmento contiguo; las ventanas móviles y la media exponencial se calculan
+sobre todos los segmentos a la vez y el resultado se devuelve en el orden
+original del DataFrame.
+
+Clases:
+    GroupSegments: Índice de segmentos por grupo reutilizable entre features
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.keys import stable_code_order
+
+
+class GroupSegments:
+    """
+    Índice de segmentos contiguos por grupo.
+
+    El orden dentro de cada grupo es el orden de aparición en el DataFrame,
+    igual que en ``groupby(...).transform``.
+
+    Attributes:
+        order (np.ndarray): Permutación que ordena las filas por grupo
+        position (np.ndarray): Posición de cada fila (ordenada) dentro de su grupo
+        starts (np.ndarray): Índice (ordenado) de la primera fila de cada grupo
+        ends (np.ndarray): Índice (ordenado) de la última fila de cada grupo
+        n_rows (int): Número de filas
+    """
+
+    def __init__(self, keys: Sequence[np.ndarray], order: Optional[np.ndarray] = None):
+        """
+        Construye el índice a partir de los arreglos de llaves.
+
+        Args:
+            keys (Sequence[np.ndarray]): Arreglos de llaves, de mayor a menor prioridad
+            order (np.ndarray, optional): Orden estable de las filas por llave
+                ya calculado
+        """
+        keys = [np.asarray(k) for k in keys]
+        self.n_rows = len(keys[0]) if keys else 0
+
+        # lexsort es estable: conserva el orden original dentro de cada grupo
+        self.order = np.lexsort(keys[::-1]) if order is None else order
+
+        if self.n_rows == 0:
+            self.position = np.empty(0, dtype=np.int64)
+            self.starts = np.empty(0, dtype=np.int64)
+            self.ends = np.empty(0, dtype=np.int64)
+            self._rank_order = np.empty(0, dtype=np.int64)
+            self._rank_bounds = np.zeros(1, dtype=np.int64)
+            return
+
+        is_start = np.zeros(self.n_rows, dtype=bool)
+        is_start[0] = True
+        for k in keys:
+            k_sorted = k[self.order]
+            is_start[1:] |= k_sorted[1:] != k_sorted[:-1]
+
+        starts = np.flatnonzero(is_start)
+        group_start = starts[np.cumsum(is_start) - 1]
+        self.position = np.arange(self.n_rows) - group_start
+        self.starts = starts
+        self.ends = np.append(starts[1:], self.n_rows) - 1
+
+        # Filas agrupadas por posición dentro del grupo (para recursiones)
+        self._rank_order = np.argsort(self.position, kind="stable")
+        counts = np.bincount(self.position)
+        self._rank_bounds = np.concatenate(([0], np.cumsum(counts)))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, group_cols: Sequence[str]) -> "GroupSegments":
+        """
+        Construye el índice desde columnas de un DataFrame.
+
+        Args:
+            df (pd.DataFrame): DataFrame con las columnas de agrupación
+            group_cols (Sequence[str]): Columnas de agrupación
+
+        Returns:
+            GroupSegments: Índice de segmentos
+        """
+        return cls([df[c].to_numpy() for c in group_cols])
+
+    @classmethod
+    def from_codes(cls, codes) -> "GroupSegments":
+        """
+        Construye el índice desde un código de grupo denso (p. ej. ``pair_code``).
+
+        Ordenar un solo código acotado usa radix sort en lugar de ``lexsort``
+        sobre varias columnas; con códigos en el orden de las llaves el
+        resultado es idéntico a ``from_frame``.
+
+        Args:
+            codes: Código entero no negativo de cada fila
+
+        Returns:
+            GroupSegments: Índice de segmentos
+        """
+        codes = np.asarray(codes)
+        return cls([codes], order=stable_code_order(codes))
+
+    def _sorted(self, values) -> np.ndarray:
+        """Convierte los valores a float64 en el orden de los segmentos."""
+        return np.asarray(values, dtype=np.float64)[self.order]
+
+    def _unsort(self, sorted_values: np.ndarray) -> np.ndarray:
+        """Devuelve los valores al orden original de las filas."""
+        out = np.empty_like(sorted_values)
+        out[self.order] = sorted_values
+        return out
+
+    def shift(self, values, periods: int = 1) -> np.ndarray:
+        """
+        Valor de ``periods`` filas antes dentro del grupo (equivalente a ``shift``).
+
+        Args:
+            values: Valores de entrada, en el orden original
+            periods (int): Filas de rezago (>= 1)
+
+        Returns:
+            np.ndarray: Valores rezagados en el orden original (NaN en las
+                primeras ``periods`` filas de cada grupo)
+        """
+        x = self._sorted(values)
+        out = np.full(self.n_rows, np.nan)
+        out[periods:] = x[:-periods]
+        out[self.position < periods] = np.nan
+        return self._unsort(out)
+
+    def ewm_mean(self, values, span: float, initial=None) -> np.ndarray:
+        """
+        Media móvil exponencial por grupo (equivalente a ``ewm(span, adjust=False)``).
+
+        La recursión avanza por posición dentro del grupo, de modo que cada
+        paso actualiza en bloque todos los grupos que tienen esa posición.
+
+        Args:
+            values: Valores de entrada sin NaN, en el orden original
+            span (float): Span de la media exponencial
+            initial: Valor previo de la media por fila (orden original), usado
+                solo en la primera fila de cada grupo para continuar una serie
+                ya calculada; NaN o None inicia la serie desde cero
+
+        Returns:
+            np.ndarray: Media exponencial en el orden original
+        """
+        alpha = 2.0 / (span + 1.0)
+        x = self._sorted(values)
+        y = x.copy()
+        if initial is not None:
+            first = self.starts
+            prev = self._sorted(initial)[first]
+            seeded = ~np.isnan(prev)
+            first = first[seeded]
+            y[first] = (1.0 - alpha) * prev[seeded] + alpha * x[first]
+        bounds = self._rank_bounds
+        for rank in range(1, len(bounds) - 1):
+            idx = self._rank_order[bounds[rank]:bounds[rank + 1]]
+            y[idx] = (1.0 - alpha) * y[idx - 1] + alpha * x[idx]
+        return self._unsort(y)
+
+    def _window_stack(self, x: np.ndarray, window: int) -> np.ndarray:
+        """
+        Apila los valores desplazados de la ventana (NaN fuera del grupo).
+
+        Returns:
+            np.ndarray: Matriz (window, n_rows); la fila k contiene x[t - k]
+        """
+        stack = np.full((window, self.n_rows), np.nan)
+        stack[0] = x
+        for lag in range(1, window):
+            valid = self.position >= lag
+            stack[lag, lag:] = x[:-lag]
+            stack[lag, ~valid] = np.nan
+        return stack
+
+    def rolling_mean(self, values, window: int, min_periods: int = 1) -> np.ndarray:
+        """
+        Media móvil por grupo (equivalente a ``rolling(window, min_periods).mean()``).
+
+        Args:
+            values: Valores de entrada, en el orden original
+            window (int): Tamaño de la ventana
+            min_periods (int): Observaciones mínimas para producir un valor
+
+        Returns:
+            np.ndarray: Media móvil en el orden original (NaN si no hay suficientes datos)
+        """
+        stack = self._window_stack(self._sorted(values), window)
+        count = np.sum(~np.isnan(stack), axis=0)
+        total = np.nansum(stack, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+        mean[count < min_periods] = np.nan
+        return self._unsort(mean)
+
+    def rolling_std(
+        self, values, window: int, min_periods: int = 1, ddof: int = 1
+    ) -> np.ndarray:
+        """
+        Desviación estándar móvil por grupo (equivalente a ``rolling(...).std()``).
+
+        Args:
+            values: Valores de entrada, en el orden original
+            window (int): Tamaño de la ventana
+            min_periods (int): Observaciones mínimas para producir un valor
+            ddof (int): Grados de libertad delta
+
+        Returns:
+            np.ndarray: Desviación estándar móvil en el orden original
+        """
+        stack = self._window_stack(self._sorted(values), window)
+        count = np.sum(~np.isnan(stack), axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nansum(stack, axis=0) / count
+            sq_dev = np.nansum((stack - mean) ** 2, axis=0)
+            std = np.sqrt(sq_dev / (count - ddof))
+        std[(count < min_periods) | (count <= ddof)] = np.nan
+        return self._unsort(std)
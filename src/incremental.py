@@ -0,0 +1,288 @@
+"""
+Estado para actualizar features de entrenamiento de forma incremental.
+
+Cuando llegan nuevos días de ventas no es necesario recalcular las ventanas de
+todo el historial: basta con conservar, por cada (shop_id, item_id), el último
+valor de la media exponencial y las últimas filas que caben en las ventanas
+móviles, además del cubo de agregación por tienda/categoría/mes. Con ese estado las
+features de las filas nuevas se calculan con exactamente las mismas operaciones
+que un recálculo completo, por lo que los resultados son idénticos bit a bit.
+
+Clases:
+    IncrementalFeatureState: Estado por grupo y cubo de agregación entre ejecuciones
+"""
+
+from pathlib import Path
+from typing import Optional
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.agg_cube import AggregationCube, month_periods
+from src.group_engine import GroupSegments
+from src.stats_index import pack_keys
+from src.storage import FrameStore
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de las ventanas (deben coincidir con FeatureEngineer)
+EWM_SPAN = 2
+PRICE_WINDOW = 2
+COUNT_WINDOW = 3
+
+# Features base por fila que se acumulan entre ejecuciones
+BASE_COLUMNS = [
+    "sales_ema_2m",
+    "trend_2m",
+    "sales_volatility",
+    "item_category_id",
+    "item_cnt_log",
+]
+
+
+class IncrementalFeatureState:
+    """
+    Estado por (shop_id, item_id) y cubo de agregación.
+
+    Attributes:
+        keys (np.ndarray): Llaves shop/item empaquetadas y ordenadas
+        n_seen (np.ndarray): Filas vistas por grupo
+        ewm_last (np.ndarray): Último valor de ``sales_ema_2m`` por grupo
+        count_tail (np.ndarray): Matriz (n_keys, 2) con las dos últimas
+            ventas del grupo [anterior, última] (NaN si no existen)
+        price_last (np.ndarray): Último precio por grupo
+        cube (AggregationCube): Conteos y sumas de ``item_cnt_day`` por
+            categoría y mes
+        n_parts (int): Partes de features base guardadas
+    """
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        n_seen: np.ndarray,
+        ewm_last: np.ndarray,
+        count_tail: np.ndarray,
+        price_last: np.ndarray,
+        cube: AggregationCube,
+        n_parts: int = 0,
+    ):
+        self.keys = keys
+        self.n_seen = n_seen
+        self.ewm_last = ewm_last
+        self.count_tail = count_tail
+        self.price_last = price_last
+        self.cube = cube
+        self.n_parts = n_parts
+
+    @staticmethod
+    def _tails(
+        segments: GroupSegments, packed: np.ndarray, counts: np.ndarray, prices: np.ndarray
+    ) -> tuple:
+        """Llaves y valores finales de cada grupo de ``segments``."""
+        order = segments.order
+        ends = segments.ends
+        last_keys = packed[order][ends]
+        counts_sorted = np.asarray(counts, dtype=np.float64)[order]
+        prices_sorted = np.asarray(prices, dtype=np.float64)[order]
+        has_prev = segments.position[ends] >= 1
+        prev = np.where(has_prev, counts_sorted[np.maximum(ends - 1, 0)], np.nan)
+        count_tail = np.column_stack([prev, counts_sorted[ends]])
+        return last_keys, count_tail, prices_sorted[ends]
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, segments: GroupSegments, cube: Optional[AggregationCube] = None
+    ) -> "IncrementalFeatureState":
+        """
+        Construye el estado a partir de un cálculo completo.
+
+        Args:
+            df (pd.DataFrame): Ventas con 'shop_id', 'item_id', 'item_cnt_day',
+                'item_price', 'item_category_id', 'year'/'month' y 'sales_ema_2m'
+            segments (GroupSegments): Índice por (shop_id, item_id) de ``df``
+            cube (AggregationCube, optional): Cubo ya construido sobre ``df``
+
+        Returns:
+            IncrementalFeatureState: Estado inicial
+        """
+        packed = pack_keys(df["shop_id"], df["item_id"])
+        keys, count_tail, price_last = cls._tails(
+            segments, packed, df["item_cnt_day"], df["item_price"]
+        )
+        ends = segments.ends
+        ewm_last = df["sales_ema_2m"].to_numpy(dtype=np.float64)[segments.order][ends]
+        n_seen = segments.position[ends] + 1
+        if cube is None:
+            cube = AggregationCube.from_frame(df, ["item_cnt_day"])
+        return cls(keys, n_seen, ewm_last, count_tail, price_last, cube)
+
+    def _add_groups(self, new_keys: np.ndarray):
+        """Agrega al estado los grupos que aún no existen."""
+        missing = np.setdiff1d(new_keys, self.keys)
+        if len(missing) == 0:
+            return
+        keys = np.union1d(self.keys, missing)
+        old = np.searchsorted(keys, self.keys)
+
+        def grow(values: np.ndarray, fill) -> np.ndarray:
+            out = np.full((len(keys),) + values.shape[1:], fill, dtype=values.dtype)
+            out[old] = values
+            return out
+
+        self.n_seen = grow(self.n_seen, 0)
+        self.ewm_last = grow(self.ewm_last, np.nan)
+        self.count_tail = grow(self.count_tail, np.nan)
+        self.price_last = grow(self.price_last, np.nan)
+        self.keys = keys
+
+    def update(self, new_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula las features base de filas nuevas y actualiza el estado.
+
+        Las filas nuevas deben ser posteriores a las ya procesadas (se agregan
+        al final del historial).
+
+        Args:
+            new_df (pd.DataFrame): Filas nuevas con 'shop_id', 'item_id',
+                'item_cnt_day', 'item_price', 'item_cnt_log', 'item_category_id'
+                y 'year'/'month'
+
+        Returns:
+            pd.DataFrame: Features base (``BASE_COLUMNS``) de las filas nuevas
+        """
+        new_keys = pack_keys(new_df["shop_id"], new_df["item_id"])
+        counts = new_df["item_cnt_day"].to_numpy(dtype=np.float64)
+        prices = new_df["item_price"].to_numpy(dtype=np.float64)
+        self._add_groups(np.unique(new_keys))
+        group = np.searchsorted(self.keys, new_keys)
+
+        # 1. Media exponencial: continúa desde el último valor de cada grupo
+        new_segments = GroupSegments([new_keys])
+        ema = new_segments.ewm_mean(counts, span=EWM_SPAN, initial=self.ewm_last[group])
+
+        # 2. Ventanas móviles: filas de contexto del historial + filas nuevas
+        touched = np.unique(group)
+        ctx_prev = touched[~np.isnan(self.count_tail[touched, 0])]
+        ctx_last = touched[~np.isnan(self.count_tail[touched, 1])]
+        ctx_keys = np.concatenate([self.keys[ctx_prev], self.keys[ctx_last]])
+        ctx_counts = np.concatenate(
+            [self.count_tail[ctx_prev, 0], self.count_tail[ctx_last, 1]]
+        )
+        # El precio de la fila anterior a la última no entra en ninguna ventana nueva
+        ctx_prices = np.concatenate([
+            np.full(len(ctx_prev), np.nan), self.price_last[ctx_last]
+        ])
+        # Orden estable: anterior, última, nuevas
+        n_ctx = len(ctx_keys)
+        all_keys = np.concatenate([ctx_keys, new_keys])
+        all_counts = np.concatenate([ctx_counts, counts])
+        all_prices = np.concatenate([ctx_prices, prices])
+        segments = GroupSegments([all_keys])
+        trend = segments.rolling_mean(all_prices, window=PRICE_WINDOW)[n_ctx:]
+        volatility = segments.rolling_std(all_counts, window=COUNT_WINDOW)[n_ctx:]
+
+        # 3. Actualizar estado por grupo
+        last_keys, count_tail, price_last = self._tails(
+            segments, all_keys, all_counts, all_prices
+        )
+        idx = np.searchsorted(self.keys, last_keys)
+        self.count_tail[idx] = count_tail
+        self.price_last[idx] = price_last
+        self.ewm_last[idx] = ema[new_segments.order][new_segments.ends]
+        self.n_seen += np.bincount(group, minlength=len(self.keys))
+
+        # 4. Cubo de agregación (aditivo)
+        self.cube.update(
+            new_df["item_category_id"], month_periods(new_df), {"item_cnt_day": counts}
+        )
+
+        base = pd.DataFrame({
+            "sales_ema_2m": ema,
+            "trend_2m": trend,
+            "sales_volatility": volatility,
+            "item_category_id": new_df["item_category_id"].to_numpy(dtype=np.float64),
+            "item_cnt_log": new_df["item_cnt_log"].to_numpy(),
+        })
+        base[["trend_2m", "sales_volatility"]] = base[
+            ["trend_2m", "sales_volatility"]
+        ].fillna(0)
+        return base
+
+    def category_avg(self, categories) -> np.ndarray:
+        """Media de ventas de la categoría de cada fila."""
+        return self.cube.lookup("mean", "item_cnt_day", categories)
+
+    def append_rows(self, directory: Path, base: pd.DataFrame):
+        """
+        Guarda las features base de una ejecución como una parte nueva.
+
+        Args:
+            directory (Path): Directorio del estado
+            base (pd.DataFrame): Features base a guardar
+        """
+        store = FrameStore(Path(directory) / "rows", "parquet")
+        store.directory.mkdir(parents=True, exist_ok=True)
+        store.write(base[BASE_COLUMNS], f"part-{self.n_parts:05d}")
+        self.n_parts += 1
+
+    def read_rows(self, directory: Path) -> pd.DataFrame:
+        """
+        Lee todas las features base acumuladas, en orden.
+
+        Returns:
+            pd.DataFrame: Features base del historial completo
+        """
+        store = FrameStore(Path(directory) / "rows", "parquet")
+        parts = [store.read(f"part-{i:05d}") for i in range(self.n_parts)]
+        return pd.concat(parts, ignore_index=True)
+
+    def save(self, directory: Path):
+        """
+        Guarda el estado como arreglos ``.npy``.
+
+        Args:
+            directory (Path): Directorio de destino
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "keys.npy", self.keys)
+        np.save(directory / "n_seen.npy", self.n_seen)
+        np.save(directory / "ewm_last.npy", self.ewm_last)
+        np.save(directory / "count_tail.npy", self.count_tail)
+        np.save(directory / "price_last.npy", self.price_last)
+        self.cube.save(directory / "cube")
+        with open(directory / "meta.json", "w") as f:
+            json.dump({"n_keys": int(len(self.keys)), "n_parts": self.n_parts}, f)
+        logger.info(f"Estado incremental guardado en: {directory}")
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["IncrementalFeatureState"]:
+        """
+        Carga un estado guardado.
+
+        Args:
+            directory (Path): Directorio del estado
+
+        Returns:
+            IncrementalFeatureState: Estado, o None si no existe (o si su cubo
+                es de una versión anterior)
+        """
+        directory = Path(directory)
+        if not (directory / "meta.json").exists():
+            return None
+        cube = AggregationCube.load(directory / "cube")
+        if cube is None:
+            return None
+        with open(directory / "meta.json") as f:
+            meta = json.load(f)
+        return cls(
+            np.load(directory / "keys.npy"),
+            np.load(directory / "n_seen.npy"),
+            np.load(directory / "ewm_last.npy"),
+            np.load(directory / "count_tail.npy"),
+            np.load(directory / "price_last.npy"),
+            cube,
+            n_parts=meta["n_parts"],
+        )
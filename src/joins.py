@@ -0,0 +1,216 @@
+"""
+Joins por llave sin copiar el DataFrame base.
+
+Un ``merge`` de pandas construye una tabla hash y copia todas las columnas del
+DataFrame izquierdo para producir uno nuevo. Cuando la tabla derecha tiene
+llaves únicas (catálogo de items, estadísticas agregadas por shop/item) basta
+con calcular, para cada fila izquierda, la posición de su llave en la tabla
+derecha y materializar solo las columnas nuevas:
+
+- Llaves enteras pequeñas (``item_id``, ``item_category_id``): arreglo denso
+  llave -> valor y un *gather*.
+- Llaves compuestas (shop_id, item_id): base mixta ``shop * n_items + item``,
+  densa si el producto de rangos es pequeño.
+- Llaves grandes o dispersas (p. ej. ``pack_keys``): llaves ordenadas y
+  búsqueda binaria vectorizada.
+
+Semántica de *left join*: las filas sin llave en la tabla derecha reciben NaN y,
+como en ``merge``, las columnas enteras pasan a float64 solo si hay faltantes.
+
+Funciones:
+    dense_lookup: Join por arreglo denso
+    sorted_lookup: Posiciones de llaves en un arreglo ordenado
+    composite_keys: Llave de base mixta para varias columnas
+    join_columns: Join de varias columnas por llaves arbitrarias
+    fillna: Reemplaza NaN (y solo NaN) en un arreglo
+"""
+
+from typing import Dict, Optional, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tamaño máximo (en elementos) del arreglo denso antes de usar búsqueda binaria
+MAX_DENSE_SIZE = 1 << 26
+
+# Consultas a partir de las cuales se ordenan antes de la búsqueda binaria
+_SORT_QUERY_MIN = 1 << 15
+
+
+def _as_int_keys(keys) -> tuple:
+    """Llaves como int64 y máscara de llaves válidas (no NaN)."""
+    keys = np.asarray(keys)
+    if keys.dtype.kind == "f":
+        valid = ~np.isnan(keys)
+        return np.where(valid, keys, -1).astype(np.int64), valid
+    return keys.astype(np.int64, copy=False), np.ones(len(keys), dtype=bool)
+
+
+def _take(values, positions: np.ndarray, found: np.ndarray) -> np.ndarray:
+    """Valores en ``positions``; NaN (con el dtype de ``merge``) donde no hay match."""
+    values = np.asarray(values)
+    if found.all():
+        return values[positions]
+    dtype = values.dtype if values.dtype.kind == "f" else np.float64
+    out = np.full(len(positions), np.nan, dtype=dtype)
+    out[found] = values[positions[found]]
+    return out
+
+
+def _check_unique(sorted_keys: np.ndarray):
+    """Las llaves de la tabla derecha deben ser únicas (join uno a uno)."""
+    if len(sorted_keys) > 1 and (sorted_keys[1:] == sorted_keys[:-1]).any():
+        raise ValueError("Las llaves de la tabla derecha no son únicas")
+
+
+def dense_lookup(keys, table_keys, table_values) -> np.ndarray:
+    """
+    Join de una columna por llaves enteras no negativas y acotadas.
+
+    Args:
+        keys: Llaves de las filas izquierdas (enteros; NaN = sin llave)
+        table_keys: Llaves únicas de la tabla derecha
+        table_values: Valor de cada llave de la tabla derecha
+
+    Returns:
+        np.ndarray: Valor por fila izquierda (NaN si la llave no existe)
+    """
+    table_keys, _ = _as_int_keys(table_keys)
+    size = int(table_keys.max()) + 1 if len(table_keys) else 0
+    if (table_keys < 0).any():
+        raise ValueError("dense_lookup requiere llaves no negativas")
+    position = np.full(size, -1, dtype=np.int64)
+    position[table_keys] = np.arange(len(table_keys))
+    if (position >= 0).sum() != len(table_keys):
+        raise ValueError("Las llaves de la tabla derecha no son únicas")
+
+    keys, valid = _as_int_keys(keys)
+    in_range = valid & (keys >= 0) & (keys < size)
+    rows = np.full(len(keys), -1, dtype=np.int64)
+    rows[in_range] = position[keys[in_range]]
+    found = rows >= 0
+    return _take(table_values, np.where(found, rows, 0), found)
+
+
+def sorted_lookup(query, sorted_keys: np.ndarray) -> tuple:
+    """
+    Posición de cada llave de ``query`` en ``sorted_keys``.
+
+    Con muchas llaves la búsqueda se hace sobre ``query`` ordenada, que recorre
+    ``sorted_keys`` en orden y evita los fallos de caché de búsquedas al azar.
+
+    Args:
+        query: Llaves buscadas
+        sorted_keys (np.ndarray): Llaves únicas en orden ascendente
+
+    Returns:
+        tuple: (positions, found) con ``positions`` válido solo donde ``found``
+    """
+    query = np.asarray(query)
+    if len(sorted_keys) == 0:
+        return np.zeros(len(query), dtype=np.int64), np.zeros(len(query), dtype=bool)
+    if len(query) > _SORT_QUERY_MIN:
+        order = np.argsort(query)
+        positions = np.empty(len(query), dtype=np.int64)
+        positions[order] = np.searchsorted(sorted_keys, query[order])
+    else:
+        positions = np.searchsorted(sorted_keys, query)
+    positions = np.minimum(positions, len(sorted_keys) - 1)
+    found = sorted_keys[positions] == query
+    return positions, found
+
+
+def composite_keys(left_columns: Sequence, right_columns: Sequence) -> tuple:
+    """
+    Combina varias columnas enteras en una sola llave de base mixta.
+
+    La base de cada columna es el máximo de la tabla derecha más uno, de modo
+    que las llaves derechas quedan en ``[0, prod(bases))`` y pueden usarse en un
+    arreglo denso cuando el producto es pequeño (p. ej. 60 tiendas x 22k items).
+
+    Args:
+        left_columns (Sequence): Columnas de llave de las filas izquierdas
+        right_columns (Sequence): Columnas de llave de la tabla derecha
+
+    Returns:
+        tuple: (left_key, right_key, size) con -1 en las filas izquierdas cuya
+            combinación no puede existir en la derecha
+    """
+    right = [_as_int_keys(col)[0] for col in right_columns]
+    radix = [int(col.max()) + 1 if len(col) else 1 for col in right]
+    size = int(np.prod(radix, dtype=object))
+    if size >= 2**63:
+        raise ValueError("La llave compuesta no cabe en int64")
+
+    left_key = np.zeros(len(left_columns[0]), dtype=np.int64)
+    valid = np.ones(len(left_key), dtype=bool)
+    right_key = np.zeros(len(right[0]), dtype=np.int64)
+    for col_left, col_right, base in zip(left_columns, right, radix):
+        values, ok = _as_int_keys(col_left)
+        valid &= ok & (values >= 0) & (values < base)
+        left_key = left_key * base + values
+        right_key = right_key * base + col_right
+    left_key[~valid] = -1
+    return left_key, right_key, size
+
+
+def join_columns(
+    left_keys,
+    right_keys,
+    right_columns: Dict[str, object],
+    dense: Optional[bool] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Left join de varias columnas de una tabla con llaves únicas.
+
+    Args:
+        left_keys: Llave de cada fila izquierda, o tupla de columnas de llave
+        right_keys: Llave de cada fila derecha, o tupla de columnas de llave
+        right_columns (dict): Columnas derechas a traer (nombre -> valores)
+        dense (bool, optional): Forzar arreglo denso (True) o búsqueda binaria
+            (False); por defecto denso si las llaves (o el producto de rangos
+            de una llave compuesta) no superan ``MAX_DENSE_SIZE``
+
+    Returns:
+        dict: Columnas nuevas alineadas con las filas izquierdas
+    """
+    if isinstance(left_keys, tuple):
+        left_keys, right, size = composite_keys(left_keys, right_keys)
+        if dense is None:
+            dense = size <= MAX_DENSE_SIZE
+    else:
+        right, _ = _as_int_keys(right_keys)
+        if dense is None:
+            dense = len(right) > 0 and right.min() >= 0 and right.max() < MAX_DENSE_SIZE
+
+    if dense:
+        positions = dense_lookup(left_keys, right, np.arange(len(right)))
+        found = ~np.isnan(positions) if positions.dtype.kind == "f" else np.ones(
+            len(positions), dtype=bool
+        )
+        positions = np.where(found, positions, 0).astype(np.int64)
+    else:
+        # Las salidas de groupby ya vienen ordenadas: se evita el argsort
+        order = None
+        if len(right) > 1 and not (right[1:] > right[:-1]).all():
+            order = np.argsort(right, kind="stable")
+            right = right[order]
+            _check_unique(right)
+        query, valid = _as_int_keys(left_keys)
+        positions, found = sorted_lookup(query, right)
+        found &= valid
+        if order is not None:
+            positions = order[positions]
+    return {
+        name: _take(values, positions, found) for name, values in right_columns.items()
+    }
+
+
+def fillna(values, value: float = 0.0) -> np.ndarray:
+    """Equivalente a ``Series.fillna`` para arreglos (no toca infinitos)."""
+    values = np.asarray(values)
+    if values.dtype.kind != "f":
+        return values
+    return np.where(np.isnan(values), value, values)
@@ -0,0 +1,192 @@
+"""
+Codificación densa de los pares (shop_id, item_id).
+
+Cada ``groupby`` o join por shop/item vuelve a factorizar dos columnas de
+enteros anchos. ``PairIndex`` asigna una sola vez un código int32 denso a cada
+par y lo guarda junto a las tablas procesadas (columna ``pair_code``); a partir
+de ahí agrupar es ordenar un solo entero acotado (radix sort en
+``GroupSegments.from_codes``), agregar es un ``np.bincount`` y juntar es un
+*gather* por código.
+
+Los códigos iniciales siguen el orden (shop_id, item_id), de modo que los
+resultados coinciden bit a bit con agrupar por las dos columnas. Los pares
+nuevos (``extend``, p. ej. al agregar ventas) reciben códigos al final sin
+renumerar los existentes; desde entonces el orden de los códigos ya no es el
+de las llaves, lo que no cambia ningún resultado por fila.
+
+Clases:
+    PairIndex: Vocabulario par -> código
+
+Funciones:
+    stable_code_order: Orden estable de filas por código (radix sort)
+"""
+
+from pathlib import Path
+from typing import Optional
+import logging
+
+import numpy as np
+
+from src.joins import MAX_DENSE_SIZE, sorted_lookup
+from src.stats_index import pack_keys
+
+logger = logging.getLogger(__name__)
+
+# Archivo del vocabulario dentro de ``processed/``
+PAIR_INDEX_FILE = "pair_keys.npy"
+
+# Nombre de la columna con el código del par
+PAIR_CODE = "pair_code"
+
+
+def stable_code_order(codes) -> np.ndarray:
+    """
+    Permutación que ordena ``codes`` de forma estable.
+
+    Equivale a ``np.argsort(codes, kind="stable")``, pero ordena por mitades
+    de 16 bits, donde NumPy usa radix sort en O(n).
+
+    Args:
+        codes: Códigos enteros no negativos menores que 2**32
+
+    Returns:
+        np.ndarray: Índices de las filas en orden de código
+    """
+    codes = np.asarray(codes)
+    order = np.argsort((codes & 0xFFFF).astype(np.uint16), kind="stable")
+    high = (codes >> 16).astype(np.uint16)
+    if high.any():
+        order = order[np.argsort(high[order], kind="stable")]
+    return order
+
+
+class PairIndex:
+    """
+    Vocabulario de pares (shop_id, item_id) con códigos int32 densos.
+
+    Attributes:
+        keys (np.ndarray): Llave ``pack_keys`` de cada código (posición = código)
+    """
+
+    def __init__(self, keys: Optional[np.ndarray] = None):
+        """
+        Args:
+            keys (np.ndarray, optional): Llave de cada código; vacío por defecto
+        """
+        self.keys = np.asarray([] if keys is None else keys, dtype=np.int64)
+        self._lookup = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def is_sorted(self) -> bool:
+        """Indica si los códigos siguen el orden de las llaves."""
+        return bool(len(self.keys) < 2 or (self.keys[1:] > self.keys[:-1]).all())
+
+    @classmethod
+    def fit(cls, shop_ids, item_ids) -> tuple:
+        """
+        Construye el vocabulario en orden (shop_id, item_id).
+
+        Con rangos de ids pequeños se factoriza con una tabla densa de
+        presencia (sin ordenar); si no, con ``np.unique``.
+
+        Args:
+            shop_ids: Ids de tienda
+            item_ids: Ids de item
+
+        Returns:
+            tuple: (index, codes) con el vocabulario y el código de cada fila
+        """
+        shops = np.asarray(shop_ids, dtype=np.int64)
+        items = np.asarray(item_ids, dtype=np.int64)
+        if len(shops) == 0:
+            return cls(np.empty(0, dtype=np.int64)), np.empty(0, dtype=np.int32)
+        n_items = int(items.max()) + 1
+        size = (int(shops.max()) + 1) * n_items
+        if shops.min() >= 0 and items.min() >= 0 and size <= MAX_DENSE_SIZE:
+            composite = shops * n_items + items
+            present = np.zeros(size, dtype=bool)
+            present[composite] = True
+            code_of = np.cumsum(present, dtype=np.int64) - 1
+            used = np.flatnonzero(present)
+            keys = pack_keys(used // n_items, used % n_items)
+            codes = code_of[composite]
+        else:
+            keys, codes = np.unique(pack_keys(shops, items), return_inverse=True)
+        if len(keys) >= 2**31:
+            raise ValueError("Demasiados pares shop/item para códigos int32")
+        return cls(keys), codes.ravel().astype(np.int32)
+
+    def _sorted(self) -> tuple:
+        """Llaves ordenadas y el código de cada una (para búsquedas)."""
+        if self._lookup is None:
+            if self.is_sorted:
+                self._lookup = (self.keys, np.arange(len(self.keys), dtype=np.int32))
+            else:
+                order = np.argsort(self.keys, kind="stable")
+                self._lookup = (self.keys[order], order.astype(np.int32))
+        return self._lookup
+
+    def encode(self, shop_ids, item_ids) -> np.ndarray:
+        """
+        Código de cada par.
+
+        Returns:
+            np.ndarray: Códigos int32 (-1 si el par no está en el vocabulario)
+        """
+        sorted_keys, sorted_codes = self._sorted()
+        positions, found = sorted_lookup(pack_keys(shop_ids, item_ids), sorted_keys)
+        return np.where(found, sorted_codes[positions], -1).astype(np.int32)
+
+    def extend(self, shop_ids, item_ids) -> np.ndarray:
+        """
+        Codifica pares agregando al final los que no están en el vocabulario.
+
+        Returns:
+            np.ndarray: Códigos int32 de cada fila
+        """
+        if len(self.keys) == 0:
+            fitted, codes = PairIndex.fit(shop_ids, item_ids)
+            self.keys, self._lookup = fitted.keys, None
+            return codes
+        codes = self.encode(shop_ids, item_ids)
+        unknown = codes < 0
+        if unknown.any():
+            packed = pack_keys(shop_ids, item_ids)[unknown]
+            new_keys, inverse = np.unique(packed, return_inverse=True)
+            codes[unknown] = len(self.keys) + inverse.ravel()
+            if len(self.keys) + len(new_keys) >= 2**31:
+                raise ValueError("Demasiados pares shop/item para códigos int32")
+            self.keys = np.concatenate([self.keys, new_keys])
+            self._lookup = None
+            logger.info(f"{len(new_keys):,} pares shop/item nuevos en el vocabulario")
+        return codes
+
+    def decode(self, codes) -> tuple:
+        """
+        Pares de cada código.
+
+        Returns:
+            tuple: (shop_ids, item_ids) como int64
+        """
+        keys = self.keys[np.asarray(codes)]
+        return keys >> 32, keys & 0xFFFFFFFF
+
+    def save(self, path: Path):
+        """Guarda el vocabulario como un ``.npy``."""
+        np.save(path, self.keys)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["PairIndex"]:
+        """
+        Abre un vocabulario guardado.
+
+        Returns:
+            PairIndex: Vocabulario, o None si no existe
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        return cls(np.load(path))
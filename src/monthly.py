@@ -0,0 +1,159 @@
+"""
+Agregación mensual de ventas por (date_block_num, shop_id, item_id).
+
+El objetivo del modelo es ``item_cnt_month``, pero el camino diario entrena
+sobre una fila por venta. En modo mensual las ventas se reducen primero a una
+fila por mes, tienda e item, y las ventanas por shop/item se calculan sobre esa
+grilla, rezagadas un mes: la fila del mes ``t`` solo ve los meses anteriores
+en los que el par tuvo ventas (grilla dispersa, no calendario completo).
+
+La reducción es una sola pasada vectorizada: una llave empaquetada
+``block << 48 | shop << 32 | item``, un ``np.unique`` y sumas con
+``np.bincount``. El resultado usa tipos compactos (int16/int32/float32).
+
+Para inferencia, el valor sin rezagar de cada ventana en el último mes del par
+es exactamente la feature del mes siguiente; ``monthly_stats`` lo guarda en un
+``HistoricalStats`` con el mismo esquema que el modo diario:
+
+    sales_mean  <- EWM de item_cnt_month
+    sales_std   <- desviación móvil de item_cnt_month
+    price_mean  <- media móvil del precio mensual
+    price_std   <- NaN (no se usa como feature)
+
+Funciones:
+    aggregate_monthly: Ventas diarias -> una fila por mes/tienda/item
+    monthly_windows: Ventanas por shop/item sin rezagar sobre la grilla mensual
+    monthly_stats: Índice histórico para servir features del mes siguiente
+"""
+
+from typing import Dict, Optional, Sequence
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.group_engine import GroupSegments
+from src.incremental import COUNT_WINDOW, EWM_SPAN, PRICE_WINDOW
+from src.stats_index import HistoricalStats, pack_keys
+
+logger = logging.getLogger(__name__)
+
+# Rango del objetivo mensual (como en la competencia)
+MONTHLY_CLIP = (0, 20)
+
+# Bits de cada componente de la llave empaquetada block/shop/item
+_SHOP_BITS = 16
+_ITEM_BITS = 32
+
+
+def aggregate_monthly(sales_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce las ventas diarias a una fila por (date_block_num, shop_id, item_id).
+
+    Args:
+        sales_df (pd.DataFrame): Ventas procesadas con 'date_block_num',
+            'shop_id', 'item_id', 'item_price', 'item_cnt_day', 'month' y 'year'
+
+    Returns:
+        pd.DataFrame: Filas ordenadas por mes, tienda e item con
+            'item_price' (media), 'item_cnt_month' (suma recortada a
+            ``MONTHLY_CLIP``) e 'item_cnt_log' (log1p del anterior)
+    """
+    try:
+        block = sales_df["date_block_num"].to_numpy(np.int64)
+        shop = sales_df["shop_id"].to_numpy(np.int64)
+        item = sales_df["item_id"].to_numpy(np.int64)
+        if len(shop) and (
+            shop.min() < 0 or shop.max() >= 1 << _SHOP_BITS
+            or item.min() < 0 or item.max() >= 1 << _ITEM_BITS
+            or block.min() < 0
+        ):
+            raise ValueError("Ids fuera de rango para la llave mensual empaquetada")
+
+        packed = (block << (_SHOP_BITS + _ITEM_BITS)) | (shop << _ITEM_BITS) | item
+        keys, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        n_keys = len(keys)
+
+        days = np.bincount(inverse, minlength=n_keys)
+        counts = np.bincount(
+            inverse, weights=sales_df["item_cnt_day"].to_numpy(np.float64), minlength=n_keys
+        )
+        price = np.bincount(
+            inverse, weights=sales_df["item_price"].to_numpy(np.float64), minlength=n_keys
+        ) / days
+        counts = np.clip(counts, *MONTHLY_CLIP)
+
+        monthly = pd.DataFrame({
+            "date_block_num": (keys >> (_SHOP_BITS + _ITEM_BITS)).astype(np.int16),
+            "shop_id": ((keys >> _ITEM_BITS) & ((1 << _SHOP_BITS) - 1)).astype(np.int16),
+            "item_id": (keys & ((1 << _ITEM_BITS) - 1)).astype(np.int32),
+            "month": sales_df["month"].to_numpy()[first].astype(np.int8),
+            "year": sales_df["year"].to_numpy()[first].astype(np.int16),
+            "item_price": price.astype(np.float32),
+            "item_cnt_month": counts.astype(np.float32),
+            "item_cnt_log": np.log1p(counts).astype(np.float32),
+        })
+        logger.info(f"Ventas agregadas por mes: {len(sales_df):,} -> {len(monthly):,} filas")
+        return monthly
+
+    except Exception as e:
+        logger.error(f"Error agregando ventas por mes: {str(e)}")
+        raise
+
+
+def monthly_windows(
+    df: pd.DataFrame,
+    segments: Optional[GroupSegments] = None,
+    names: Optional[Sequence[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Ventanas por shop/item sobre la grilla mensual, incluyendo el mes actual.
+
+    Args:
+        df (pd.DataFrame): Salida de ``aggregate_monthly``
+        segments (GroupSegments, optional): Índice por shop/item de ``df``
+        names (Sequence[str], optional): Ventanas a calcular (por defecto todas)
+
+    Returns:
+        dict: 'sales_ema_2m', 'trend_2m' y 'sales_volatility' en el orden de ``df``
+    """
+    segments = segments or GroupSegments.from_frame(df, ["shop_id", "item_id"])
+    counts = df["item_cnt_month"]
+    windows = {
+        "sales_ema_2m": lambda: segments.ewm_mean(counts, span=EWM_SPAN),
+        "trend_2m": lambda: segments.rolling_mean(df["item_price"], window=PRICE_WINDOW),
+        "sales_volatility": lambda: segments.rolling_std(counts, window=COUNT_WINDOW),
+    }
+    return {name: windows[name]() for name in (names or windows)}
+
+
+def monthly_stats(
+    df: pd.DataFrame,
+    items_df: pd.DataFrame,
+    segments: Optional[GroupSegments] = None,
+) -> HistoricalStats:
+    """
+    Índice histórico con el último valor de cada ventana mensual por par.
+
+    Args:
+        df (pd.DataFrame): Salida de ``aggregate_monthly``
+        items_df (pd.DataFrame): Catálogo de items
+        segments (GroupSegments, optional): Índice por shop/item de ``df``
+
+    Returns:
+        HistoricalStats: Índice con las features del mes siguiente por par
+    """
+    segments = segments or GroupSegments.from_frame(df, ["shop_id", "item_id"])
+    windows = monthly_windows(df, segments)
+    last = segments.order[segments.ends]
+
+    keys = pack_keys(df["shop_id"].to_numpy()[last], df["item_id"].to_numpy()[last])
+    pair_stats = np.column_stack([
+        windows["sales_ema_2m"][last],
+        windows["sales_volatility"][last],
+        windows["trend_2m"][last],
+        np.full(len(last), np.nan),
+    ])
+    order = np.argsort(keys, kind="stable")
+    return HistoricalStats.from_pairs(keys[order], pair_stats[order], items_df)
@@ -0,0 +1,208 @@
+"""
+Ejecución en paralelo por partición de tiendas.
+
+Las features de tiempo y precio dependen solo del grupo (shop_id, item_id), por
+lo que las filas pueden repartirse por ``shop_id % n_partitions`` sin cambiar
+el resultado. Las columnas de entrada y salida se comparten con los procesos
+mediante ``multiprocessing.shared_memory``: cada proceso lee su partición
+directamente de la memoria compartida y escribe sus resultados en las mismas
+posiciones de fila, sin serializar DataFrames.
+
+Funciones:
+    parallel_window_features: Features de ventana por shop/item en paralelo
+    parallel_preprocess: Transformaciones fila a fila de ``preprocess_sales`` en paralelo
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, Tuple
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.group_engine import GroupSegments
+
+# Especificación de un arreglo compartido: (nombre del bloque, dtype, forma)
+ArraySpec = Tuple[str, str, Tuple[int, ...]]
+
+
+def default_workers() -> int:
+    """Número de procesos por defecto (CPUs disponibles)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+@contextmanager
+def shared_arrays(
+    inputs: Dict[str, np.ndarray], outputs: Dict[str, Tuple[str, int]]
+) -> Iterator[tuple]:
+    """
+    Copia las entradas a memoria compartida y reserva las salidas.
+
+    Args:
+        inputs (dict): Arreglos de entrada por nombre
+        outputs (dict): (dtype, largo) de cada arreglo de salida
+
+    Yields:
+        tuple: (specs, arrays) especificaciones serializables y vistas locales
+    """
+    blocks = []
+    specs: Dict[str, ArraySpec] = {}
+    arrays: Dict[str, np.ndarray] = {}
+    try:
+        requested = {
+            name: (np.ascontiguousarray(values).dtype.str, values.shape)
+            for name, values in inputs.items()
+        }
+        requested.update({
+            name: (np.dtype(dtype).str, (length,))
+            for name, (dtype, length) in outputs.items()
+        })
+        for name, (dtype, shape) in requested.items():
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            block = shared_memory.SharedMemory(create=True, size=nbytes)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            specs[name] = (block.name, dtype, shape)
+        for name, values in inputs.items():
+            arrays[name][...] = values
+        yield specs, arrays
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+@contextmanager
+def attach(specs: Dict[str, ArraySpec]) -> Iterator[Dict[str, np.ndarray]]:
+    """Abre en un proceso de trabajo los arreglos creados con ``shared_arrays``."""
+    blocks = []
+    arrays = {}
+    try:
+        for name, (block_name, dtype, shape) in specs.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        yield arrays
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+def _numpy_dtype(dtype) -> np.dtype:
+    """dtype NumPy equivalente (las columnas ``pd.ArrowDtype`` no caben en memoria compartida)."""
+    if isinstance(dtype, pd.ArrowDtype):
+        return dtype.numpy_dtype
+    return np.dtype(dtype)
+
+
+def _partition_rows(shop_ids: np.ndarray, part: int, n_parts: int) -> np.ndarray:
+    """Filas (en orden original) de la partición ``part``."""
+    return np.flatnonzero(shop_ids % n_parts == part)
+
+
+def _window_features_worker(part: int, n_parts: int, specs: Dict[str, ArraySpec]):
+    """Calcula las features de ventana de una partición de tiendas."""
+    with attach(specs) as arrays:
+        rows = _partition_rows(arrays["shop_id"], part, n_parts)
+        if len(rows) == 0:
+            return
+        segments = GroupSegments([arrays["shop_id"][rows], arrays["item_id"][rows]])
+        counts = arrays["item_cnt_day"][rows]
+        arrays["sales_ema_2m"][rows] = segments.ewm_mean(counts, span=2)
+        arrays["trend_2m"][rows] = segments.rolling_mean(arrays["item_price"][rows], window=2)
+        arrays["sales_volatility"][rows] = segments.rolling_std(counts, window=3)
+
+
+def _preprocess_worker(part: int, n_parts: int, specs: Dict[str, ArraySpec]):
+    """Aplica las transformaciones fila a fila de una partición de tiendas."""
+    with attach(specs) as arrays:
+        rows = _partition_rows(arrays["shop_id"], part, n_parts)
+        if len(rows) == 0:
+            return
+        dates = pd.DatetimeIndex(arrays["date"][rows])
+        counts = np.clip(arrays["item_cnt_day"][rows], 0, 20)
+        arrays["month"][rows] = dates.month
+        arrays["year"][rows] = dates.year
+        arrays["item_cnt_day_clipped"][rows] = counts
+        arrays["item_cnt_log"][rows] = np.log1p(counts)
+        arrays["keep"][rows] = arrays["item_price"][rows] > 0
+
+
+def _run(
+    worker: Callable,
+    inputs: Dict[str, np.ndarray],
+    outputs: Dict[str, Tuple[str, int]],
+    n_workers: int,
+) -> Dict[str, np.ndarray]:
+    """Ejecuta ``worker`` sobre cada partición y devuelve copias de las salidas."""
+    n_parts = max(1, n_workers)
+    with shared_arrays(inputs, outputs) as (specs, arrays):
+        with ProcessPoolExecutor(max_workers=n_parts) as pool:
+            futures = [pool.submit(worker, part, n_parts, specs) for part in range(n_parts)]
+            for future in futures:
+                future.result()
+        return {name: arrays[name].copy() for name in outputs}
+
+
+def parallel_window_features(df: pd.DataFrame, n_workers: int) -> Dict[str, np.ndarray]:
+    """
+    Calcula ``sales_ema_2m``, ``trend_2m`` y ``sales_volatility`` en paralelo.
+
+    Args:
+        df (pd.DataFrame): Ventas con 'shop_id', 'item_id', 'item_cnt_day' e 'item_price'
+        n_workers (int): Número de procesos (y de particiones)
+
+    Returns:
+        dict: Arreglos por feature, en el orden de ``df`` (sin rellenar NaN)
+    """
+    n = len(df)
+    inputs = {
+        "shop_id": df["shop_id"].to_numpy(),
+        "item_id": df["item_id"].to_numpy(),
+        "item_cnt_day": df["item_cnt_day"].to_numpy(dtype=np.float64),
+        "item_price": df["item_price"].to_numpy(dtype=np.float64),
+    }
+    outputs = {
+        "sales_ema_2m": ("float64", n),
+        "trend_2m": ("float64", n),
+        "sales_volatility": ("float64", n),
+    }
+    return _run(_window_features_worker, inputs, outputs, n_workers)
+
+
+def parallel_preprocess(df: pd.DataFrame, n_workers: int) -> Dict[str, np.ndarray]:
+    """
+    Calcula las columnas de ``preprocess_sales`` en paralelo.
+
+    Args:
+        df (pd.DataFrame): Ventas con 'date' (datetime64[ns]), 'shop_id',
+            'item_price' e 'item_cnt_day'
+        n_workers (int): Número de procesos (y de particiones)
+
+    Returns:
+        dict: 'month', 'year', 'item_cnt_day_clipped', 'item_cnt_log' y 'keep'
+            como arreglos NumPy, aunque ``df`` tenga columnas Arrow
+    """
+    n = len(df)
+    counts_dtype = _numpy_dtype(df["item_cnt_day"].dtype)
+    inputs = {
+        "date": df["date"].to_numpy(dtype="datetime64[ns]"),
+        "shop_id": df["shop_id"].to_numpy(dtype=_numpy_dtype(df["shop_id"].dtype)),
+        "item_price": df["item_price"].to_numpy(dtype=_numpy_dtype(df["item_price"].dtype)),
+        "item_cnt_day": df["item_cnt_day"].to_numpy(dtype=counts_dtype),
+    }
+    outputs = {
+        "month": ("int8", n),
+        "year": ("int16", n),
+        "item_cnt_day_clipped": (counts_dtype, n),
+        "item_cnt_log": (counts_dtype, n),
+        "keep": ("bool", n),
+    }
+    return _run(_preprocess_worker, inputs, outputs, n_workers)
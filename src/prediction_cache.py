@@ -0,0 +1,220 @@
+"""
+Caché de predicciones por par (shop_id, item_id) para el servidor.
+
+Entre refrescos del modelo los servicios consultan una y otra vez los mismos
+pares. La caché guarda la predicción de cada par bajo la versión vigente:
+
+    (versión del modelo, versión del índice histórico, shop_id, item_id)
+
+El primer nivel es un LRU en memoria acotado a ``max_entries`` pares; el
+segundo, opcional, una tabla SQLite compartible entre procesos y que
+sobrevive a reinicios. Al cambiar la versión (``set_version``) el LRU se
+vacía y las filas de versiones anteriores se borran de SQLite, de modo que
+nunca se sirve una predicción de otro modelo u otras estadísticas.
+
+Clases:
+    PredictionCache: LRU en memoria con nivel SQLite opcional y contadores
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+import logging
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.stats_index import pack_keys
+
+logger = logging.getLogger(__name__)
+
+# Parámetros por sentencia SQLite (límite por defecto 999)
+_SQLITE_BATCH = 900
+
+
+class PredictionCache:
+    """
+    Predicciones por par con desalojo LRU y nivel SQLite opcional.
+
+    Attributes:
+        max_entries (int): Pares máximos en memoria
+        sqlite_path (Path): Base SQLite del segundo nivel (None si no se usa)
+        version (tuple): (versión del modelo, versión del índice histórico)
+        hits (int): Pares servidos desde la caché (memoria o SQLite)
+        disk_hits (int): Pares servidos desde SQLite
+        misses (int): Pares que hubo que predecir
+        evictions (int): Pares desalojados de memoria
+        invalidations (int): Cambios de versión
+    """
+
+    def __init__(self, max_entries: int = 100_000, sqlite_path: Optional[Path] = None):
+        """
+        Args:
+            max_entries (int): Pares máximos en memoria
+            sqlite_path (Path, optional): Base SQLite del segundo nivel
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries debe ser al menos 1")
+        self.max_entries = max_entries
+        self.sqlite_path = Path(sqlite_path) if sqlite_path is not None else None
+        self.version: Tuple[str, str] = ("", "")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if self.sqlite_path is not None:
+            self.sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.sqlite_path), check_same_thread=False)
+            # WAL: lectores de otros procesos no bloquean; sin fsync por transacción
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "model_version TEXT, stats_version TEXT, pair INTEGER, value REAL, "
+                "PRIMARY KEY (model_version, stats_version, pair)) WITHOUT ROWID"
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self):
+        """Cierra la base SQLite."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def set_version(self, model_version: str, stats_version: str):
+        """
+        Fija la versión vigente; si cambia, invalida las entradas anteriores.
+
+        Args:
+            model_version (str): Versión del modelo (bundle o huella del archivo)
+            stats_version (str): Versión del índice histórico
+        """
+        version = (str(model_version), str(stats_version))
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version != ("", ""):
+                self.invalidations += 1
+                logger.info(
+                    f"Caché de predicciones invalidada ({len(self._entries):,} pares): "
+                    f"modelo {version[0]}, estadísticas {version[1][:12]}"
+                )
+            self.version = version
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute(
+                    "DELETE FROM predictions WHERE model_version != ? OR stats_version != ?",
+                    version,
+                )
+                self._db.commit()
+
+    def lookup(self, shop_ids, item_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca las predicciones de los pares.
+
+        Args:
+            shop_ids: Ids de tienda
+            item_ids: Ids de item
+
+        Returns:
+            tuple: (valores float64 con NaN donde no hay entrada, máscara de aciertos)
+        """
+        keys = pack_keys(shop_ids, item_ids)
+        values = np.full(len(keys), np.nan)
+        found = np.zeros(len(keys), dtype=bool)
+        with self._lock:
+            entries = self._entries
+            for i, key in enumerate(keys.tolist()):
+                value = entries.get(key)
+                if value is not None:
+                    entries.move_to_end(key)
+                    values[i] = value
+                    found[i] = True
+
+            if self._db is not None and not found.all():
+                pending = np.flatnonzero(~found)
+                stored = self._read(keys[pending].tolist())
+                for i in pending.tolist():
+                    value = stored.get(int(keys[i]))
+                    if value is not None:
+                        values[i] = value
+                        found[i] = True
+                        self.disk_hits += 1
+                        self._put(int(keys[i]), value)
+
+            n_found = int(found.sum())
+            self.hits += n_found
+            self.misses += len(keys) - n_found
+        return values, found
+
+    def store(self, shop_ids, item_ids, values):
+        """
+        Guarda predicciones de pares bajo la versión vigente.
+
+        Args:
+            shop_ids: Ids de tienda
+            item_ids: Ids de item
+            values: Predicciones
+        """
+        keys = pack_keys(shop_ids, item_ids).tolist()
+        values = np.asarray(values, dtype=np.float64).tolist()
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._put(key, value)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                    [(*self.version, key, value) for key, value in zip(keys, values)],
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """
+        Contadores para dimensionar la caché.
+
+        Returns:
+            dict: entries, max_entries, hits, disk_hits, misses, hit_rate,
+            evictions, invalidations
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _put(self, key: int, value: float):
+        """Inserta en memoria y desaloja el par usado hace más tiempo."""
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read(self, keys: list) -> dict:
+        """Predicciones guardadas en SQLite para ``keys`` (versión vigente)."""
+        stored = {}
+        for start in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[start:start + _SQLITE_BATCH]
+            rows = self._db.execute(
+                "SELECT pair, value FROM predictions "
+                "WHERE model_version = ? AND stats_version = ? "
+                f"AND pair IN ({','.join('?' * len(batch))})",
+                (*self.version, *batch),
+            )
+            stored.update(rows)
+        return stored
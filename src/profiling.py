@@ -0,0 +1,251 @@
+"""
+Instrumentación de tiempos y memoria por etapa del pipeline.
+
+El perfilador es global al proceso (como ``logging``): los módulos marcan sus
+etapas con el decorador ``timed`` o el context manager ``stage`` y, si el
+perfilador está activo, cada etapa registra tiempo de pared, tiempo de CPU,
+RSS actual y pico, y número de filas. Al final de la ejecución se escribe un
+reporte JSON. Con el modo detallado también se guardan un perfil de cProfile y
+las mayores asignaciones de tracemalloc. Desactivado, el costo es una sola
+comprobación por llamada.
+
+Funciones:
+    enable: Activa el perfilador
+    stage: Context manager para medir un bloque
+    annotate: Agrega campos al registro de la etapa en curso
+    timed: Decorador para medir una función o método
+    write_report: Escribe el reporte JSON (y los perfiles detallados)
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+import cProfile
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_mb() -> float:
+    """RSS actual del proceso en MB (0 si no está disponible)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    """RSS máximo del proceso en MB desde su inicio."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS reporta bytes
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+class RunProfiler:
+    """
+    Registro de etapas de una ejecución.
+
+    Attributes:
+        enabled (bool): Si se registran etapas
+        report_path (Path): Ruta del reporte JSON
+        deep (bool): Guardar cProfile y tracemalloc
+        stages (list): Registros de etapas en orden de término
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.report_path: Optional[Path] = None
+        self.deep = False
+        self.stages = []
+        self._stack = []
+        self._started = None
+        self._t0 = None
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    def enable(self, report_path: Path, deep: bool = False):
+        """
+        Activa el perfilador.
+
+        Args:
+            report_path (Path): Ruta del reporte JSON
+            deep (bool): Además, perfilar con cProfile y tracemalloc
+        """
+        self.enabled = True
+        self.report_path = Path(report_path)
+        self.deep = deep
+        self.stages = []
+        self._started = datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        if deep:
+            tracemalloc.start()
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Mide un bloque de código.
+
+        Yields:
+            dict: Registro de la etapa; se puede asignar ``record["rows"]``
+        """
+        if not self.enabled:
+            yield {}
+            return
+
+        record = {"name": name, "depth": len(self._stack), "rows": None}
+        if self.deep:
+            if self._stack:
+                parent = self._stack[-1]
+                parent["_py_peak"] = max(
+                    parent["_py_peak"], tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+            record["_py_peak"] = 0
+        self._stack.append(record)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        rss_start = _rss_mb()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall, 4)
+            record["cpu_s"] = round(time.process_time() - cpu, 4)
+            record["rss_mb"] = round(_rss_mb(), 1)
+            record["rss_delta_mb"] = round(record["rss_mb"] - rss_start, 1)
+            record["rss_peak_mb"] = round(_peak_rss_mb(), 1)
+            self._stack.pop()
+            if self.deep:
+                peak = max(record.pop("_py_peak"), tracemalloc.get_traced_memory()[1])
+                record["py_alloc_peak_mb"] = round(peak / 1024**2, 1)
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent["_py_peak"] = max(parent["_py_peak"], peak)
+                tracemalloc.reset_peak()
+            self.stages.append(record)
+            logger.debug(f"Etapa {name}: {record['wall_s']:.3f}s")
+
+    def annotate(self, **fields):
+        """Agrega campos al registro de la etapa en curso (si hay una)."""
+        if self.enabled and self._stack:
+            self._stack[-1].update(fields)
+
+    def write_report(self, extra: Optional[dict] = None) -> Optional[Path]:
+        """
+        Escribe el reporte JSON y, en modo detallado, los perfiles.
+
+        Args:
+            extra (dict, optional): Datos adicionales para el reporte
+
+        Returns:
+            Path: Ruta del reporte, o None si el perfilador está inactivo
+        """
+        if not self.enabled:
+            return None
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "script": Path(sys.argv[0]).name,
+            "started": self._started,
+            "total_wall_s": round(time.perf_counter() - self._t0, 4),
+            "rss_peak_mb": round(_peak_rss_mb(), 1),
+            "stages": self.stages,
+            **(extra or {}),
+        }
+        if self.deep:
+            self._cprofile.disable()
+            prof_path = self.report_path.with_suffix(".prof")
+            self._cprofile.dump_stats(prof_path)
+            snapshot = tracemalloc.take_snapshot()
+            top = snapshot.statistics("lineno")[:25]
+            alloc_path = self.report_path.with_suffix(".tracemalloc.txt")
+            alloc_path.write_text("\n".join(str(stat) for stat in top) + "\n")
+            report["cprofile"] = str(prof_path)
+            report["tracemalloc"] = str(alloc_path)
+        with open(self.report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Reporte de perfilado guardado en: {self.report_path}")
+        return self.report_path
+
+
+# Perfilador del proceso
+profiler = RunProfiler()
+
+
+def enable(report_path: Path, deep: bool = False):
+    """Activa el perfilador del proceso (ver ``RunProfiler.enable``)."""
+    profiler.enable(report_path, deep)
+
+
+def stage(name: str):
+    """Context manager para medir un bloque (ver ``RunProfiler.stage``)."""
+    return profiler.stage(name)
+
+
+def annotate(**fields):
+    """Agrega campos a la etapa en curso (ver ``RunProfiler.annotate``)."""
+    profiler.annotate(**fields)
+
+
+def write_report(extra: Optional[dict] = None) -> Optional[Path]:
+    """Escribe el reporte del perfilador del proceso."""
+    return profiler.write_report(extra)
+
+
+def _count_rows(result) -> Optional[int]:
+    """Filas del resultado (DataFrame, arreglo o primer elemento de una tupla)."""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """
+    Decorador que mide una función como etapa y registra las filas del resultado.
+
+    Args:
+        name (str, optional): Nombre de la etapa; por defecto el de la función
+    """
+
+    def decorator(func: Callable) -> Callable:
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                record["rows"] = _count_rows(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def add_profiling_args(parser):
+    """Agrega las opciones de perfilado a un ``argparse.ArgumentParser``."""
+    parser.add_argument('--profile', type=str, default=None,
+                      help='Write a JSON run report with per-stage time and memory')
+    parser.add_argument('--profile-deep', action='store_true',
+                      help='With --profile, also dump cProfile stats and tracemalloc top allocations')
+    return parser
+
+
+def configure_from_args(args):
+    """Activa el perfilador si se pidió ``--profile``."""
+    if args.profile:
+        enable(Path(args.profile), deep=args.profile_deep)
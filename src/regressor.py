@@ -0,0 +1,120 @@
+"""
+Booster entrenado con la interfaz de ``LGBMRegressor``.
+
+``train.py`` entrena con ``lgb.train`` sobre un Dataset cacheado, que devuelve
+un ``lightgbm.Booster``. ``model.joblib`` guardaba antes un ``LGBMRegressor``,
+así que el Booster se envuelve en un objeto con la misma interfaz de uso
+(``predict``, ``score``, ``booster_``, ``best_iteration_``,
+``feature_importances_``, ...) construido solo con la API pública de LightGBM.
+
+Clases:
+    BoosterRegressor: Booster con la interfaz de ``LGBMRegressor``
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+class BoosterRegressor:
+    """
+    Envoltorio de un ``lightgbm.Booster`` compatible con ``LGBMRegressor``.
+
+    Attributes:
+        booster_ (lightgbm.Booster): Modelo entrenado
+        params (dict): Parámetros del entrenamiento (nombres de la API sklearn)
+        evals_result_ (dict): Métricas registradas por conjunto de validación
+        importance_type (str): Tipo de ``feature_importances_`` ("split" o "gain")
+    """
+
+    def __init__(
+        self,
+        booster,
+        params: Optional[dict] = None,
+        evals_result: Optional[dict] = None,
+        importance_type: str = "split",
+    ):
+        """
+        Args:
+            booster (lightgbm.Booster): Modelo entrenado
+            params (dict, optional): Parámetros del entrenamiento
+            evals_result (dict, optional): Salida de ``lgb.record_evaluation``
+            importance_type (str): Tipo de ``feature_importances_``
+        """
+        self.booster_ = booster
+        self.params = dict(params or {})
+        self.evals_result_ = evals_result or {}
+        self.importance_type = importance_type
+
+    @property
+    def best_iteration_(self) -> int:
+        """Mejor iteración (0 sin early stopping, como ``LGBMRegressor``)."""
+        return self.booster_.best_iteration
+
+    @property
+    def best_score_(self) -> dict:
+        """Última métrica de cada conjunto de validación."""
+        return {
+            name: {metric: values[-1] for metric, values in metrics.items()}
+            for name, metrics in self.evals_result_.items()
+        }
+
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        """Importancia de cada feature según ``importance_type``."""
+        return self.booster_.feature_importance(importance_type=self.importance_type)
+
+    @property
+    def feature_name_(self) -> list:
+        """Nombres de las features del modelo."""
+        return self.booster_.feature_name()
+
+    @property
+    def n_features_(self) -> int:
+        """Número de features del modelo."""
+        return self.booster_.num_feature()
+
+    @property
+    def n_features_in_(self) -> int:
+        """Número de features del modelo (alias de sklearn)."""
+        return self.booster_.num_feature()
+
+    @property
+    def n_estimators_(self) -> int:
+        """Árboles entrenados."""
+        return self.booster_.current_iteration()
+
+    @property
+    def objective_(self) -> str:
+        """Objetivo del entrenamiento."""
+        return self.params.get("objective", "regression")
+
+    def get_params(self, deep: bool = True) -> dict:
+        """Parámetros del entrenamiento."""
+        return dict(self.params)
+
+    def predict(self, X, raw_score: bool = False, num_iteration: Optional[int] = None, **kwargs):
+        """
+        Predice con el Booster.
+
+        Args:
+            X: Matriz (n_rows, n_features) o DataFrame
+            raw_score (bool): Devolver el puntaje sin transformar
+            num_iteration (int, optional): Árboles a usar (por defecto la mejor
+                iteración o todos)
+            **kwargs: Argumentos adicionales de ``Booster.predict``
+
+        Returns:
+            np.ndarray: Predicciones
+        """
+        if num_iteration is None and self.best_iteration_ > 0:
+            num_iteration = self.best_iteration_
+        return self.booster_.predict(
+            X, raw_score=raw_score, num_iteration=num_iteration, **kwargs
+        )
+
+    def score(self, X, y) -> float:
+        """R² de las predicciones sobre ``(X, y)``, como ``LGBMRegressor.score``."""
+        from sklearn.metrics import r2_score
+
+        return r2_score(y, self.predict(X))
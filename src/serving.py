@@ -0,0 +1,321 @@
+"""
+Componentes para servir predicciones con baja latencia.
+
+El ``Predictor`` vigila la versión del modelo (bundle o ``model.joblib``) y
+del índice histórico: si cambian en disco, los recarga e invalida su caché de
+predicciones (``src/prediction_cache.py``).
+
+Clases:
+    Predictor: Modelo y estadísticas históricas cargados una sola vez
+    MicroBatcher: Agrupa solicitudes concurrentes en una sola llamada a ``predict``
+"""
+
+from pathlib import Path
+from typing import Callable, List, Optional
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.bundle import LATEST_FILE, MANIFEST_FILE, ModelBundle, resolve_bundle
+from src.feature_engineering import FeatureEngineer
+from src.prediction_cache import PredictionCache
+from src.stage_cache import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class Predictor:
+    """
+    Predictor en memoria para pares (shop_id, item_id).
+
+    Attributes:
+        model (ModelBundle): Modelo con su scaler
+        engineer (FeatureEngineer): Ingeniero de features
+        stats (HistoricalStats): Índice de estadísticas históricas
+        cache (PredictionCache): Caché de predicciones (None si no se usa)
+        model_version (str): Versión del modelo cargado
+        stats_version (str): Versión del índice histórico cargado
+        reloads (int): Recargas por cambios en disco
+    """
+
+    def __init__(
+        self,
+        data_path: Path,
+        model_path: Path,
+        fast_predict: Optional[str] = None,
+        num_threads: int = 0,
+        bundle_path: Optional[Path] = None,
+        cache: Optional[PredictionCache] = None,
+        check_interval_s: float = 1.0,
+        require_bundle: bool = False,
+    ):
+        """
+        Carga el modelo y el índice histórico.
+
+        Args:
+            data_path (Path): Ruta base de los datos (con ``processed/``)
+            model_path (Path): Ruta del modelo entrenado (sin bundle)
+            fast_predict (str, optional): Backend de ``FastPredictor``
+                ("booster" o "numpy"); None usa ``model.predict``, o "numpy"
+                con un bundle
+            num_threads (int): Hilos de LightGBM para el backend booster
+            bundle_path (Path, optional): Bundle versionado; si existe, el
+                modelo, el scaler y el índice histórico se toman de él
+            cache (PredictionCache, optional): Caché de predicciones por par
+            check_interval_s (float): Segundos mínimos entre revisiones de la
+                versión del modelo y del índice en disco
+            require_bundle (bool): Fallar si no existe ``bundle_path`` en lugar
+                de usar ``model_path`` (para un bundle pedido explícitamente)
+
+        Raises:
+            FileNotFoundError: Si ``require_bundle`` y no existe el bundle
+        """
+        self.data_path = Path(data_path)
+        self.model_path = Path(model_path)
+        self.bundle_path = Path(bundle_path) if bundle_path is not None else None
+        self.fast_predict = fast_predict
+        self.num_threads = num_threads
+        self.cache = cache
+        self.check_interval_s = check_interval_s
+        self.reloads = 0
+        self._checked = time.monotonic()
+        if require_bundle and not self._has_bundle():
+            raise FileNotFoundError(f"No existe el bundle {self.bundle_path}")
+        self._load(self.versions())
+
+    def _has_bundle(self) -> bool:
+        """Indica si hay un bundle en ``bundle_path``."""
+        return self.bundle_path is not None and (
+            (self.bundle_path / LATEST_FILE).exists()
+            or (self.bundle_path / MANIFEST_FILE).exists()
+        )
+
+    def versions(self) -> tuple:
+        """
+        Versiones en disco del modelo y del índice histórico.
+
+        Returns:
+            tuple: (versión del bundle o huella de ``model.joblib``, huella del índice)
+        """
+        if self._has_bundle():
+            directory = resolve_bundle(self.bundle_path)
+            return directory.name, file_fingerprint(directory / "historical_stats")
+        engineer = FeatureEngineer(self.data_path)
+        return file_fingerprint(self.model_path), file_fingerprint(engineer.stats_path)
+
+    def _load(self, versions: tuple):
+        """Carga modelo, columnas e índice y fija la versión de la caché."""
+        engineer = FeatureEngineer(self.data_path)
+        if self._has_bundle():
+            model = ModelBundle.open(
+                self.bundle_path, self.fast_predict or "numpy", self.num_threads
+            )
+            engineer.match_columns(model.feature_columns)
+            stats = model.stats
+        else:
+            import joblib
+
+            engineer.match_columns()
+            model = ModelBundle.from_model(
+                joblib.load(self.model_path),
+                joblib.load(engineer.prep_path / "scaler.joblib"),
+                engineer._get_feature_columns(),
+                self.fast_predict,
+                self.num_threads,
+            )
+            stats = engineer.load_historical_stats()
+        if stats is None:
+            raise FileNotFoundError(
+                f"No existe el índice histórico en {engineer.stats_path}; "
+                "ejecute train.py primero"
+            )
+        self.engineer, self.model, self.stats = engineer, model, stats
+        self.model_version, self.stats_version = versions
+        if self.cache is not None:
+            self.cache.set_version(*versions)
+
+    def refresh(self) -> bool:
+        """
+        Recarga el modelo y el índice si su versión en disco cambió.
+
+        Revisa como máximo una vez cada ``check_interval_s``. Si la recarga
+        falla (p. ej. un entrenamiento escribiendo el modelo), se sigue con el
+        modelo cargado y se reintenta en la siguiente revisión.
+
+        Returns:
+            bool: Si se recargó
+        """
+        now = time.monotonic()
+        if now - self._checked < self.check_interval_s:
+            return False
+        self._checked = now
+        try:
+            versions = self.versions()
+            if versions == (self.model_version, self.stats_version):
+                return False
+            logger.info(f"Modelo o índice histórico modificados; recargando ({versions[0]})")
+            self._load(versions)
+            self.reloads += 1
+            return True
+        except Exception as e:
+            logger.error(f"Error recargando el modelo: {str(e)}")
+            return False
+
+    def predict(self, shop_ids, item_ids) -> np.ndarray:
+        """
+        Predice ventas mensuales para pares (shop_id, item_id).
+
+        Con caché, solo los pares sin entrada en la versión vigente pasan por
+        las features y el modelo.
+
+        Args:
+            shop_ids: Ids de tienda
+            item_ids: Ids de item
+
+        Returns:
+            np.ndarray: Predicciones ``item_cnt_month``
+        """
+        self.refresh()
+        if self.cache is None:
+            return self._score(shop_ids, item_ids)
+
+        shop_ids = np.asarray(shop_ids, dtype=np.int64)
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        values, found = self.cache.lookup(shop_ids, item_ids)
+        if not found.all():
+            missing = ~found
+            predictions = self._score(shop_ids[missing], item_ids[missing])
+            values[missing] = predictions
+            self.cache.store(shop_ids[missing], item_ids[missing], predictions)
+        return values
+
+    def _score(self, shop_ids, item_ids) -> np.ndarray:
+        """Calcula features y predice (sin caché)."""
+        pairs = pd.DataFrame({"shop_id": shop_ids, "item_id": item_ids})
+        features = self.engineer.create_test_features_from_stats(pairs, self.stats)
+        return self.model.predict(features)
+
+
+class _Request:
+    """Solicitud pendiente dentro del micro-batcher."""
+
+    __slots__ = ("shop_ids", "item_ids", "done", "result", "error")
+
+    def __init__(self, shop_ids: np.ndarray, item_ids: np.ndarray):
+        self.shop_ids = shop_ids
+        self.item_ids = item_ids
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Agrupa solicitudes concurrentes y las evalúa en una sola llamada.
+
+    Un hilo de trabajo toma la primera solicitud en cola y espera hasta
+    ``max_wait_ms`` (o hasta reunir ``max_batch_size`` filas) para juntar
+    más solicitudes antes de llamar a ``score_fn``.
+
+    Attributes:
+        max_batch_size (int): Filas máximas por lote
+        max_wait_ms (float): Ventana de espera para completar un lote
+        batches (int): Lotes evaluados
+        requests (int): Solicitudes atendidas
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[np.ndarray, np.ndarray], np.ndarray],
+        max_batch_size: int = 4096,
+        max_wait_ms: float = 2.0,
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.requests = 0
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "MicroBatcher":
+        """Inicia el hilo de trabajo."""
+        self._worker.start()
+        return self
+
+    def stop(self):
+        """Detiene el hilo de trabajo."""
+        self._stop.set()
+        self._worker.join()
+
+    def submit(self, shop_ids, item_ids) -> np.ndarray:
+        """
+        Encola una solicitud y espera su resultado.
+
+        Args:
+            shop_ids: Ids de tienda
+            item_ids: Ids de item
+
+        Returns:
+            np.ndarray: Predicciones para la solicitud
+        """
+        request = _Request(
+            np.asarray(shop_ids, dtype=np.int64), np.asarray(item_ids, dtype=np.int64)
+        )
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self) -> List[_Request]:
+        """Reúne las solicitudes de un lote."""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        rows = len(first.shop_ids)
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request.shop_ids)
+        return batch
+
+    def _run(self):
+        """Ciclo del hilo de trabajo."""
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                predictions = self.score_fn(
+                    np.concatenate([r.shop_ids for r in batch]),
+                    np.concatenate([r.item_ids for r in batch]),
+                )
+                offset = 0
+                for request in batch:
+                    n = len(request.shop_ids)
+                    request.result = predictions[offset:offset + n]
+                    offset += n
+            except Exception as e:
+                logger.error(f"Error evaluando lote: {str(e)}")
+                for request in batch:
+                    request.error = e
+            finally:
+                self.batches += 1
+                self.requests += len(batch)
+                for request in batch:
+                    request.done.set()
@@ -0,0 +1,239 @@
+"""
+Evaluación de varios modelos sobre las mismas features (champion/challenger/shadow).
+
+Al desplegar un modelo reentrenado se comparan varias versiones sobre el mismo
+conjunto de test. Las features se construyen una sola vez; cada lote se evalúa
+con todos los modelos en un pool de hilos (LightGBM libera el GIL durante
+``predict`` y el backend numpy opera sobre arreglos completos), y se acumulan
+estadísticas por modelo y diferencias contra el primero (el champion), de modo
+que el reporte no requiere guardar las predicciones en memoria.
+
+Clases:
+    PredictionSummary: Conteo, media, desviación, mínimo y máximo acumulados
+    PredictionDiff: Diferencias acumuladas entre dos modelos
+    ShadowScorer: Evalúa los modelos en paralelo y arma el reporte
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionSummary:
+    """
+    Estadísticas de predicciones acumuladas por lotes.
+
+    Attributes:
+        count (int): Filas acumuladas
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._total = 0.0
+        self._total_sq = 0.0
+        self._low = np.inf
+        self._high = -np.inf
+
+    def update(self, predictions: np.ndarray):
+        """Agrega un lote de predicciones."""
+        values = np.asarray(predictions, dtype=np.float64)
+        self.count += len(values)
+        self._total += values.sum()
+        self._total_sq += np.square(values).sum()
+        self._low = min(self._low, values.min(initial=np.inf))
+        self._high = max(self._high, values.max(initial=-np.inf))
+
+    def to_dict(self) -> dict:
+        """
+        Resumen de las predicciones.
+
+        Returns:
+            dict: count, mean, std, min, max (ceros si no hay filas)
+        """
+        if not self.count:
+            return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+        mean = self._total / self.count
+        return {
+            "count": self.count,
+            "mean": mean,
+            "std": float(np.sqrt(max(self._total_sq / self.count - mean**2, 0.0))),
+            "min": float(self._low),
+            "max": float(self._high),
+        }
+
+
+class PredictionDiff:
+    """
+    Diferencias acumuladas entre las predicciones de un modelo y las de referencia.
+
+    Attributes:
+        threshold (float): Diferencia absoluta a partir de la cual una fila cambia
+        count (int): Filas acumuladas
+    """
+
+    def __init__(self, threshold: float = 0.5):
+        self.threshold = threshold
+        self.count = 0
+        self._changed = 0
+        self._max_abs = 0.0
+        # Sumas de d, |d|, d², a, b, a², b² (a: referencia, b: comparado) y de a·b
+        self._sums = np.zeros(7)
+        self._cross = 0.0
+
+    def update(self, reference: np.ndarray, predictions: np.ndarray):
+        """
+        Agrega un lote.
+
+        Args:
+            reference (np.ndarray): Predicciones del modelo de referencia
+            predictions (np.ndarray): Predicciones del modelo comparado
+        """
+        a = np.asarray(reference, dtype=np.float64)
+        b = np.asarray(predictions, dtype=np.float64)
+        diff = b - a
+        abs_diff = np.abs(diff)
+        self.count += len(diff)
+        self._changed += int(np.count_nonzero(abs_diff > self.threshold))
+        self._max_abs = max(self._max_abs, abs_diff.max(initial=0.0))
+        self._sums += [
+            diff.sum(), abs_diff.sum(), np.dot(diff, diff),
+            a.sum(), b.sum(), np.dot(a, a), np.dot(b, b),
+        ]
+        self._cross += np.dot(a, b)
+
+    def to_dict(self) -> dict:
+        """
+        Resumen de las diferencias (predicción - referencia).
+
+        Returns:
+            dict: mean_diff, mean_abs_diff, max_abs_diff, rmse, corr,
+            changed_rows y changed_share (filas con diferencia > ``threshold``)
+        """
+        n = max(self.count, 1)
+        d, abs_d, d2, sa, sb, saa, sbb = self._sums
+        cov = self._cross / n - (sa / n) * (sb / n)
+        var_a = max(saa / n - (sa / n) ** 2, 0.0)
+        var_b = max(sbb / n - (sb / n) ** 2, 0.0)
+        corr = cov / np.sqrt(var_a * var_b) if var_a > 0 and var_b > 0 else None
+        return {
+            "rows": self.count,
+            "mean_diff": d / n,
+            "mean_abs_diff": abs_d / n,
+            "max_abs_diff": float(self._max_abs),
+            "rmse": float(np.sqrt(d2 / n)),
+            "corr": None if corr is None else float(corr),
+            "threshold": self.threshold,
+            "changed_rows": self._changed,
+            "changed_share": self._changed / n,
+        }
+
+
+class ShadowScorer:
+    """
+    Evalúa varios modelos sobre las mismas features en un pool de hilos.
+
+    El primer modelo es la referencia (champion) del reporte de diferencias.
+
+    Attributes:
+        models (dict): nombre -> modelo con ``predict(features)``
+        reference (str): Nombre del modelo de referencia
+        summaries (dict): nombre -> ``PredictionSummary``
+        diffs (dict): nombre -> ``PredictionDiff`` contra la referencia
+        seconds (dict): nombre -> tiempo acumulado de ``predict``
+    """
+
+    def __init__(
+        self, models: Dict[str, object], workers: Optional[int] = None, threshold: float = 0.5
+    ):
+        """
+        Args:
+            models (dict): nombre -> modelo, en orden (el primero es la referencia)
+            workers (int, optional): Hilos del pool (por defecto uno por modelo)
+            threshold (float): Diferencia absoluta que cuenta como fila cambiada
+        """
+        if not models:
+            raise ValueError("Se necesita al menos un modelo")
+        self.models = dict(models)
+        self.reference = next(iter(self.models))
+        self.summaries = {name: PredictionSummary() for name in self.models}
+        self.diffs = {
+            name: PredictionDiff(threshold) for name in self.models if name != self.reference
+        }
+        self.seconds = {name: 0.0 for name in self.models}
+        workers = min(workers or len(self.models), len(self.models))
+        self._executor = ThreadPoolExecutor(workers) if workers > 1 else None
+
+    def __enter__(self) -> "ShadowScorer":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Libera el pool de hilos."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _predict(self, name: str, features) -> tuple:
+        """Predice con un modelo y mide el tiempo."""
+        start = time.perf_counter()
+        predictions = self.models[name].predict(features)
+        return predictions, time.perf_counter() - start
+
+    def score(self, features) -> Dict[str, np.ndarray]:
+        """
+        Predice un lote con todos los modelos y acumula estadísticas.
+
+        Args:
+            features: Features sin escalar (las columnas de todos los modelos)
+
+        Returns:
+            dict: nombre -> predicciones
+        """
+        if self._executor is None:
+            results = {name: self._predict(name, features) for name in self.models}
+        else:
+            futures = {
+                name: self._executor.submit(self._predict, name, features)
+                for name in self.models
+            }
+            results = {name: future.result() for name, future in futures.items()}
+
+        predictions = {}
+        for name, (values, seconds) in results.items():
+            predictions[name] = values
+            self.seconds[name] += seconds
+            self.summaries[name].update(values)
+        for name, diff in self.diffs.items():
+            diff.update(predictions[self.reference], predictions[name])
+        return predictions
+
+    def report(self, sources: Optional[Dict[str, dict]] = None) -> dict:
+        """
+        Reporte de diferencias contra la referencia.
+
+        Args:
+            sources (dict, optional): nombre -> metadatos del modelo (ruta, versión)
+
+        Returns:
+            dict: reference, models (resumen, tiempo y metadatos) y diffs
+        """
+        sources = sources or {}
+        return {
+            "reference": self.reference,
+            "models": {
+                name: {
+                    **sources.get(name, {}),
+                    "summary": self.summaries[name].to_dict(),
+                    "predict_s": self.seconds[name],
+                }
+                for name in self.models
+            },
+            "diffs": {name: diff.to_dict() for name, diff in self.diffs.items()},
+        }
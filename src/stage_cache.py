@@ -0,0 +1,216 @@
+"""
+Caché direccionada por contenido para las etapas del pipeline.
+
+Cada etapa (prep -> features -> train) se identifica por una huella de sus
+entradas: archivos de entrada (hash o mtime/tamaño), parámetros relevantes y la
+versión del código fuente que la ejecuta. Si la huella ya existe en la caché,
+los resultados se restauran en lugar de recalcularse. Las entradas se desalojan
+por LRU cuando la caché supera el tamaño máximo.
+
+Clases:
+    StageCache: Caché de resultados por etapa
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import logging
+import shutil
+import time
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def file_fingerprint(path: Path, mode: str = "mtime") -> str:
+    """
+    Huella de un archivo o directorio.
+
+    Args:
+        path (Path): Archivo o directorio
+        mode (str): "mtime" (tamaño y fecha de modificación) o "hash" (SHA-256
+            del contenido)
+
+    Returns:
+        str: Huella; "missing" si no existe
+    """
+    path = Path(path)
+    if not path.exists():
+        return "missing"
+    if path.is_dir():
+        digest = hashlib.sha256()
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(str(child.relative_to(path)).encode())
+            digest.update(file_fingerprint(child, mode).encode())
+        return digest.hexdigest()
+    if mode == "mtime":
+        stat = path.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    if mode != "hash":
+        raise ValueError(f"Modo de huella no soportado: {mode}")
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(paths: Iterable[Path]) -> str:
+    """
+    Huella del código fuente (contenido de los archivos indicados).
+
+    Args:
+        paths (Iterable[Path]): Archivos o directorios de código
+
+    Returns:
+        str: SHA-256 combinado
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob("*.py")) if path.is_dir() else [path]
+        for file in files:
+            digest.update(file.name.encode())
+            digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    """Tamaño total en bytes de un directorio."""
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+class StageCache:
+    """
+    Caché de resultados por etapa con desalojo LRU.
+
+    Attributes:
+        directory (Path): Directorio de la caché
+        max_bytes (int): Tamaño máximo total
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 10 * 1024**3):
+        """
+        Inicializa la caché.
+
+        Args:
+            directory (Path): Directorio de la caché
+            max_bytes (int): Tamaño máximo total (por defecto 10 GiB)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(stage: str, **parts) -> str:
+        """
+        Calcula la llave de una etapa a partir de sus entradas.
+
+        Args:
+            stage (str): Nombre de la etapa
+            **parts: Entradas serializables a JSON (huellas, parámetros, etc.)
+
+        Returns:
+            str: Llave hexadecimal
+        """
+        payload = json.dumps({"stage": stage, **parts}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _entry(self, stage: str, key: str) -> Path:
+        return self.directory / stage / key
+
+    def get(self, stage: str, key: str) -> Optional[Path]:
+        """
+        Busca una entrada y actualiza su último uso.
+
+        Returns:
+            Path: Directorio de la entrada, o None si no existe
+        """
+        entry = self._entry(stage, key)
+        meta_path = entry / "meta.json"
+        if not meta_path.exists():
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta["last_used"] = time.time()
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+        logger.info(f"Caché: etapa '{stage}' encontrada ({key})")
+        return entry
+
+    def metadata(self, entry: Path) -> dict:
+        """Metadatos guardados con una entrada."""
+        with open(entry / "meta.json") as f:
+            return json.load(f).get("extra", {})
+
+    def put(
+        self, stage: str, key: str, files: Dict[str, Path], extra: Optional[dict] = None
+    ) -> Path:
+        """
+        Guarda los resultados de una etapa.
+
+        Args:
+            stage (str): Nombre de la etapa
+            key (str): Llave de la etapa
+            files (dict): Nombre dentro de la entrada -> archivo o directorio
+            extra (dict, optional): Metadatos adicionales (ej. métricas)
+
+        Returns:
+            Path: Directorio de la entrada
+        """
+        entry = self._entry(stage, key)
+        tmp = entry.with_name(f".{key}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, source in files.items():
+            source = Path(source)
+            if source.is_dir():
+                shutil.copytree(source, tmp / name)
+            else:
+                shutil.copy2(source, tmp / name)
+        with open(tmp / "meta.json", "w") as f:
+            json.dump({"last_used": time.time(), "extra": extra or {}}, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        tmp.rename(entry)
+        logger.info(f"Caché: etapa '{stage}' guardada ({key})")
+        self.evict()
+        return entry
+
+    @staticmethod
+    def restore(entry: Path, files: Dict[str, Path]):
+        """
+        Copia los resultados de una entrada a sus destinos.
+
+        Se conservan las fechas de modificación para que las huellas de las
+        etapas siguientes no cambien.
+
+        Args:
+            entry (Path): Directorio de la entrada
+            files (dict): Nombre dentro de la entrada -> destino
+        """
+        for name, destination in files.items():
+            source = entry / name
+            destination = Path(destination)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            if source.is_dir():
+                shutil.rmtree(destination, ignore_errors=True)
+                shutil.copytree(source, destination)
+            else:
+                shutil.copy2(source, destination)
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta respetar ``max_bytes``."""
+        entries = []
+        for meta_path in self.directory.glob("*/*/meta.json"):
+            with open(meta_path) as f:
+                last_used = json.load(f)["last_used"]
+            entries.append((last_used, meta_path.parent, _dir_size(meta_path.parent)))
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            logger.info(f"Caché: entrada desalojada {entry.parent.name}/{entry.name}")
@@ -0,0 +1,231 @@
+"""
+Índice precalculado de estadísticas históricas para inferencia.
+
+En entrenamiento se resume el historial de ventas en una tabla compacta por
+(shop_id, item_id) y por categoría. La tabla se guarda como arreglos ``.npy``
+ordenados por una llave empaquetada ``shop_id << 32 | item_id``, de modo que en
+inferencia basta con abrirlos (memory-mapped) y hacer una búsqueda binaria
+vectorizada por fila de test, sin recorrer el historial.
+
+Clases:
+    HistoricalStats: Estadísticas por shop/item y por categoría
+"""
+
+from pathlib import Path
+from typing import Optional
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.joins import sorted_lookup
+
+logger = logging.getLogger(__name__)
+
+# Columnas por (shop_id, item_id), en el orden en que se guardan
+PAIR_STATS = ["sales_mean", "sales_std", "price_mean", "price_std"]
+
+
+def pack_keys(shop_ids, item_ids) -> np.ndarray:
+    """
+    Empaqueta pares (shop_id, item_id) en una llave int64.
+
+    Args:
+        shop_ids: Ids de tienda
+        item_ids: Ids de item
+
+    Returns:
+        np.ndarray: Llaves empaquetadas
+    """
+    shops = np.asarray(shop_ids, dtype=np.int64)
+    items = np.asarray(item_ids, dtype=np.int64)
+    return (shops << 32) | items
+
+
+def _grouped_mean_std(inverse: np.ndarray, n_groups: int, values) -> tuple:
+    """Media y desviación estándar (ddof=1) por grupo con ``np.bincount``."""
+    x = np.asarray(values, dtype=np.float64)
+    count = np.bincount(inverse, minlength=n_groups)
+    mean = np.bincount(inverse, weights=x, minlength=n_groups) / count
+    sq_dev = np.bincount(inverse, weights=(x - mean[inverse]) ** 2, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(sq_dev / (count - 1))
+    std[count < 2] = np.nan
+    return mean, std
+
+
+def grouped_pair_stats(inverse: np.ndarray, n_groups: int, sales_df: pd.DataFrame) -> np.ndarray:
+    """
+    Matriz ``PAIR_STATS`` por grupo (p. ej. por ``pair_code``).
+
+    Args:
+        inverse (np.ndarray): Grupo de cada fila de ventas, en [0, n_groups)
+        n_groups (int): Número de grupos
+        sales_df (pd.DataFrame): Ventas con 'item_cnt_day' e 'item_price'
+
+    Returns:
+        np.ndarray: Matriz (n_groups, 4); NaN en grupos sin ventas
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sales_mean, sales_std = _grouped_mean_std(inverse, n_groups, sales_df["item_cnt_day"])
+        price_mean, price_std = _grouped_mean_std(inverse, n_groups, sales_df["item_price"])
+    return np.column_stack([sales_mean, sales_std, price_mean, price_std])
+
+
+class HistoricalStats:
+    """
+    Estadísticas históricas indexadas por llave empaquetada.
+
+    Attributes:
+        keys (np.ndarray): Llaves shop/item ordenadas (int64)
+        pair_stats (np.ndarray): Matriz (n_keys, 4) float64 con ``PAIR_STATS``
+        item_category (np.ndarray): Categoría por item_id (-1 si no existe)
+        category_count (np.ndarray): Número de items por categoría
+    """
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        pair_stats: np.ndarray,
+        item_category: np.ndarray,
+        category_count: np.ndarray,
+    ):
+        self.keys = keys
+        self.pair_stats = pair_stats
+        self.item_category = item_category
+        self.category_count = category_count
+
+    @classmethod
+    def build(
+        cls,
+        sales_df: pd.DataFrame,
+        items_df: pd.DataFrame,
+        pair_keys: Optional[np.ndarray] = None,
+    ) -> "HistoricalStats":
+        """
+        Calcula las estadísticas a partir del historial.
+
+        Args:
+            sales_df (pd.DataFrame): Ventas procesadas
+            items_df (pd.DataFrame): Catálogo de items
+            pair_keys (np.ndarray, optional): Llave de cada código de
+                ``PairIndex``; si se indica, se agrupa por la columna
+                'pair_code' de ``sales_df`` sin volver a factorizar los pares
+
+        Returns:
+            HistoricalStats: Índice construido
+        """
+        if pair_keys is None:
+            packed = pack_keys(sales_df["shop_id"], sales_df["item_id"])
+            keys, inverse = np.unique(packed, return_inverse=True)
+            inverse = inverse.ravel()
+        else:
+            keys, inverse = pair_keys, sales_df["pair_code"].to_numpy()
+
+        pair_stats = grouped_pair_stats(inverse, len(keys), sales_df)
+
+        if pair_keys is not None:
+            # El vocabulario incluye pares sin ventas (solo en test) y, tras
+            # agregar ventas, códigos fuera del orden de las llaves
+            seen = np.bincount(inverse, minlength=len(keys)) > 0
+            keys, pair_stats = keys[seen], pair_stats[seen]
+            if len(keys) > 1 and not (keys[1:] > keys[:-1]).all():
+                order = np.argsort(keys, kind="stable")
+                keys, pair_stats = keys[order], pair_stats[order]
+        return cls.from_pairs(keys, pair_stats, items_df)
+
+    @classmethod
+    def from_pairs(
+        cls, keys: np.ndarray, pair_stats: np.ndarray, items_df: pd.DataFrame
+    ) -> "HistoricalStats":
+        """
+        Construye el índice a partir de estadísticas por par ya calculadas.
+
+        Args:
+            keys (np.ndarray): Llaves ``pack_keys`` únicas y ordenadas
+            pair_stats (np.ndarray): Matriz (n_keys, 4) con ``PAIR_STATS``
+            items_df (pd.DataFrame): Catálogo de items
+
+        Returns:
+            HistoricalStats: Índice construido
+        """
+        item_ids = items_df["item_id"].to_numpy()
+        categories = items_df["item_category_id"].to_numpy()
+        item_category = np.full(item_ids.max() + 1, -1, dtype=np.int32)
+        item_category[item_ids] = categories
+        category_count = np.bincount(categories).astype(np.int64)
+
+        return cls(keys, pair_stats, item_category, category_count)
+
+    def save(self, directory: Path):
+        """
+        Guarda el índice como arreglos ``.npy``.
+
+        Args:
+            directory (Path): Directorio de destino
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "keys.npy", self.keys)
+        np.save(directory / "pair_stats.npy", np.ascontiguousarray(self.pair_stats))
+        np.save(directory / "item_category.npy", self.item_category)
+        np.save(directory / "category_count.npy", self.category_count)
+        with open(directory / "meta.json", "w") as f:
+            json.dump({"n_keys": int(len(self.keys)), "pair_stats": PAIR_STATS}, f)
+        logger.info(f"Estadísticas históricas guardadas en: {directory}")
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> Optional["HistoricalStats"]:
+        """
+        Abre un índice guardado.
+
+        Args:
+            directory (Path): Directorio del índice
+            mmap (bool): Abrir los arreglos en modo memory-mapped
+
+        Returns:
+            HistoricalStats: Índice, o None si no existe
+        """
+        directory = Path(directory)
+        if not (directory / "meta.json").exists():
+            return None
+        mode = "r" if mmap else None
+        return cls(
+            np.load(directory / "keys.npy", mmap_mode=mode),
+            np.load(directory / "pair_stats.npy", mmap_mode=mode),
+            np.load(directory / "item_category.npy", mmap_mode=mode),
+            np.load(directory / "category_count.npy", mmap_mode=mode),
+        )
+
+    def lookup_pairs(self, shop_ids, item_ids) -> np.ndarray:
+        """
+        Estadísticas por fila para pares (shop_id, item_id).
+
+        Returns:
+            np.ndarray: Matriz (n, 4) con ``PAIR_STATS``; NaN si el par no existe
+        """
+        query = pack_keys(shop_ids, item_ids)
+        out = np.full((len(query), len(PAIR_STATS)), np.nan)
+        positions, found = sorted_lookup(query, self.keys)
+        out[found] = self.pair_stats[positions[found]]
+        return out
+
+    def lookup_categories(self, item_ids) -> tuple:
+        """
+        Categoría y número de items de la categoría por fila.
+
+        Returns:
+            tuple: (item_category_id, category_count); NaN si el item no existe
+        """
+        items = np.asarray(item_ids, dtype=np.int64)
+        in_range = (items >= 0) & (items < len(self.item_category))
+        category = np.full(len(items), -1, dtype=np.int64)
+        category[in_range] = self.item_category[items[in_range]]
+
+        known = category >= 0
+        count = np.full(len(items), np.nan)
+        in_counts = known & (category < len(self.category_count))
+        count[in_counts] = self.category_count[category[in_counts]]
+        category_out = np.where(known, category, np.nan)
+        return category_out, count
@@ -0,0 +1,300 @@
+"""
+Almacenamiento de tablas del directorio ``processed/``.
+
+Este módulo abstrae el formato en que se guardan los DataFrames intermedios
+del pipeline. Los formatos columnares (Parquet y Feather/Arrow IPC) conservan
+los dtypes (fechas, enteros compactos, float32) y permiten leer solo las
+columnas necesarias; CSV se mantiene por compatibilidad. Al escribir una tabla
+se borran sus copias en otros formatos, de modo que quien la lea (con
+cualquier formato configurado) encuentra siempre la última versión.
+
+Con ``dtype_backend="pyarrow"`` las tablas se leen como columnas
+``pd.ArrowDtype``, que comparten los buffers de Arrow en lugar de convertirlos
+a arreglos de NumPy.
+
+Clases:
+    FrameStore: Lectura y escritura de tablas en un directorio
+
+Funciones:
+    backend_dtypes: Esquema de lectura traducido al backend de dtypes
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Backends de dtypes al leer: "numpy" (por defecto) o "pyarrow" (ArrowDtype)
+DTYPE_BACKENDS = ("numpy", "pyarrow")
+
+# Formato -> extensión de archivo
+FORMATS = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "csv": ".csv",
+}
+
+
+def backend_dtypes(dtypes: dict, dtype_backend: str = "numpy") -> dict:
+    """
+    Esquema de lectura para el backend indicado.
+
+    ``pd.read_csv(dtype=..., dtype_backend="pyarrow")`` no aplica el backend a
+    las columnas con dtype de NumPy explícito, así que se traduce cada dtype a
+    su ``pd.ArrowDtype``.
+
+    Args:
+        dtypes (dict): Columna -> dtype de NumPy (o "string")
+        dtype_backend (str): "numpy" o "pyarrow"
+
+    Returns:
+        dict: El esquema sin cambios o con dtypes de Arrow
+    """
+    if dtype_backend != "pyarrow":
+        return dtypes
+    import numpy as np
+    import pyarrow as pa
+
+    return {
+        column: "string[pyarrow]" if dtype == "string"
+        else pd.ArrowDtype(pa.from_numpy_dtype(np.dtype(dtype)))
+        for column, dtype in dtypes.items()
+    }
+
+
+class FrameStore:
+    """
+    Lectura y escritura de DataFrames con un formato configurable.
+
+    Attributes:
+        directory (Path): Directorio donde se guardan las tablas
+        fmt (str): Formato de escritura ("parquet", "feather" o "csv")
+        dtype_backend (str): Backend de las columnas leídas
+    """
+
+    def __init__(self, directory: Path, fmt: str = "parquet", dtype_backend: str = "numpy"):
+        """
+        Inicializa el almacén.
+
+        Args:
+            directory (Path): Directorio de las tablas
+            fmt (str): Formato de escritura
+            dtype_backend (str): "numpy" o "pyarrow"; con "pyarrow" las columnas
+                se leen como ``pd.ArrowDtype`` sin convertir los buffers de Arrow
+        """
+        if fmt not in FORMATS:
+            raise ValueError(
+                f"Formato no soportado: {fmt}. Opciones: {', '.join(FORMATS)}"
+            )
+        if dtype_backend not in DTYPE_BACKENDS:
+            raise ValueError(
+                f"Backend de dtypes no soportado: {dtype_backend}. "
+                f"Opciones: {', '.join(DTYPE_BACKENDS)}"
+            )
+        self.directory = Path(directory)
+        self.fmt = fmt
+        self.dtype_backend = dtype_backend
+
+    @staticmethod
+    def _stem(name: str) -> str:
+        """Quita la extensión conocida de un nombre de tabla."""
+        for ext in FORMATS.values():
+            if name.endswith(ext):
+                return name[: -len(ext)]
+        return name
+
+    def path(self, name: str, fmt: Optional[str] = None) -> Path:
+        """Ruta del archivo de la tabla ``name`` en el formato indicado."""
+        return self.directory / f"{self._stem(name)}{FORMATS[fmt or self.fmt]}"
+
+    def resolve(self, name: str) -> tuple:
+        """
+        Busca el archivo existente de una tabla.
+
+        Se prueba primero el formato configurado y luego los demás, para poder
+        leer directorios generados con otro formato.
+
+        Returns:
+            tuple: (path, fmt) del archivo encontrado
+        """
+        candidates = [self.fmt] + [f for f in FORMATS if f != self.fmt]
+        for fmt in candidates:
+            path = self.path(name, fmt)
+            if path.exists():
+                return path, fmt
+        raise FileNotFoundError(
+            f"No se encontró la tabla '{self._stem(name)}' en {self.directory}"
+        )
+
+    def remove_other_formats(self, name: str):
+        """Borra las copias de la tabla ``name`` en formatos distintos al configurado."""
+        for fmt in FORMATS:
+            path = self.path(name, fmt)
+            if fmt != self.fmt and path.exists():
+                path.unlink()
+                logger.info(f"Copia anterior en {fmt} eliminada: {path}")
+
+    def exists(self, name: str) -> bool:
+        """Indica si existe la tabla en algún formato."""
+        try:
+            self.resolve(name)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def write(self, df: pd.DataFrame, name: str) -> Path:
+        """
+        Guarda un DataFrame.
+
+        Args:
+            df (pd.DataFrame): Datos a guardar
+            name (str): Nombre de la tabla (con o sin extensión)
+
+        Returns:
+            Path: Ruta del archivo escrito
+        """
+        path = self.path(name)
+        if self.fmt == "parquet":
+            df.to_parquet(path, index=False)
+        elif self.fmt == "feather":
+            # Feather exige un índice por defecto
+            df.reset_index(drop=True).to_feather(path)
+        else:
+            df.to_csv(path, index=False)
+        self.remove_other_formats(name)
+        return path
+
+    def write_chunks(self, chunks: Iterator[pd.DataFrame], name: str) -> Path:
+        """
+        Guarda un DataFrame por partes, sin materializarlo completo en memoria.
+
+        Todas las partes deben tener las mismas columnas; los tipos se fijan
+        con la primera parte.
+
+        Args:
+            chunks (Iterator[pd.DataFrame]): Partes a guardar, en orden
+            name (str): Nombre de la tabla (con o sin extensión)
+
+        Returns:
+            Path: Ruta del archivo escrito
+        """
+        path = self.path(name)
+        if self.fmt == "csv":
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+            self.remove_other_formats(name)
+            return path
+
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet as pq
+
+        writer = None
+        schema = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    if self.fmt == "parquet":
+                        writer = pq.ParquetWriter(path, schema)
+                    else:
+                        # Feather v2 es el formato de archivo Arrow IPC
+                        writer = pa.ipc.new_file(path, schema)
+                writer.write_table(table.cast(schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        self.remove_other_formats(name)
+        return path
+
+    def append(self, df: pd.DataFrame, name: str) -> Path:
+        """
+        Agrega filas al final de una tabla existente (o la crea).
+
+        En CSV las filas se agregan al archivo; en los formatos columnares el
+        archivo se reescribe con las filas nuevas al final.
+
+        Args:
+            df (pd.DataFrame): Filas a agregar
+            name (str): Nombre de la tabla (con o sin extensión)
+
+        Returns:
+            Path: Ruta del archivo escrito
+        """
+        if not self.exists(name):
+            return self.write(df, name)
+        if self.fmt == "csv" and self.resolve(name)[1] == "csv":
+            path = self.path(name)
+            df.to_csv(path, index=False, mode="a", header=False)
+            self.remove_other_formats(name)
+            return path
+        existing = self.read(name)
+        return self.write(pd.concat([existing, df[existing.columns]], ignore_index=True), name)
+
+    def read(self, name: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Lee una tabla.
+
+        Args:
+            name (str): Nombre de la tabla (con o sin extensión)
+            columns (Iterable[str], optional): Columnas a leer; None lee todas
+
+        Returns:
+            pd.DataFrame: Datos leídos
+        """
+        path, fmt = self.resolve(name)
+        columns = list(columns) if columns is not None else None
+        backend = {"dtype_backend": "pyarrow"} if self.dtype_backend == "pyarrow" else {}
+        if fmt == "parquet":
+            return pd.read_parquet(path, columns=columns, **backend)
+        if fmt == "feather":
+            return pd.read_feather(path, columns=columns, **backend)
+        return pd.read_csv(path, usecols=columns, **backend)
+
+    def iter_chunks(
+        self, name: str, chunksize: int, columns: Optional[Iterable[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lee una tabla por partes sin cargarla completa en memoria.
+
+        Args:
+            name (str): Nombre de la tabla (con o sin extensión)
+            chunksize (int): Máximo de filas por parte
+            columns (Iterable[str], optional): Columnas a leer; None lee todas
+
+        Yields:
+            pd.DataFrame: Partes de a lo más ``chunksize`` filas, en orden
+        """
+        path, fmt = self.resolve(name)
+        columns = list(columns) if columns is not None else None
+        if fmt == "csv":
+            backend = {"dtype_backend": "pyarrow"} if self.dtype_backend == "pyarrow" else {}
+            yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, **backend)
+            return
+
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet as pq
+
+        mapper = {"types_mapper": pd.ArrowDtype} if self.dtype_backend == "pyarrow" else {}
+        if fmt == "parquet":
+            batches = pq.ParquetFile(path).iter_batches(
+                batch_size=chunksize, columns=columns
+            )
+            for batch in batches:
+                yield batch.to_pandas(**mapper)
+            return
+
+        # Arrow IPC con memory map: solo se leen las páginas de cada parte
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for start in range(0, batch.num_rows, chunksize):
+                    yield batch.slice(start, chunksize).to_pandas(**mapper)
@@ -0,0 +1,406 @@
+"""
+Validación cruzada temporal y búsqueda de hiperparámetros.
+
+Los folds son *walk-forward* por ``date_block_num``: cada fold entrena con los
+bloques anteriores al de validación, de modo que nunca se entrena con ventas
+posteriores a las del periodo validado. Las features de cada fold se calculan una
+sola vez (la media por categoría y el scaler se ajustan solo con las filas de
+entrenamiento del fold) y se guardan como ``.npy`` en un directorio
+direccionado por la huella de las entradas; todos los candidatos y procesos
+las abren memory-mapped. Los bins de LightGBM de cada fold se calculan una
+vez antes de la búsqueda y cada candidato los carga del binario guardado.
+
+La búsqueda evalúa pares (candidato, fold) en un pool de procesos con un
+número acotado de hilos de LightGBM por proceso y descarta candidatos con
+*successive halving*: cada ronda entrena con ``eta`` veces más árboles y
+conserva solo el mejor ``1/eta`` de los candidatos.
+
+Funciones:
+    walk_forward_folds: Índices de entrenamiento y validación por bloque
+    prepare_folds: Calcula (o reutiliza) las features de cada fold
+    fold_rows: Filas de entrenamiento y validación de un fold en la matriz completa
+    build_fold_bins: Calcula una vez los bins de LightGBM de cada fold
+    cross_validate: RMSE por fold de un conjunto de parámetros
+    sample_candidates: Muestra candidatos de un espacio de búsqueda
+    successive_halving: Búsqueda paralela con descarte temprano
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import json
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from src.feature_matrix import (
+    dataset_params, lgb_binary_path, load_or_build_dataset, scale_to_array,
+)
+from src.agg_cube import AggregationCube
+from src.parallel import default_workers
+from src.stage_cache import StageCache, source_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Espacio de búsqueda por defecto (valores discretos por parámetro)
+DEFAULT_SEARCH_SPACE = {
+    "num_leaves": [15, 31, 63, 127],
+    "learning_rate": [0.02, 0.05, 0.1],
+    "min_child_samples": [10, 20, 50, 100],
+    "subsample": [0.6, 0.8, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+}
+
+def walk_forward_folds(
+    blocks: np.ndarray, n_folds: int, valid_blocks: int = 1
+) -> List[tuple]:
+    """
+    Divide las filas en folds temporales por bloque de fecha.
+
+    El último fold valida con los ``valid_blocks`` bloques más recientes; cada
+    fold anterior retrocede ``valid_blocks`` bloques.
+
+    Args:
+        blocks (np.ndarray): ``date_block_num`` de cada fila
+        n_folds (int): Número de folds
+        valid_blocks (int): Bloques de validación por fold
+
+    Returns:
+        list: (train_idx, valid_idx, valid_block_ids) por fold, del más antiguo al más reciente
+    """
+    unique = np.unique(blocks)
+    if len(unique) <= n_folds * valid_blocks:
+        raise ValueError(
+            f"Se necesitan más de {n_folds * valid_blocks} bloques de fecha "
+            f"para {n_folds} folds; hay {len(unique)}"
+        )
+    folds = []
+    for k in range(n_folds, 0, -1):
+        start = len(unique) - k * valid_blocks
+        valid_ids = unique[start:start + valid_blocks]
+        train_idx = np.flatnonzero(blocks < valid_ids[0])
+        valid_idx = np.flatnonzero(np.isin(blocks, valid_ids))
+        folds.append((train_idx, valid_idx, valid_ids.tolist()))
+    return folds
+
+
+def _write_fold(
+    directory: Path, X: pd.DataFrame, y: pd.Series, train_idx: np.ndarray, valid_idx: np.ndarray
+):
+    """Escala con el scaler del fold y guarda las cuatro matrices float32 y sus filas."""
+    directory.mkdir(parents=True, exist_ok=True)
+    np.save(directory / "train_idx.npy", train_idx.astype(np.int32))
+    np.save(directory / "valid_idx.npy", valid_idx.astype(np.int32))
+    scaler = StandardScaler().fit(X.iloc[train_idx])
+    for name, idx in (("train", train_idx), ("valid", valid_idx)):
+        out = np.lib.format.open_memmap(
+            directory / f"X_{name}.npy", mode="w+", dtype=np.float32,
+            shape=(len(idx), X.shape[1]),
+        )
+        scale_to_array(X.iloc[idx], scaler, out)
+        out.flush()
+        del out
+        np.save(directory / f"y_{name}.npy", y.to_numpy(dtype=np.float32)[idx])
+
+
+def prepare_folds(
+    engineer,
+    directory: Path,
+    n_folds: int,
+    valid_blocks: int = 1,
+    fingerprint_mode: str = "mtime",
+) -> List[Path]:
+    """
+    Calcula las features de cada fold o reutiliza las ya guardadas.
+
+    Las features de ventana son causales (solo usan filas anteriores del mismo
+    shop/item) y se calculan una vez sobre todo el historial; la media por
+    categoría y el scaler se recalculan por fold con las filas de
+    entrenamiento, para no filtrar información del periodo de validación.
+
+    Args:
+        engineer (FeatureEngineer): Ingeniero de features del directorio de datos
+        directory (Path): Directorio base de la caché de folds
+        n_folds (int): Número de folds
+        valid_blocks (int): Bloques de validación por fold
+        fingerprint_mode (str): Huella de las entradas ("mtime" o "hash")
+
+    Returns:
+        list: Directorios de los folds, del más antiguo al más reciente
+    """
+    key = StageCache.key(
+        "cv_folds",
+        features=engineer.fingerprint(fingerprint_mode),
+        n_folds=n_folds,
+        valid_blocks=valid_blocks,
+        source=source_fingerprint([Path(__file__)]),
+    )
+    root = Path(directory) / key[:16]
+    manifest_path = root / "folds.json"
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        logger.info(f"Reutilizando features de {n_folds} folds en: {root}")
+        return [root / fold["name"] for fold in manifest["folds"]]
+
+    logger.info(f"Calculando features de {n_folds} folds temporales...")
+    df = engineer.create_base_features(extra_columns=["date_block_num"])
+    blocks = df["date_block_num"].to_numpy()
+    # Un solo cubo por bloque: la media de cada fold es un prefijo de periodos
+    cube = None
+    if engineer.requires("category_avg"):
+        cube = AggregationCube.from_frame(
+            df, [engineer.count_column], period_column="date_block_num"
+        )
+    feature_cols = engineer._get_feature_columns()
+
+    folds = []
+    for i, (train_idx, valid_idx, valid_ids) in enumerate(
+        walk_forward_folds(blocks, n_folds, valid_blocks)
+    ):
+        # Media por categoría solo con el periodo de entrenamiento (bloques < validación)
+        if cube is not None:
+            df["category_avg"] = cube.lookup(
+                "mean", engineer.count_column, df["item_category_id"], until=valid_ids[0]
+            )
+        df = engineer.create_derived_features(df)
+
+        name = f"fold_{i:02d}"
+        _write_fold(root / name, df[feature_cols], df["item_cnt_log"], train_idx, valid_idx)
+        folds.append({
+            "name": name,
+            "valid_blocks": valid_ids,
+            "train_rows": int(len(train_idx)),
+            "valid_rows": int(len(valid_idx)),
+        })
+        logger.info(
+            f"Fold {i}: valida bloques {valid_ids} "
+            f"({len(train_idx):,} filas de entrenamiento, {len(valid_idx):,} de validación)"
+        )
+
+    with open(manifest_path, "w") as f:
+        json.dump({"key": key, "columns": feature_cols, "folds": folds}, f, indent=2)
+    return [root / fold["name"] for fold in folds]
+
+
+def fold_rows(fold_dir: Path) -> tuple:
+    """
+    Filas de entrenamiento y validación de un fold.
+
+    Las filas de ``create_base_features`` siguen el orden de la matriz de
+    ``create_all_features``, así que los índices sirven sobre ``X_train.npy``.
+
+    Args:
+        fold_dir (Path): Directorio de ``prepare_folds``
+
+    Returns:
+        tuple: (train_idx, valid_idx) arreglos int32
+    """
+    return np.load(Path(fold_dir) / "train_idx.npy"), np.load(Path(fold_dir) / "valid_idx.npy")
+
+
+def _init_worker(threads: int):
+    """Limita los hilos de OpenMP/BLAS de cada proceso."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+
+def _fold_binary(fold_dir: Path, params: dict) -> Path:
+    """Binario del Dataset de entrenamiento de un fold."""
+    return lgb_binary_path(fold_dir / "X_train.npy", fold_dir / "y_train.npy", params)
+
+
+def build_fold_bins(fold_dirs: Sequence[Path], candidates: Sequence[dict]):
+    """
+    Calcula y guarda los bins de entrenamiento de cada fold que aún no existan.
+
+    Se ejecuta antes del pool, de modo que los procesos solo leen binarios.
+    Los candidatos que solo difieren en parámetros de árbol comparten bins.
+
+    Args:
+        fold_dirs (Sequence[Path]): Directorios de ``prepare_folds``
+        candidates (Sequence[dict]): Parámetros de los candidatos
+    """
+    distinct = {json.dumps(dataset_params(c), sort_keys=True): c for c in candidates}
+    for params in distinct.values():
+        for fold_dir in fold_dirs:
+            binary_path = _fold_binary(fold_dir, params)
+            if not binary_path.exists():
+                load_or_build_dataset(
+                    np.load(fold_dir / "X_train.npy", mmap_mode="r"),
+                    np.load(fold_dir / "y_train.npy", mmap_mode="r"),
+                    binary_path, params,
+                )
+
+
+def _evaluate(task: tuple) -> float:
+    """Entrena en un fold y devuelve el RMSE de validación (escala log1p)."""
+    import lightgbm as lgb
+
+    fold_dir, params = task
+    binary_path = _fold_binary(fold_dir, params)
+    train_set = load_or_build_dataset(
+        np.load(fold_dir / "X_train.npy", mmap_mode="r"),
+        np.load(fold_dir / "y_train.npy", mmap_mode="r"),
+        binary_path if binary_path.exists() else None, params,
+    )
+    X_valid = np.load(fold_dir / "X_valid.npy", mmap_mode="r")
+    y_valid = np.load(fold_dir / "y_valid.npy", mmap_mode="r")
+    params = {"objective": "regression", **params}
+    num_rounds = params.pop("n_estimators", 100)
+    booster = lgb.train(params, train_set, num_boost_round=num_rounds)
+    residual = booster.predict(X_valid) - y_valid
+    return float(np.sqrt(np.mean(np.square(residual))))
+
+
+def _pool(n_jobs: int, threads: int) -> ProcessPoolExecutor:
+    """Pool de procesos con ``spawn`` (LightGBM/OpenMP no es seguro tras ``fork``)."""
+    return ProcessPoolExecutor(
+        max_workers=n_jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
+
+
+def _threads(n_jobs: int, threads_per_worker: int) -> int:
+    """Hilos por proceso: los indicados o las CPUs repartidas entre procesos."""
+    return threads_per_worker or max(1, default_workers() // n_jobs)
+
+
+def cross_validate(
+    params: dict, fold_dirs: Sequence[Path], n_jobs: int = 1, threads_per_worker: int = 0
+) -> List[float]:
+    """
+    RMSE de validación por fold (escala log1p) de un conjunto de parámetros.
+
+    Args:
+        params (dict): Parámetros de ``LGBMRegressor``
+        fold_dirs (Sequence[Path]): Directorios de ``prepare_folds``
+        n_jobs (int): Procesos (un fold por proceso)
+        threads_per_worker (int): Hilos de LightGBM por proceso (0 = automático)
+
+    Returns:
+        list: RMSE de cada fold
+    """
+    n_jobs = max(1, min(n_jobs, len(fold_dirs)))
+    threads = _threads(n_jobs, threads_per_worker)
+    params = {**params, "n_jobs": threads, "verbose": -1}
+    build_fold_bins(fold_dirs, [params])
+    with _pool(n_jobs, threads) as pool:
+        return list(pool.map(_evaluate, [(fold, params) for fold in fold_dirs]))
+
+
+def sample_candidates(
+    space: Dict[str, list], n_candidates: int, base: dict, seed: int = 42
+) -> List[dict]:
+    """
+    Muestra candidatos distintos del espacio de búsqueda.
+
+    Args:
+        space (dict): Valores posibles por parámetro
+        n_candidates (int): Número de candidatos (a lo más el tamaño del espacio)
+        base (dict): Parámetros fijos que completan cada candidato
+        seed (int): Semilla aleatoria
+
+    Returns:
+        list: Parámetros de cada candidato
+    """
+    rng = np.random.default_rng(seed)
+    names = sorted(space)
+    sizes = [len(space[name]) for name in names]
+    total = int(np.prod(sizes))
+    flat = rng.choice(total, size=min(n_candidates, total), replace=False)
+    candidates = []
+    for index in flat:
+        choice = np.unravel_index(index, sizes)
+        candidates.append({
+            **base,
+            **{name: space[name][i] for name, i in zip(names, choice)},
+        })
+    return candidates
+
+
+def successive_halving(
+    candidates: List[dict],
+    fold_dirs: Sequence[Path],
+    min_rounds: int = 50,
+    max_rounds: int = 1000,
+    eta: int = 3,
+    n_jobs: int = 1,
+    threads_per_worker: int = 0,
+) -> tuple:
+    """
+    Búsqueda de hiperparámetros con successive halving sobre folds temporales.
+
+    En cada ronda todos los pares (candidato, fold) vivos se entrenan en
+    paralelo con ``rounds`` árboles; se conserva el mejor ``1/eta`` por RMSE
+    medio (al menos uno) y ``rounds`` se multiplica por ``eta`` hasta
+    ``max_rounds``, de modo que el ganador queda evaluado con el presupuesto
+    completo.
+
+    Args:
+        candidates (list): Parámetros de cada candidato
+        fold_dirs (Sequence[Path]): Directorios de ``prepare_folds``
+        min_rounds (int): Árboles en la primera ronda
+        max_rounds (int): Árboles máximos
+        eta (int): Factor de descarte y de aumento de árboles
+        n_jobs (int): Procesos
+        threads_per_worker (int): Hilos de LightGBM por proceso (0 = automático)
+
+    Returns:
+        tuple: (best_params, history) con ``n_estimators`` de la última ronda
+            y el registro de cada ronda
+    """
+    if eta < 2:
+        raise ValueError("eta debe ser al menos 2")
+    threads = _threads(n_jobs, threads_per_worker)
+    alive = list(range(len(candidates)))
+    rounds = min(min_rounds, max_rounds)
+    history = []
+    build_fold_bins(fold_dirs, candidates)
+    with _pool(n_jobs, threads) as pool:
+        while True:
+            tasks = [
+                (fold, {
+                    **candidates[c], "n_estimators": rounds,
+                    "n_jobs": threads, "verbose": -1,
+                })
+                for c in alive for fold in fold_dirs
+            ]
+            rmse = np.asarray(list(pool.map(_evaluate, tasks))).reshape(
+                len(alive), len(fold_dirs)
+            )
+            scores = rmse.mean(axis=1)
+            ranking = np.argsort(scores, kind="stable")
+            history.append({
+                "rounds": rounds,
+                "candidates": [
+                    {"params": candidates[alive[i]], "rmse": float(scores[i]),
+                     "fold_rmse": rmse[i].tolist()}
+                    for i in ranking
+                ],
+            })
+            logger.info(
+                f"Ronda con {rounds} árboles: {len(alive)} candidatos, "
+                f"mejor RMSE {scores[ranking[0]]:.5f}"
+            )
+            if rounds >= max_rounds:
+                break
+            keep = max(1, len(alive) // eta)
+            alive = [alive[i] for i in ranking[:keep]]
+            rounds = min(rounds * eta, max_rounds)
+
+    best = {**candidates[alive[ranking[0]]], "n_estimators": rounds}
+    return best, history
+
+
+def load_search_space(path: Optional[Path]) -> Dict[str, list]:
+    """Espacio de búsqueda desde un JSON ``{param: [valores]}`` o el por defecto."""
+    if path is None:
+        return DEFAULT_SEARCH_SPACE
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,8 @@
+"""Configuración común de las pruebas: el directorio raíz en el path."""
+
+from pathlib import Path
+import sys
+
+# Agregar el directorio raíz al path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
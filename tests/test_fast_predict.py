@@ -0,0 +1,97 @@
+"""
+Paridad de los backends de ``src.fast_predict`` con ``LGBMRegressor.predict``.
+
+Entrena modelos pequeños sobre datos sintéticos con NaN y ceros (faltantes de
+tipo NaN, Zero y None) y compara cada backend con el camino de referencia
+``expm1(model.predict(X)).clip(0, 20)``.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from lightgbm import LGBMRegressor
+
+from src.fast_predict import BACKENDS, CompiledEnsemble, FastPredictor
+
+# Diferencia máxima aceptada entre caminos (conteos), como bench_predict
+PARITY_TOL = 1e-6
+
+FEATURES = ["dense", "with_nan", "with_zeros", "mixed"]
+
+
+def _frame(rows: int, seed: int) -> pd.DataFrame:
+    """Features float32 con NaN, ceros y ambos."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, len(FEATURES))).astype(np.float32)
+    X[rng.random(rows) < 0.2, 1] = np.nan
+    X[rng.random(rows) < 0.3, 2] = 0.0
+    X[rng.random(rows) < 0.15, 3] = np.nan
+    X[rng.random(rows) < 0.15, 3] = 0.0
+    return pd.DataFrame(X, columns=FEATURES)
+
+
+def _target(X: pd.DataFrame) -> np.ndarray:
+    """Objetivo en escala log1p que depende de los faltantes."""
+    values = X.fillna(-1.0).to_numpy(dtype=np.float64)
+    y = 1.0 + 0.8 * values[:, 0] + 0.5 * values[:, 1] + np.where(values[:, 2] == 0, 1.0, 0.3)
+    return np.log1p(np.clip(y + 0.4 * values[:, 3], 0, None))
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["nan_missing", "zero_missing"])
+def trained(request):
+    """Modelo entrenado y filas de evaluación (con NaN y ceros)."""
+    X = _frame(3000, seed=0)
+    model = LGBMRegressor(
+        n_estimators=40, num_leaves=15, min_child_samples=5,
+        zero_as_missing=request.param, verbose=-1, random_state=0,
+    )
+    model.fit(X, _target(X))
+    X_eval = _frame(500, seed=1)
+    # Casos límite: filas enteras de NaN y de ceros
+    X_eval.iloc[0] = np.nan
+    X_eval.iloc[1] = 0.0
+    return model, X_eval
+
+
+def _reference(model, X: pd.DataFrame) -> np.ndarray:
+    """Camino actual de inferencia."""
+    return np.expm1(model.predict(X)).clip(0, 20)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_matches_lgbm_predict(trained, backend):
+    model, X = trained
+    predictor = FastPredictor(model, backend)
+    np.testing.assert_allclose(predictor.predict(X), _reference(model, X), atol=PARITY_TOL)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_accepts_array_and_reordered_frame(trained, backend):
+    model, X = trained
+    predictor = FastPredictor(model, backend)
+    expected = _reference(model, X)
+    np.testing.assert_allclose(predictor.predict(X.to_numpy()), expected, atol=PARITY_TOL)
+    np.testing.assert_allclose(predictor.predict(X[FEATURES[::-1]]), expected, atol=PARITY_TOL)
+
+
+def test_raw_scores_match_booster(trained):
+    model, X = trained
+    expected = model.predict(X)
+    for backend in BACKENDS:
+        raw = FastPredictor(model, backend).predict_raw(X)
+        np.testing.assert_allclose(raw, expected, atol=PARITY_TOL)
+
+
+def test_saved_ensemble_matches(trained, tmp_path):
+    model, X = trained
+    CompiledEnsemble(model.booster_).save(tmp_path / "ensemble")
+    predictor = FastPredictor.from_ensemble(
+        CompiledEnsemble.load(tmp_path / "ensemble"), model.booster_.feature_name()
+    )
+    np.testing.assert_allclose(predictor.predict(X), _reference(model, X), atol=PARITY_TOL)
+
+
+def test_unknown_backend(trained):
+    model, _ = trained
+    with pytest.raises(ValueError, match="Backend no soportado"):
+        FastPredictor(model, "onnx")
@@ -7,10 +7,10 @@ import sys
 import logging
 import joblib
 import lightgbm as lgb
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import mean_squared_error
+from sklearn.metrics import mean_squared_error, r2_score
 import numpy as np
 import argparse
+import json
 from typing import Tuple, Optional
 
 import pandas as pd
@@ -21,7 +21,25 @@ PROJECT_ROOT = Path(__file__).parent
 sys.path.append(str(PROJECT_ROOT))
 
 from src.feature_engineering import FeatureEngineer
+from src.feature_registry import REGISTRY
+from src.bundle import write_bundle
+from src.regressor import BoosterRegressor
+from src.feature_matrix import (
+    META_FILE, X_FILE, Y_FILE, index_subset, lgb_binary_path, load_or_build_dataset,
+    open_feature_matrix,
+)
 from src.data_processor import DataProcessor
+from src.parallel import default_workers
+from src.profiling import add_profiling_args, configure_from_args, stage, write_report
+from src.stage_cache import StageCache, source_fingerprint
+from src.tuning import (
+    cross_validate,
+    fold_rows,
+    load_search_space,
+    prepare_folds,
+    sample_candidates,
+    successive_halving,
+)
 
 # Configurar logging
 logging.basicConfig(
@@ -29,6 +47,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_PARAMS = {
+    "n_estimators": 1000,
+    "learning_rate": 0.05,
+    "num_leaves": 31,
+    "min_child_samples": 20,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "random_state": 42,
+}
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Train sales prediction model')
@@ -38,21 +66,205 @@ def parse_args():
                       help='Directory to save trained model')
     parser.add_argument('--model-name', type=str, default='model.joblib',
                       help='Name of the model file')
-    return parser.parse_args()
+    parser.add_argument('--bundle-dir', type=str, default=None,
+                      help='Versioned model bundle for inference (default: <model-dir>/bundle, '
+                           'where inference.py and serve.py look; empty string to skip)')
+    parser.add_argument('--n-jobs', type=int, default=1,
+                      help='Worker processes for feature engineering')
+    parser.add_argument('--readers', type=int, default=1,
+                      help='Threads reading the processed sales, items and test tables concurrently')
+    parser.add_argument('--dtype-backend', type=str, default='numpy',
+                      choices=['numpy', 'pyarrow'],
+                      help='Column dtypes of loaded frames: NumPy or Arrow-backed (pd.ArrowDtype)')
+    parser.add_argument('--features', type=str, nargs='+', default=None,
+                      choices=REGISTRY.features(), metavar='FEATURE',
+                      help='Subset of features to compute and train on; only their '
+                           'dependencies are evaluated (default: all)')
+    parser.add_argument('--granularity', type=str, default='daily',
+                      choices=['daily', 'monthly'],
+                      help='Training rows: one per sale (daily) or one per month/shop/item (monthly)')
+    parser.add_argument('--save-feature-state', action='store_true',
+                      help='Save per-group state so prep.py --append can update features incrementally')
+    parser.add_argument('--reuse-features', action='store_true',
+                      help='Train on the saved X_train.npy/y_train.npy instead of recomputing features')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                      help='Stage cache directory; skips stages whose inputs are unchanged')
+    parser.add_argument('--cache-max-gb', type=float, default=10.0,
+                      help='Maximum stage cache size (LRU eviction)')
+    parser.add_argument('--cache-fingerprint', type=str, default='mtime',
+                      choices=['mtime', 'hash'],
+                      help='How input files are fingerprinted for the cache')
+    parser.add_argument('--cv-folds', type=int, default=0,
+                      help='Walk-forward CV folds by date block (0 = random holdout only)')
+    parser.add_argument('--cv-valid-blocks', type=int, default=1,
+                      help='Date blocks validated per fold')
+    parser.add_argument('--tune', action='store_true',
+                      help='With --cv-folds, search hyperparameters with successive halving')
+    parser.add_argument('--n-candidates', type=int, default=27,
+                      help='Candidates sampled from the search space')
+    parser.add_argument('--search-space', type=str, default=None,
+                      help='JSON file {param: [values]} (default: built-in space)')
+    parser.add_argument('--halving-eta', type=int, default=3,
+                      help='Successive halving keep ratio and round multiplier')
+    parser.add_argument('--min-rounds', type=int, default=50,
+                      help='Boosting rounds in the first halving rung')
+    parser.add_argument('--tune-jobs', type=int, default=default_workers(),
+                      help='Worker processes for CV and tuning')
+    parser.add_argument('--threads-per-worker', type=int, default=0,
+                      help='LightGBM threads per worker (0 = CPUs / workers)')
+    parser.add_argument('--seed', type=int, default=42,
+                      help='Random seed for candidate sampling')
+    add_profiling_args(parser)
+    args = parser.parse_args()
+    if args.tune and not args.cv_folds:
+        parser.error('--tune requires --cv-folds')
+    return args
+
+def run_cv(args, engineer: FeatureEngineer, models_path: Path) -> tuple:
+    """
+    Evalúa (o busca) parámetros con validación cruzada temporal.
+
+    Returns:
+        tuple: (params, holdout) con los parámetros para el modelo final y el
+            directorio del fold más reciente, cuya validación se usa al final
+    """
+    fold_dirs = prepare_folds(
+        engineer,
+        engineer.prep_path / "cv_folds",
+        args.cv_folds,
+        args.cv_valid_blocks,
+        args.cache_fingerprint,
+    )
+    report = {"folds": [str(path) for path in fold_dirs]}
+    if args.tune:
+        candidates = sample_candidates(
+            load_search_space(Path(args.search_space) if args.search_space else None),
+            args.n_candidates,
+            base=DEFAULT_PARAMS,
+            seed=args.seed,
+        )
+        with stage("tune") as record:
+            record["rows"] = len(candidates)
+            params, history = successive_halving(
+                candidates,
+                fold_dirs,
+                min_rounds=args.min_rounds,
+                max_rounds=DEFAULT_PARAMS["n_estimators"],
+                eta=args.halving_eta,
+                n_jobs=args.tune_jobs,
+                threads_per_worker=args.threads_per_worker,
+            )
+        report.update(best_params=params, history=history)
+        logger.info(f"Mejores parámetros: {params}")
+    else:
+        params = DEFAULT_PARAMS
+        with stage("cv"):
+            fold_rmse = cross_validate(
+                params, fold_dirs, args.tune_jobs, args.threads_per_worker
+            )
+        report.update(params=params, fold_rmse=fold_rmse)
+        logger.info(
+            f"RMSE CV (log1p): {np.mean(fold_rmse):.5f} "
+            f"(folds: {', '.join(f'{x:.5f}' for x in fold_rmse)})"
+        )
+
+    with open(models_path / "cv_report.json", "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Reporte de validación guardado en: {models_path / 'cv_report.json'}")
+    return params, fold_dirs[-1]
+
+def save_bundle(
+    engineer: FeatureEngineer, model, bundle_dir: Path, params: dict, score: float
+) -> Path:
+    """
+    Escribe el bundle versionado con el modelo, el scaler y el índice histórico.
+
+    Args:
+        engineer (FeatureEngineer): Ingeniero de features del entrenamiento
+        model: Modelo entrenado
+        bundle_dir (Path): Raíz del bundle
+        params (dict): Parámetros del modelo
+        score (float): Score de validación
+
+    Returns:
+        Path: Directorio de la versión escrita
+    """
+    with open(engineer.prep_path / META_FILE) as f:
+        meta = json.load(f)
+    stats = engineer.load_historical_stats()
+    if stats is None:
+        monthly_columns = ["date_block_num", "month", "year"]
+        sales_df, items_df, _ = engineer.load_processed_data(columns={
+            "sales": ["shop_id", "item_id", "item_price", "item_cnt_day"]
+            + (monthly_columns if engineer.granularity == "monthly" else []),
+            "items": ["item_id", "item_category_id"],
+            "test": ["shop_id"],
+        })
+        stats = engineer.save_historical_stats(sales_df, items_df)
+    return write_bundle(
+        bundle_dir, model, meta["columns"],
+        np.asarray(meta["scaler_mean"]), np.asarray(meta["scaler_scale"]), stats,
+        extra={"params": params, "score": score, "granularity": engineer.granularity},
+    )
 
 def train_model(
     X: pd.DataFrame,
     y: pd.Series,
-    params: dict
+    params: dict,
+    binary_path: Optional[Path] = None,
+    split: Optional[tuple] = None,
 ) -> tuple:
-    """Entrena el modelo con los datos proporcionados."""
+    """
+    Entrena el modelo con los datos proporcionados.
+
+    Los bins se calculan una vez sobre toda la matriz (o se cargan de
+    ``binary_path``); entrenamiento y validación son subconjuntos por índice
+    de ese Dataset, sin copiar filas de ``X``.
+
+    Args:
+        X: Matriz de features escalada (memory-mapped)
+        y: Target
+        params (dict): Parámetros de LightGBM (nombres de la API sklearn)
+        binary_path (Path, optional): Binario del Dataset (ver ``lgb_binary_path``)
+        split (tuple, optional): (train_idx, val_idx) filas de entrenamiento y
+            validación, p. ej. las del último fold temporal; por defecto un
+            split aleatorio 80/20
+
+    Returns:
+        tuple: (model, score) con un ``BoosterRegressor`` (interfaz de
+            ``LGBMRegressor``) y el R² de las predicciones de validación
+    """
     try:
-        X_train, X_val, y_train, y_val = train_test_split(
-            X, y, test_size=0.2, random_state=42
+        if split is None:
+            train_idx, val_idx = train_test_split(
+                np.arange(len(y), dtype=np.int32), test_size=0.2, random_state=42
+            )
+        else:
+            train_idx, val_idx = split
+            if max(train_idx.max(initial=-1), val_idx.max(initial=-1)) >= len(y):
+                raise ValueError(
+                    "Las filas del fold no corresponden a la matriz de entrenamiento; "
+                    "recalcule las features"
+                )
+            logger.info(
+                f"Validación temporal: {len(train_idx):,} filas de entrenamiento, "
+                f"{len(val_idx):,} de validación"
+            )
+        dataset = load_or_build_dataset(X, y, binary_path, params)
+        train_set = index_subset(dataset, train_idx)
+        val_set = index_subset(dataset, val_idx)
+
+        params = {"objective": "regression", "metric": "l2", **params}
+        num_rounds = params.pop("n_estimators", 100)
+        evals = {}
+        booster = lgb.train(
+            params, train_set, num_boost_round=num_rounds,
+            valid_sets=[val_set], valid_names=["valid"],
+            callbacks=[lgb.record_evaluation(evals)],
         )
-        model = lgb.LGBMRegressor(**params)
-        model.fit(X_train, y_train)
-        score = model.score(X_val, y_val)
+        # model.joblib conserva la interfaz de LGBMRegressor
+        model = BoosterRegressor(booster, {**params, "n_estimators": num_rounds}, evals)
+        score = r2_score(np.asarray(y)[val_idx], model.predict(X[val_idx]))
         return model, score
     except Exception as e:
         logger.error(f"Error en entrenamiento: {str(e)}")
@@ -63,34 +275,98 @@ def main():
     try:
         # Parsear argumentos
         args = parse_args()
-        
+        configure_from_args(args)
+
         # 1. Configurar rutas
         data_path = Path(args.data_dir)
         models_path = Path(args.model_dir)
         models_path.mkdir(exist_ok=True)
 
+        cache = None
+        if args.cache_dir:
+            cache = StageCache(Path(args.cache_dir), int(args.cache_max_gb * 1024**3))
+
         # 2. Crear features
-        logger.info("Preparando features...")
-        engineer = FeatureEngineer(data_path)
-        X, y = engineer.create_all_features()
-
-        # 3. Entrenar modelo
-        model, score = train_model(X, y, {
-            "n_estimators": 1000,
-            "learning_rate": 0.05,
-            "num_leaves": 31,
-            "min_child_samples": 20,
-            "subsample": 0.8,
-            "colsample_bytree": 0.8,
-            "random_state": 42,
-        })
+        prep_path = data_path / "processed"
+        engineer = FeatureEngineer(
+            data_path, n_jobs=args.n_jobs, granularity=args.granularity,
+            n_readers=args.readers, dtype_backend=args.dtype_backend,
+            features=args.features,
+        )
+        features_key = None
+        features_entry = None
+        if cache is not None and not args.reuse_features:
+            features_key = cache.key(
+                "features",
+                **engineer.fingerprint(args.cache_fingerprint, args.save_feature_state),
+            )
+            features_entry = cache.get("features", features_key)
+            if features_entry is not None:
+                cache.restore(
+                    features_entry, engineer.output_files(args.save_feature_state)
+                )
+
+        if args.reuse_features or features_entry is not None:
+            logger.info("Cargando features guardadas...")
+            X, y, _ = open_feature_matrix(prep_path)
+        else:
+            logger.info("Preparando features...")
+            X, y = engineer.create_all_features(save_state=args.save_feature_state)
+            if cache is not None:
+                cache.put(
+                    "features", features_key,
+                    engineer.output_files(args.save_feature_state),
+                )
 
-        # 4. Guardar modelo
+        # 3. Entrenar modelo (con parámetros de la validación temporal si se pidió)
         model_path = models_path / args.model_name
-        joblib.dump(model, model_path)
-        logger.info(f"Modelo guardado en: {model_path}")
+        params = DEFAULT_PARAMS
+        holdout = None
+        if args.cv_folds:
+            # Validación final con el periodo más reciente, no un split aleatorio
+            params, holdout = run_cv(args, engineer, models_path)
+        train_key = None
+        train_entry = None
+        if cache is not None and features_key is not None:
+            train_key = cache.key(
+                "train",
+                features=features_key,
+                params=params,
+                holdout=str(holdout),
+                source=source_fingerprint(
+                    [PROJECT_ROOT / "train.py", PROJECT_ROOT / "src" / "regressor.py"]
+                ),
+            )
+            train_entry = cache.get("train", train_key)
+
+        if train_entry is not None:
+            cache.restore(train_entry, {"model.joblib": model_path})
+            score = cache.metadata(train_entry)["score"]
+            model = joblib.load(model_path)
+            logger.info(f"Entrenamiento omitido; modelo restaurado en: {model_path}")
+        else:
+            binary_path = lgb_binary_path(
+                prep_path / X_FILE, prep_path / Y_FILE, params, args.cache_fingerprint
+            )
+            with stage("fit") as record:
+                record["rows"] = len(X)
+                split = fold_rows(holdout) if holdout is not None else None
+                model, score = train_model(X, y, params, binary_path, split)
+
+            # 4. Guardar modelo
+            joblib.dump(model, model_path)
+            logger.info(f"Modelo guardado en: {model_path}")
+            if train_key is not None:
+                cache.put("train", train_key, {"model.joblib": model_path}, {"score": score})
         logger.info(f"Score del modelo: {score:.4f}")
 
+        # 5. Bundle versionado para inferencia (modelo + scaler + índice histórico)
+        bundle_dir = models_path / "bundle" if args.bundle_dir is None else args.bundle_dir
+        if bundle_dir:
+            with stage("write_bundle"):
+                save_bundle(engineer, model, Path(bundle_dir), params, score)
+        write_report({"score": score})
+
         logger.info("✅ Entrenamiento completado exitosamente!")
 
     except Exception as e: